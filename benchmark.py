@@ -0,0 +1,268 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import cv2
+import numpy as np
+from ocr_cache import configure_ocr_cache
+from utils import (extract_text_from_image, detect_template_in_image, non_max_suppression, draw_debug_overlay,
+                   _get_rectangles_from_locations)
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+TEMPLATE_SIZES = (16, 32, 64)  # Sizes of the template fixtures
+THRESHOLDS = (0.6, 0.75, 0.9)  # Detection thresholds benchmarked for every template
+
+
+# **************************************************
+# * Fixtures
+# **************************************************
+
+def generate_fixtures(directory=FIXTURES_DIRECTORY):
+    """
+    Render the synthetic fixtures: market screens of the simulator and templates cut from them.
+
+    Recorded frames (`frame_*.png`) can be added to the directory next to them, they are
+    benchmarked as well. Their OCR fields can be added to `fields.json`, which this
+    function overwrites.
+
+    Args:
+        directory (str, optional): Directory the fixtures are written to.
+    """
+    from market_simulator import MarketSimulator
+
+    os.makedirs(directory, exist_ok=True)
+    labels = {}
+    for profile in ('pww_bot_book', 'pww_bot_multi_books', 'pww_bot_equipment_lookup'):
+        simulator = MarketSimulator(profile, seed=0)
+        lines, _ = simulator._new_listing()
+        image = simulator._render(None)
+        simulator.render_field(image, lines)
+        cv2.imwrite(os.path.join(directory, f'frame_{profile}.png'), image)
+        labels[profile] = '\n'.join(lines)
+
+    # Templates centered on a button repeated on the multi books screen
+    image = cv2.imread(os.path.join(directory, 'frame_pww_bot_multi_books.png'))
+    x, y = 419, 468
+    for size in TEMPLATE_SIZES:
+        template = image[y - size // 2:y + size // 2, x - size // 2:x + size // 2]
+        cv2.imwrite(os.path.join(directory, f'template_{size}.png'), template)
+
+    # Field crop with its label for the OCR benchmark
+    with open(os.path.join(directory, 'fields.json'), 'w', encoding='utf-8') as f:
+        json.dump([{'image': 'frame_pww_bot_book.png', 'area': [[274, 653], [396, 684]], 'label': labels['pww_bot_book']}],
+                  f, indent=2)
+
+
+def load_fixtures(directory=FIXTURES_DIRECTORY):
+    """
+    Load the fixtures.
+
+    `fields.json` lists the OCR fields as `{"image": "frame_x.png", "area": [[x1, y1], [x2, y2]], "label": "12,500"}`,
+    where the label is the expected text and is optional.
+
+    Args:
+        directory (str, optional): Directory of the fixtures.
+
+    Returns:
+        tuple: The frames by name, the templates by size and the OCR fields as (image, top-left, bottom-right, label).
+    """
+    frames = {os.path.splitext(os.path.basename(path))[0]: cv2.imread(path)
+              for path in sorted(glob.glob(os.path.join(directory, 'frame_*.png')))}
+    templates = {size: cv2.imread(os.path.join(directory, f'template_{size}.png')) for size in TEMPLATE_SIZES}
+    if not frames or any(template is None for template in templates.values()):
+        raise FileNotFoundError(f'Fixtures not found in {directory}, run "python benchmark.py generate_fixtures"')
+
+    with open(os.path.join(directory, 'fields.json'), encoding='utf-8') as f:
+        fields = [(cv2.imread(os.path.join(directory, entry['image'])), tuple(entry['area'][0]), tuple(entry['area'][1]),
+                   entry.get('label')) for entry in json.load(f)]
+    return frames, templates, fields
+
+
+# **************************************************
+# * Measurement
+# **************************************************
+
+def measure(function, repeat=7, number=None, min_time=0.2):
+    """
+    Time a function like `timeit`, calibrating the number of calls per run.
+
+    Args:
+        function (callable): The function to time, called without arguments.
+        repeat (int, optional): Number of timed runs (default 7).
+        number (int, optional): Calls per run (default: enough calls for a run to last `min_time` / `repeat`).
+        min_time (float, optional): Target total duration in seconds used for the calibration (default 0.2).
+
+    Returns:
+        dict: Minimum, median and mean time per call in milliseconds and the number of calls per run.
+    """
+    function()  # Warm up caches and lazy initializations
+    if number is None:
+        start = time.perf_counter()
+        function()
+        single = max(time.perf_counter() - start, 1e-7)
+        number = max(1, int(min_time / repeat / single))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number * 1000)
+    timings = np.array(timings)
+    return {'min_ms': float(timings.min()), 'median_ms': float(np.median(timings)),
+            'mean_ms': float(timings.mean()), 'number': number}
+
+
+def run_benchmarks(frames, templates, fields, quick=False):
+    """
+    Run the benchmarks of the perception hot paths.
+
+    Args:
+        frames (dict): Frames by name.
+        templates (dict): Templates by size.
+        fields (list): OCR fields as (image, top-left, bottom-right, label).
+        quick (bool, optional): Fewer and shorter runs, for smoke tests (default False).
+
+    Returns:
+        dict: Timings by benchmark name, or the reason a benchmark was skipped.
+    """
+    options = {'repeat': 3, 'min_time': 0.05} if quick else {}
+    results = {}
+    frame_name, frame = next(iter(frames.items()))
+
+    # OCR of every field, without and with the OCR cache, and whether it reads the label
+    for i, (image, top_left, bottom_right, label) in enumerate(fields):
+        name = 'extract_text_from_image' if i == 0 else f'extract_text_from_image/field_{i}'
+        try:
+            configure_ocr_cache(max_size=0)
+            results[f'{name}/uncached'] = measure(lambda: extract_text_from_image(image, top_left, bottom_right), **options)
+            if label is not None:
+                results[f'{name}/uncached']['reads_label'] = extract_text_from_image(image, top_left, bottom_right).strip() == label
+            configure_ocr_cache()
+            results[f'{name}/cached'] = measure(lambda: extract_text_from_image(image, top_left, bottom_right), **options)
+        except Exception as e:
+            results[f'{name}/uncached'] = {'skipped': f'{type(e).__name__}: {e}'}
+        finally:
+            configure_ocr_cache(max_size=0)
+
+    # Template detection at several sizes and thresholds, on every frame
+    for name, image in frames.items():
+        for size, template in templates.items():
+            for threshold in THRESHOLDS:
+                results[f'detect_template_in_image/{name}/{size}px/{threshold}'] = measure(
+                    lambda: detect_template_in_image(image, template=template, threshold=threshold), **options)
+            results[f'detect_template_in_image/{name}/{size}px/nms'] = measure(
+                lambda: detect_template_in_image(image, template=template, grouping='nms'), **options)
+            results[f'detect_template_in_image/{name}/{size}px/pyramid2'] = measure(
+                lambda: detect_template_in_image(image, template=template, pyramid_levels=2), **options)
+
+    # Grouping of the raw match locations: groupRectangles against the vectorized NMS
+    template = templates[TEMPLATE_SIZES[1]]
+    height, width = template.shape[:2]
+    match_result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    locations = np.argwhere(match_result >= 0.3)[:, ::-1][:1000]
+    scores = match_result[locations[:, 1], locations[:, 0]]
+    results['_get_rectangles_from_locations'] = measure(
+        lambda: _get_rectangles_from_locations(locations, width, height), **options)
+    rectangles = _get_rectangles_from_locations(locations, width, height)
+    results['groupRectangles'] = measure(lambda: cv2.groupRectangles(rectangles, groupThreshold=1, eps=0.5), **options)
+    boxes = np.column_stack((locations, np.full(len(locations), width), np.full(len(locations), height)))
+    results['non_max_suppression'] = measure(lambda: non_max_suppression(boxes, scores), **options)
+
+    # Frame handling: copies and BGRA to contiguous BGR conversions
+    bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+    bgr_1080p = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    bgra_1080p = np.zeros((1080, 1920, 4), dtype=np.uint8)
+    results[f'frame_copy/{frame_name}'] = measure(lambda: frame.copy(), **options)
+    results[f'ascontiguousarray/{frame_name}'] = measure(lambda: np.ascontiguousarray(bgra[..., :3]), **options)
+    results['frame_copy/1080p'] = measure(lambda: bgr_1080p.copy(), **options)
+    results['ascontiguousarray/1080p'] = measure(lambda: np.ascontiguousarray(bgra_1080p[..., :3]), **options)
+
+    # Debug overlay of the viewer, including the frame copy it draws into
+    overlay_rectangles = detect_template_in_image(frame, template=template)
+    results['debug_overlay'] = measure(
+        lambda: draw_debug_overlay(frame.copy(), 20.0, (100, 100), lambda pos: pos, ((10, 10), (200, 120)), overlay_rectangles),
+        **options)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.25):
+    """
+    Compare median timings with a baseline.
+
+    Args:
+        results (dict): Current timings by benchmark name.
+        baseline (dict): Baseline timings by benchmark name.
+        tolerance (float, optional): Allowed slowdown ratio before a benchmark counts as regressed (default 0.25).
+
+    Returns:
+        dict: For each benchmark present in both, the baseline and current medians, their ratio and whether it regressed.
+    """
+    comparison = {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or 'median_ms' not in result or 'median_ms' not in reference:
+            continue
+        ratio = result['median_ms'] / reference['median_ms'] if reference['median_ms'] > 0 else 1.0
+        comparison[name] = {'baseline_ms': reference['median_ms'], 'current_ms': result['median_ms'],
+                            'ratio': ratio, 'regressed': ratio > 1 + tolerance}
+    return comparison
+
+
+def main():
+    """
+    Run the benchmark suite, write the results as JSON and compare them with a baseline.
+
+    Returns:
+        int: 1 if a benchmark regressed from the baseline, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the perception hot paths on the fixture frames.")
+    parser.add_argument("command", nargs="?", choices=["run", "generate_fixtures"], default="run")
+    parser.add_argument("--fixtures", help="Directory of the fixture frames and templates.", default=FIXTURES_DIRECTORY)
+    parser.add_argument("--output", help="Write the results to this JSON file.", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Baseline results to compare with.")
+    parser.add_argument("--save_baseline", help="Also save the results as a baseline to this file.")
+    parser.add_argument("--tolerance", type=float, help="Allowed slowdown ratio before a benchmark counts as regressed.", default=0.25)
+    parser.add_argument("--quick", action="store_true", help="Fewer and shorter runs, for smoke tests.")
+    args = parser.parse_args()
+
+    if args.command == "generate_fixtures":
+        generate_fixtures(args.fixtures)
+        print(f'Fixtures written to {args.fixtures}')
+        return 0
+
+    frames, templates, fields = load_fixtures(args.fixtures)
+    results = run_benchmarks(frames, templates, fields, quick=args.quick)
+    report = {
+        'environment': {'python': platform.python_version(), 'opencv': cv2.__version__, 'numpy': np.__version__,
+                        'machine': platform.machine(), 'system': platform.system()},
+        'results': results,
+    }
+
+    for name, result in results.items():
+        if 'skipped' in result:
+            print(f'{name:<72} skipped ({result["skipped"]})')
+        else:
+            print(f'{name:<72} {result["median_ms"]:10.3f} ms')
+
+    failed = False
+    if args.baseline is not None:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'] = compare_with_baseline(results, baseline['results'], args.tolerance)
+        for name, entry in report['comparison'].items():
+            if entry['regressed']:
+                failed = True
+                print(f'Regression: {name} {entry["baseline_ms"]:.3f} ms -> {entry["current_ms"]:.3f} ms ({entry["ratio"]:.2f}x)')
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,15 @@
 import cv2
-import pyautogui
-import time
+from collections import deque
+from concurrent.futures import CancelledError
 from threading import Thread, Lock
-from utils import extract_text_from_image, get_rectangle_from_points, detect_template_in_image 
+import numpy as np
+from utils import extract_text_from_image, get_rectangle_from_points, detect_template_in_image, crop_image
+from roi_change_detector import RegionChangeDetector
+from input_backend import get_action_queue, click_actions
+from clock import get_clock
+from metrics import get_registry
+from tracing import get_tracer
+from profiling import profiled_target
 
 class BotState:
     """
@@ -19,6 +26,22 @@ class BotState:
     TRADING = 2 
     BACKTRACKING = 3
 
+    @staticmethod
+    def get_name(state):
+        """
+        Get the name of a state, used to label the metrics.
+
+        Args:
+            state (int or str): A BotState constant, or the name of a scripted state.
+
+        Returns:
+            str: The name of the state.
+        """
+        for name, value in vars(BotState).items():
+            if name.isupper() and value == state:
+                return name
+        return str(state)
+
 class Bot:
     """
     A bot class for automating game actions using screen detection and automation tools.
@@ -29,7 +52,21 @@ class Bot:
     Attributes:
         stopped (bool): Flag to control the main loop of the bot.
         lock (threading.Lock): A lock to handle shared resources (e.g., screenshots) safely.
-        state (BotState): Current state of the bot.
+        state (BotState): Current state of the bot, each change is recorded in the metrics.
+        frame (Frame): Latest frame delivered to the bot.
+        frame_source (ScreenCaptureBase): Capture backend the bot can wait on for fresh frames.
+        last_action_time (float): Clock time taken after the last click landed.
+        digit_recognizer (DigitRecognizer): Optional fast recognizer for integer fields.
+        digit_confidence (float): Minimum recognizer confidence before falling back to OCR.
+        pre_action_frame (Frame): Latest frame captured before the last click landed, the reference of `wait_until_changed`.
+        change_threshold (float): Mean absolute pixel difference above which an area counts as changed.
+        wait_durations (dict): Recent durations in seconds of each kind of `wait_until_*`, keyed by method name.
+        change_detector (RegionChangeDetector): Skips reads of areas that did not change, None to always read.
+        action_queue (ActionQueue): Queue running the clicks, None to use the default queue of `input_backend`.
+        clock (RealClock or SimulatedClock): Clock used for all waits and timestamps.
+        metrics (MetricsRegistry): Registry receiving the state, read, click and wait metrics.
+        tracer (Tracer): Tracer receiving the state, read and decision spans, None when tracing is disabled.
+        decision_frame (Frame): Frame of the latest read, the one the next click is based on.
         screenshot (ndarray): Latest screenshot of the screen.
         rectangles (list): List of rectangles where detected templates are found.
     """
@@ -39,17 +76,73 @@ class Bot:
     # **************************************************
     stopped = True  # Control the bot's running state
     lock = None  # Lock to manage concurrent access to shared resources
-    state = None  # Current state of the bot
+    thread = None  # Thread running the bot loop, None until started
+    _state = None  # Current state of the bot, see the `state` property
+    _state_start = 0  # Clock time when the current state was entered
+    frame = None  # Latest frame delivered to the bot
+    frame_source = None  # Capture backend publishing new frames
+    last_action_time = 0  # Time after the last click, frames captured before it are stale
+    frame_timeout = 1.000  # Maximum time to wait for a frame captured after the last click
+    read_attempts = 3  # Reads of an area before giving up when the frame source keeps overwriting the frames
+    digit_recognizer = None  # Glyph-template recognizer used as fast path for integer fields
+    digit_confidence = 0.800  # Minimum recognizer confidence, below it OCR is used instead
+    pre_action_frame = None  # Latest frame captured before the last click landed
+    change_threshold = 2.0  # Mean absolute pixel difference above which an area has changed
+    wait_durations = None  # Recent durations of the wait_until_* primitives
+    change_detector = None  # Detector skipping reads of unchanged areas
+    action_queue = None  # Queue running the clicks on the input backend
+    clock = None  # Clock used for all waits and timestamps
+    metrics = None  # Registry receiving the bot metrics
+    tracer = None  # Tracer receiving the bot spans
+    decision_frame = None  # Frame of the latest read, the next click is based on it
+    _decision_reads = None  # Read spans since the last click, the children of the next decision
     screenshot = None  # Latest screenshot data
     rectangles = None  # List of detected rectangles on the screenshot
 
-    def __init__(self):
+    def __init__(self, state=BotState.INITIALIZING):
         """
         Initializes the bot with a default state of INITIALIZING.
+
+        Args:
+            state (optional): The initial state of the bot (default BotState.INITIALIZING).
         """
         # Create a thread lock object for safe multi-threaded access
         self.lock = Lock()
-        self.state = BotState.INITIALIZING
+        self.clock = get_clock()
+        self.metrics = get_registry()
+        self._clicks_total = self.metrics.counter('bot_clicks_total', 'Number of clicks sent by the bot.')
+        self._click_seconds = self.metrics.histogram('bot_click_seconds', 'Duration of a click sequence from its submission until its last click landed, in clock seconds.')
+        self._capture_to_action_seconds = self.metrics.histogram('bot_capture_to_action_seconds', 'Time from the capture of the frame a click was based on until the click landed, in clock seconds.')
+        self.tracer = get_tracer()
+        self._decision_reads = []
+        self.state = state
+        self.wait_durations = {}
+        self.change_detector = RegionChangeDetector()
+
+    @property
+    def state(self):
+        """
+        Current state of the bot.
+        """
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        """
+        Change the state of the bot, recording the time spent in the previous state and the transition.
+        """
+        now = self.clock.time()
+        name = BotState.get_name(state)
+        if self._state is not None:
+            previous = BotState.get_name(self._state)
+            self.metrics.histogram('bot_state_seconds', 'Time spent in a state before leaving it, in clock seconds.', state=previous).observe(now - self._state_start)
+            self.metrics.counter('bot_state_transitions_total', 'Number of transitions between two states.', source=previous, target=name).inc()
+            self.metrics.gauge('bot_state', 'Set to 1 for the current state of the bot.', state=previous).set(0)
+            if self.tracer is not None:
+                self.tracer.complete(previous, self._state_start, now, category='state')
+        self.metrics.gauge('bot_state', 'Set to 1 for the current state of the bot.', state=name).set(1)
+        self._state = state
+        self._state_start = now
 
     # **************************************************
     # * Utility Functions
@@ -59,29 +152,165 @@ class Bot:
         """
         Extract textual content from a specific region in the screenshot.
 
+        The OCR is skipped and the previous content returned when the region did not change since the last read.
+
         Args:
             points (tuple): A tuple containing two points (top-left and bottom-right) that define the area of the screenshot.
 
         Returns:
             str: The extracted text from the image in the specified region.
+                 Returns an empty string if no frame was captured after the last click.
         """
-        content = extract_text_from_image(self.screenshot, points[0], points[1])
-        self.rectangles = [get_rectangle_from_points(points[0], points[1])]
-        return content
+        return self._extract_from_area('text', points, lambda screenshot, area: self._read_text(screenshot, points), '')
 
     def extract_integer_from_area(self, points):
         """
         Extract an integer value from a specific region in the screenshot.
 
+        The read is skipped and the previous value returned when the region did not change since the last read.
+
         Args:
             points (tuple): A tuple containing two points (top-left and bottom-right) that define the area of the screenshot.
 
         Returns:
             int: The extracted integer from the image in the specified region.
-                 Returns 0 if no valid integer is found.
+                 Returns 0 if no valid integer is found or no frame was captured after the last click.
+        """
+        return self._extract_from_area('integer', points, lambda screenshot, area: self._read_integer(screenshot, points, area), 0)
+
+    def _extract_from_area(self, kind, points, read, default):
+        """
+        Helper function to read an area of a fresh frame, reusing the previous result when the area did not change.
+
+        The read is repeated on a newer frame when the frame source overwrote the pixels during the read,
+        which only happens with zero-copy frames.
+
+        Args:
+            kind (str): Kind of read, 'text' or 'integer'.
+            points (tuple): The two points that define the area of the screenshot.
+            read (callable): Function reading the area, called with the screenshot and the crop of the area.
+            default (object): Result returned when no frame could be read.
+
+        Returns:
+            object: The result of the read, or `default`.
+        """
+        start = self.clock.time()
+        key = (kind, tuple(map(tuple, points)))
+        for _ in range(self.read_attempts):
+            frame, screenshot = self._get_fresh_screenshot()
+            if screenshot is None:
+                # Reading a frame captured before the click would act on the previous content
+                self._record_extract(kind, 'stale', start, None)
+                return default
+            self.rectangles = [get_rectangle_from_points(points[0], points[1])]
+
+            area = crop_image(screenshot, points[0], points[1])
+            unchanged, value = self.change_detector.get(key, area) if self.change_detector is not None else (False, None)
+            if not unchanged:
+                value = read(screenshot, area)
+            if not self._is_frame_current(frame):
+                continue
+
+            if unchanged:
+                self._record_extract(kind, 'unchanged', start, frame)
+                return value
+            if self.change_detector is not None:
+                self.change_detector.put(key, area, value)
+            self._record_extract(kind, 'read', start, frame)
+            return value
+
+        # The capture process kept overwriting the frames faster than they were read
+        self._record_extract(kind, 'overwritten', start, None)
+        return default
+
+    def _is_frame_current(self, frame):
+        """
+        Helper function to check that the pixels of a frame were not overwritten by the frame source.
+
+        Args:
+            frame (Frame): The frame that was read, None without frames.
+
+        Returns:
+            bool: False if the frame source reused the pixel buffer of the frame.
+        """
+        if frame is None or self.frame_source is None:
+            return True
+        return self.frame_source.is_frame_current(frame)
+
+    def _get_fresh_screenshot(self):
+        """
+        Helper function to get the frame and screenshot an `extract_*_from_area` call reads.
+
+        Returns:
+            tuple: The (frame, screenshot) captured after the last click, (None, None) if none arrived in time.
+                   Without a frame source, the current frame and screenshot.
+        """
+        if self.frame_source is not None:
+            frame = self.wait_for_fresh_frame()
+            return (frame, frame.image) if frame is not None else (None, None)
+
+        self.lock.acquire()
+        frame, screenshot = self.frame, self.screenshot
+        self.lock.release()
+        return frame, screenshot
+
+    def _record_extract(self, kind, result, start, frame):
+        """
+        Helper function to record the duration of an `extract_*_from_area` call and the frame it read,
+        which becomes the frame the next click is based on.
+
+        Args:
+            kind (str): Kind of read, 'text' or 'integer'.
+            result (str): 'read' if the area was read, 'unchanged' if the previous content was reused,
+                          'stale' if no frame was captured after the last click, 'overwritten' if the
+                          frame source overwrote every frame during its read.
+            start (float): Clock time when the call started.
+            frame (Frame): The frame that was read, None without frames.
+        """
+        end = self.clock.time()
+        self.metrics.histogram('bot_extract_seconds', 'Duration of an area read including the wait for a fresh frame, in clock seconds.',
+                               kind=kind, result=result).observe(end - start)
+        if frame is None:
+            return
+
+        self.decision_frame = frame
+        if self.tracer is not None:
+            args = {'frame_seq': frame.seq, 'capture_timestamp': frame.timestamp, 'result': result}
+            self.tracer.complete(f'extract_{kind}', start, end, args=args)
+            self._decision_reads.append((f'extract_{kind}', start, end, args))
+
+    def _read_text(self, screenshot, points):
+        """
+        Helper function to read the text of an area with OCR.
+
+        Args:
+            screenshot (ndarray): The screenshot to read from.
+            points (tuple): The two points that define the area of the screenshot.
+
+        Returns:
+            str: The extracted text.
+        """
+        return extract_text_from_image(screenshot, points[0], points[1])
+
+    def _read_integer(self, screenshot, points, area):
+        """
+        Helper function to read an integer, with the digit recognizer first and OCR as fallback.
+
+        Args:
+            screenshot (ndarray): The screenshot to read from.
+            points (tuple): The two points that define the area of the screenshot.
+            area (ndarray): The crop of the area.
+
+        Returns:
+            int: The extracted integer, 0 if no valid integer is found.
         """
-        content = extract_text_from_image(self.screenshot, points[0], points[1])
-        self.rectangles = [get_rectangle_from_points(points[0], points[1])]
+        # Try the glyph-template recognizer first, OCR is only needed when it is unsure
+        if self.digit_recognizer is not None:
+            value, confidence = self.digit_recognizer.read_integer(area)
+            if value is not None and confidence >= self.digit_confidence:
+                return value
+
+        content = extract_text_from_image(screenshot, points[0], points[1])
         number_string = content.replace(',', '').replace(' ', '').replace('.', '')
         try:
             return int(number_string)
@@ -101,9 +330,73 @@ class Bot:
             point (tuple): A tuple representing the (x, y) coordinates of the point to click.
             delay (float, optional): Time to wait before clicking (default is 0.100 seconds).
         """
-        pyautogui.moveTo(x=point[0], y=point[1])
-        time.sleep(delay)
-        pyautogui.click()
+        self.click_sequence([point], delay)
+
+    def click_sequence(self, points, delay=0.100, wait=True):
+        """
+        Simulate mouse clicks at several points, run back to back by the action thread.
+
+        Args:
+            points (list): The (x, y) coordinates of the points to click, in order.
+            delay (float, optional): Time to wait between each move and its click (default is 0.100 seconds).
+            wait (bool, optional): Wait for the clicks to land before returning (default True).
+
+        Returns:
+            Future: Resolved with the clock time taken after the last click.
+        """
+        self.pre_action_frame = self.frame_source.frame if self.frame_source is not None else self.frame
+        action_queue = self.action_queue or get_action_queue()
+        # The clicks are based on the frame of the latest read, the next clicks need a new read
+        decision_frame, decision_reads = self.decision_frame, self._decision_reads
+        self.decision_frame, self._decision_reads = None, []
+
+        start = self.clock.time()
+        future = action_queue.submit(click_actions(points, delay))
+        future.add_done_callback(lambda future: self._on_actions_done(future, start, decision_frame, decision_reads))
+        self._clicks_total.inc(len(points))
+        if wait:
+            # The callback may still be pending when result() returns, record the time here too
+            try:
+                self.last_action_time = future.result()
+            except CancelledError:
+                return future  # The action queue was stopped
+            self._update_pre_action_frame(self.last_action_time)
+            if self.tracer is not None:
+                self.tracer.complete('click_sequence', start, self.last_action_time, args={'clicks': len(points)})
+        return future
+
+    def _on_actions_done(self, future, start, decision_frame, decision_reads):
+        """
+        Helper function to record when queued clicks landed, how long they took and, when
+        they were based on a read, the latency from the capture of the read frame.
+        """
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        end = future.result()
+        self.last_action_time = end
+        self._update_pre_action_frame(end)
+        self._click_seconds.observe(end - start)
+        if decision_frame is None:
+            return
+
+        self._capture_to_action_seconds.observe(end - decision_frame.timestamp)
+        if self.tracer is not None:
+            children = decision_reads + [('click_sequence', start, end, None)]
+            self.tracer.decision(decision_frame, end, children, args={'state': BotState.get_name(self.state)})
+
+    def _update_pre_action_frame(self, end):
+        """
+        Helper function to take the latest frame captured before a click landed as the reference of `wait_until_changed`,
+        so a change caused by an earlier click and shown after the submission of this one is not mistaken for its effect.
+
+        Args:
+            end (float): Clock time taken after the last click.
+        """
+        frame = self.frame_source.frame if self.frame_source is not None else self.frame
+        reference = self.pre_action_frame
+        if frame is not None and frame.timestamp < end and (reference is None or frame.seq > reference.seq):
+            self.pre_action_frame = frame
 
     def wait(self, seconds=1.000):
         """
@@ -112,7 +405,193 @@ class Bot:
         Args:
             seconds (float, optional): The number of seconds to wait (default is 1.000 seconds).
         """
-        time.sleep(seconds)
+        self.clock.sleep(seconds)
+
+    def wait_until_changed(self, points, timeout=1.000, reference=None):
+        """
+        Wait until an area of the screen differs from what it showed before the last click.
+
+        Only frames captured after the last click landed are compared, a change they show
+        is the effect of that click rather than of an earlier one.
+
+        Args:
+            points (tuple): A tuple containing two points (top-left and bottom-right) that define the area of the screenshot.
+            timeout (float, optional): Maximum time to wait in seconds (default 1.000 seconds).
+            reference (Frame, optional): Frame to compare with (default: the latest frame captured before the last click landed).
+
+        Returns:
+            bool: True as soon as the area changed, False if it did not change before the timeout.
+        """
+        start = self.clock.time()
+        reference = reference if reference is not None else self.pre_action_frame or self.frame
+        if reference is None:
+            # Nothing to compare with yet, the first frame is the earliest possible change
+            changed = self._wait_for_next_frame(0, start + timeout) is not None
+            self._record_wait('wait_until_changed', start)
+            return changed
+
+        # Keep a copy, zero-copy frames are overwritten once the capture process laps its ring buffer
+        reference_area = crop_image(reference.image, points[0], points[1]).copy()
+        after_seq = reference.seq
+        changed = False
+        while not self.stopped:
+            frame = self._wait_for_next_frame(after_seq, start + timeout)
+            if frame is None:
+                break
+            after_seq = frame.seq
+            if frame.timestamp <= self.last_action_time:
+                continue
+            if self._is_area_different(reference_area, crop_image(frame.image, points[0], points[1])):
+                changed = True
+                break
+
+        self._record_wait('wait_until_changed', start)
+        return changed
+
+    def wait_until_updated(self, points, timeout=1.000, frames=2):
+        """
+        Wait until an area of the screen changed after the last click and then stayed the same, e.g. until
+        a new price finished rendering, within a single timeout.
+
+        Args:
+            points (tuple): A tuple containing two points (top-left and bottom-right) that define the area of the screenshot.
+            timeout (float, optional): Maximum time to wait in seconds for both the change and the stability (default 1.000 seconds).
+            frames (int, optional): Number of consecutive identical frames required after the change (default 2).
+
+        Returns:
+            bool: True as soon as the area changed and is stable, False if the timeout expired before.
+        """
+        deadline = self.clock.time() + timeout
+        if not self.wait_until_changed(points, timeout):
+            return False
+        return self.wait_until_stable(points, frames, max(deadline - self.clock.time(), 0))
+
+    def wait_until_template(self, template, timeout=1.000, **kwargs):
+        """
+        Wait until a template is visible on the screen.
+
+        Args:
+            template (ndarray or Template): The template to look for.
+            timeout (float, optional): Maximum time to wait in seconds (default 1.000 seconds).
+            **kwargs: Options of `detect_template_in_image` (threshold, grayscale, pyramid_levels...).
+
+        Returns:
+            list: The detected rectangles, empty if the template did not appear before the timeout.
+        """
+        start = self.clock.time()
+        rectangles = []
+        after_seq = 0
+        while not self.stopped:
+            frame = self._wait_for_next_frame(after_seq, start + timeout)
+            if frame is None:
+                break
+            after_seq = frame.seq
+            rectangles = detect_template_in_image(frame.image, template=template, **kwargs)
+            if len(rectangles) > 0:
+                self.rectangles = rectangles
+                break
+
+        self._record_wait('wait_until_template', start)
+        return rectangles
+
+    def wait_until_stable(self, points, frames=2, timeout=1.000):
+        """
+        Wait until an area of the screen stays the same over consecutive frames, e.g. once an animation ended.
+
+        Args:
+            points (tuple): A tuple containing two points (top-left and bottom-right) that define the area of the screenshot.
+            frames (int, optional): Number of consecutive identical frames required (default 2).
+            timeout (float, optional): Maximum time to wait in seconds (default 1.000 seconds).
+
+        Returns:
+            bool: True as soon as the area is stable, False if it kept changing until the timeout.
+        """
+        start = self.clock.time()
+        stable = False
+        previous_area = None
+        stable_frames = 0
+        after_seq = 0
+        while not self.stopped:
+            frame = self._wait_for_next_frame(after_seq, start + timeout)
+            if frame is None:
+                break
+            after_seq = frame.seq
+            area = crop_image(frame.image, points[0], points[1]).copy()
+            if previous_area is not None and not self._is_area_different(previous_area, area):
+                stable_frames += 1
+            else:
+                stable_frames = 1
+            previous_area = area
+            if stable_frames >= frames:
+                stable = True
+                break
+
+        self._record_wait('wait_until_stable', start)
+        return stable
+
+    def _wait_for_next_frame(self, after_seq, deadline):
+        """
+        Helper function to wait for a frame newer than `after_seq` and make it current.
+
+        Args:
+            after_seq (int): Sequence number of the last frame seen.
+            deadline (float): Clock time after which waiting stops.
+
+        Returns:
+            Frame: The new frame, or None if none arrived before the deadline.
+        """
+        if self.frame_source is not None:
+            frame = self.frame_source.wait_for_frame(after_seq, max(deadline - self.clock.time(), 0))
+            if frame is not None:
+                self.update_frame(frame)
+            return frame
+
+        # Without a frame source, poll the frames pushed through update_frame
+        while self.clock.time() < deadline:
+            frame = self.frame
+            if frame is not None and frame.seq > after_seq:
+                return frame
+            self.clock.sleep(0.010)
+        return None
+
+    def _is_area_different(self, first, second):
+        """
+        Helper function to compare two crops of the same area.
+
+        Args:
+            first (ndarray): The first crop.
+            second (ndarray): The second crop.
+
+        Returns:
+            bool: True if the mean absolute difference exceeds `change_threshold`.
+        """
+        return cv2.absdiff(first, second).mean() > self.change_threshold
+
+    def _record_wait(self, name, start):
+        """
+        Helper function to record how long a wait actually took.
+
+        Args:
+            name (str): Name of the wait primitive.
+            start (float): Clock time when the wait started.
+        """
+        duration = self.clock.time() - start
+        durations = self.wait_durations.setdefault(name, deque(maxlen=100))
+        durations.append(duration)
+        self.metrics.histogram('bot_wait_seconds', 'Duration of a wait_until_* primitive, in clock seconds.', primitive=name).observe(duration)
+
+    def get_wait_statistics(self):
+        """
+        Summarize the recorded wait durations.
+
+        Returns:
+            dict: For each wait primitive, the number of recent waits and their mean and max duration in seconds.
+        """
+        statistics = {}
+        for name, durations in list(self.wait_durations.items()):
+            values = np.array(durations)
+            statistics[name] = {'count': len(values), 'mean': float(values.mean()), 'max': float(values.max())}
+        return statistics
 
     # **************************************************
     # * Threading Methods
@@ -129,13 +608,65 @@ class Bot:
         self.screenshot = screenshot
         self.lock.release()
 
+    def update_frame(self, frame):
+        """
+        Update the current frame and its screenshot safely in a multi-threaded environment.
+
+        Args:
+            frame (Frame): The new frame to update.
+        """
+        self.lock.acquire()
+        if self.frame is None or frame.seq > self.frame.seq:
+            self.frame = frame
+            self.screenshot = frame.image
+        self.lock.release()
+
+    def set_frame_source(self, frame_source):
+        """
+        Attach the capture backend the bot waits on for fresh frames.
+
+        Args:
+            frame_source (ScreenCaptureBase): The capture backend publishing frames.
+        """
+        self.frame_source = frame_source
+
+    def wait_for_fresh_frame(self, timeout=None):
+        """
+        Wait until a frame captured after the last click is available and make it current.
+
+        Without a frame source the current frame is used as is.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds (default `frame_timeout`).
+
+        Returns:
+            Frame: The fresh frame, or None if none arrived before the timeout or the bot was stopped.
+        """
+        if self.frame_source is None:
+            return self.frame
+
+        timeout = self.frame_timeout if timeout is None else timeout
+        deadline = self.clock.time() + timeout
+        after_seq = 0
+        while not self.stopped:
+            frame = self.frame_source.wait_for_frame(after_seq, max(deadline - self.clock.time(), 0))
+            if frame is None:
+                print('Timed out waiting for a frame captured after the last click, skipping the read.')
+                break
+            self.update_frame(frame)
+            if frame.timestamp >= self.last_action_time:
+                return frame
+            after_seq = frame.seq
+        return None
+
     def start(self):
         """
         Start the bot in a separate thread.
         """
         self.stopped = False
-        t = Thread(target=self.run)
-        t.start()
+        name = type(self).__name__
+        self.thread = Thread(target=profiled_target(self.run, name), name=name)
+        self.thread.start()
 
     def stop(self):
         """
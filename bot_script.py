@@ -0,0 +1,379 @@
+import ast
+import json
+from bot import BotState, Bot
+from template_library import load_template
+
+try:
+    import yaml
+except ImportError:  # Optional dependency, only needed for YAML scripts
+    yaml = None
+
+
+class BotScriptError(Exception):
+    """
+    Raised when a bot script is invalid.
+    """
+
+
+# **************************************************
+# * Expressions
+# **************************************************
+
+# Syntax allowed in script expressions: literals, names, arithmetic, comparisons, boolean
+# logic, indexing, generator expressions and calls to a few safe functions and string methods
+_ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Store, ast.Tuple, ast.List,
+    ast.GeneratorExp, ast.ListComp, ast.comprehension,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Subscript, ast.Slice,
+    ast.Call, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.USub, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+)
+_ALLOWED_FUNCTIONS = {'len': len, 'min': min, 'max': max, 'abs': abs, 'int': int, 'str': str, 'any': any, 'all': all}
+_ALLOWED_METHODS = {'count', 'lower', 'upper', 'strip', 'startswith', 'endswith', 'replace', 'split'}
+
+
+def compile_expression(source):
+    """
+    Validate and compile a script expression once, so it can be evaluated on every cycle cheaply.
+
+    Args:
+        source (str or int or float): The expression, e.g. "TARGET_MIN_PRICE < price < TARGET_MAX_PRICE".
+
+    Returns:
+        callable: A function evaluating the expression against a dict of variables.
+
+    Raises:
+        BotScriptError: If the expression is invalid or uses forbidden syntax.
+    """
+    if not isinstance(source, str):
+        return lambda variables: source
+
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError as e:
+        raise BotScriptError(f'Invalid expression "{source}": {e}')
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise BotScriptError(f'Forbidden syntax {type(node).__name__} in expression "{source}"')
+        if isinstance(node, ast.Attribute) and node.attr not in _ALLOWED_METHODS:
+            raise BotScriptError(f'Forbidden attribute {node.attr} in expression "{source}"')
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id not in _ALLOWED_FUNCTIONS:
+            raise BotScriptError(f'Forbidden function {node.func.id} in expression "{source}"')
+
+    code = compile(tree, f'<expression {source}>', 'eval')
+
+    def evaluate(variables):
+        # The variables are the globals, so generator expressions can see them too
+        if variables.get('__builtins__') is not _ALLOWED_FUNCTIONS:
+            variables['__builtins__'] = _ALLOWED_FUNCTIONS
+        return eval(code, variables)
+    return evaluate
+
+
+# **************************************************
+# * Script Compilation
+# **************************************************
+
+def load_script(path):
+    """
+    Load a bot script from a JSON or YAML file.
+
+    Args:
+        path (str): Path of the script.
+
+    Returns:
+        dict: The script definition.
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.lower().endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise BotScriptError('PyYAML is required to load YAML scripts (pip install pyyaml)')
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+class CompiledScript:
+    """
+    A bot script compiled into step functions.
+
+    Every step is turned into a function `step(bot, variables)` at compile time: names of
+    positions and areas are resolved, expressions are compiled to code objects and the
+    templates are loaded, so running a state only calls the prepared functions.
+
+    A step function returns the name of the next state when it transitions, None otherwise.
+
+    Attributes:
+        name (str): Name of the script.
+        initial_state (str): Name of the first state.
+        variables (dict): Initial variables, positions and areas, all usable in expressions.
+        states (dict): For each state name, its wait before the steps (seconds) and its step functions.
+    """
+
+    def __init__(self, script):
+        """
+        Compile a script definition.
+
+        Args:
+            script (dict): The script definition, see the "Bot Scripts" section of the README.
+
+        Raises:
+            BotScriptError: If the script is invalid.
+        """
+        self.name = script.get('name', 'script')
+        self.positions = {name: tuple(value) if _is_point(value) else [tuple(p) for p in value]
+                          for name, value in script.get('positions', {}).items()}
+        self.areas = {name: [tuple(value[0]), tuple(value[1])] for name, value in script.get('areas', {}).items()}
+        self.variables = dict(script.get('variables', {}))
+        self.variables.update(self.positions)
+        self.variables.update(self.areas)
+
+        loop_wait = script.get('loop_wait', 1.0)
+        self._gotos = []  # (location, target) of every transition, checked once all states are known
+        self.states = {}
+        for state_name, state in script.get('states', {}).items():
+            steps = self._compile_steps(state.get('steps', []), state_name)
+            self.states[state_name] = (state.get('wait', loop_wait), steps)
+
+        self.initial_state = script.get('initial_state', next(iter(self.states), None))
+        if self.initial_state not in self.states:
+            raise BotScriptError(f'Unknown initial state: {self.initial_state}')
+        for state_name, target in self._gotos:
+            if target not in self.states:
+                raise BotScriptError(f'{state_name}: transition to unknown state {target}')
+
+    def _compile_steps(self, steps, location):
+        """
+        Helper function to compile a list of steps.
+
+        Args:
+            steps (list): The step definitions.
+            location (str): Where the steps are defined, for error messages.
+
+        Returns:
+            list: The step functions.
+        """
+        return [self._compile_step(step, f'{location}[{i}]') for i, step in enumerate(steps)]
+
+    def _compile_step(self, step, location):
+        """
+        Helper function to compile a single step.
+
+        Args:
+            step (dict): The step definition.
+            location (str): Where the step is defined, for error messages.
+
+        Returns:
+            callable: The step function.
+        """
+        if not isinstance(step, dict):
+            raise BotScriptError(f'{location}: a step must be an object')
+
+        if 'click' in step:
+            delay = step.get('delay', 0.100)
+            if 'index' in step:
+                points = self._position(step['click'], location, many=True)
+                index = compile_expression(step['index'])
+
+                def click_indexed(bot, variables):
+                    bot.click(points[index(variables)], delay)
+                return click_indexed
+            point = self._position(step['click'], location)
+
+            def click(bot, variables):
+                bot.click(point, delay)
+            return click
+
+        if 'click_sequence' in step:
+            points = [self._position(point, location) for point in step['click_sequence']]
+            delay = step.get('delay', 0.100)
+
+            def click_sequence(bot, variables):
+                bot.click_sequence(points, delay)
+            return click_sequence
+
+        if 'wait' in step:
+            seconds = step['wait']
+
+            def wait(bot, variables):
+                bot.wait(seconds)
+            return wait
+
+        if 'wait_until_changed' in step:
+            area = self._area(step['wait_until_changed'], location)
+            timeout = step.get('timeout', 1.0)
+
+            def wait_until_changed(bot, variables):
+                bot.wait_until_changed(area, timeout)
+            return wait_until_changed
+
+        if 'wait_until_stable' in step:
+            area = self._area(step['wait_until_stable'], location)
+            frames, timeout = step.get('frames', 2), step.get('timeout', 1.0)
+
+            def wait_until_stable(bot, variables):
+                bot.wait_until_stable(area, frames, timeout)
+            return wait_until_stable
+
+        if 'wait_until_updated' in step:
+            area = self._area(step['wait_until_updated'], location)
+            frames, timeout = step.get('frames', 2), step.get('timeout', 1.0)
+
+            def wait_until_updated(bot, variables):
+                bot.wait_until_updated(area, timeout, frames)
+            return wait_until_updated
+
+        if 'wait_until_template' in step:
+            template = load_template(step['wait_until_template'])
+            timeout, threshold = step.get('timeout', 1.0), step.get('threshold', 0.75)
+            into = step.get('into')
+
+            def wait_until_template(bot, variables):
+                rectangles = bot.wait_until_template(template, timeout, threshold=threshold)
+                if into is not None:
+                    variables[into] = len(rectangles) > 0
+            return wait_until_template
+
+        if 'read_integer' in step or 'read_text' in step:
+            integer = 'read_integer' in step
+            area = self._area(step['read_integer'] if integer else step['read_text'], location)
+            into = step.get('into')
+            if into is None:
+                raise BotScriptError(f'{location}: a read step needs an "into" variable')
+            def read_area(bot, variables):
+                if integer:
+                    variables[into] = bot.extract_integer_from_area(area)
+                else:
+                    variables[into] = bot.extract_text_from_area(area)
+            return read_area
+
+        if 'set' in step:
+            assignments = [(name, compile_expression(value)) for name, value in step['set'].items()]
+
+            def set_variables(bot, variables):
+                for name, value in assignments:
+                    variables[name] = value(variables)
+            return set_variables
+
+        if 'print' in step:
+            message = step['print']
+
+            def print_message(bot, variables):
+                print(message.format_map(variables))
+            return print_message
+
+        if 'if' in step:
+            condition = compile_expression(step['if'])
+            then_steps = self._compile_steps(step.get('then', []), f'{location}.then')
+            else_steps = self._compile_steps(step.get('else', []), f'{location}.else')
+
+            def branch(bot, variables):
+                for run_step in then_steps if condition(variables) else else_steps:
+                    next_state = run_step(bot, variables)
+                    if next_state is not None:
+                        return next_state
+            return branch
+
+        if 'goto' in step:
+            target = step['goto']
+            self._gotos.append((location, target))
+            return lambda bot, variables: target
+
+        raise BotScriptError(f'{location}: unknown step {sorted(step)}')
+
+    def _position(self, value, location, many=False):
+        """
+        Helper function to resolve a position name or literal point.
+        """
+        if isinstance(value, str):
+            if value not in self.positions:
+                raise BotScriptError(f'{location}: unknown position {value}')
+            value = self.positions[value]
+        if many != (not _is_point(value)):
+            raise BotScriptError(f'{location}: expected {"a list of points" if many else "a point"}')
+        return value if many else tuple(value)
+
+    def _area(self, value, location):
+        """
+        Helper function to resolve an area name or literal area.
+        """
+        if isinstance(value, str):
+            if value not in self.areas:
+                raise BotScriptError(f'{location}: unknown area {value}')
+            return self.areas[value]
+        return [tuple(value[0]), tuple(value[1])]
+
+
+def _is_point(value):
+    """
+    Helper function to tell a single (x, y) point from a list of points.
+    """
+    return len(value) == 2 and all(isinstance(v, (int, float)) for v in value)
+
+
+def compile_script(script):
+    """
+    Compile a bot script definition or file.
+
+    Args:
+        script (dict or str): The script definition, or the path of a JSON/YAML script.
+
+    Returns:
+        CompiledScript: The compiled script.
+    """
+    if isinstance(script, str):
+        script = load_script(script)
+    return CompiledScript(script)
+
+
+# **************************************************
+# * Executor
+# **************************************************
+
+class ScriptedBot(Bot):
+    """
+    A bot running a compiled bot script instead of a hand-written `run` method.
+
+    States named like the `BotState` constants are stored as those constants, so the
+    state is reported the same way as for the hand-written bots.
+
+    Attributes:
+        script (CompiledScript): The compiled script.
+        variables (dict): Variables of the running script.
+    """
+
+    def __init__(self, script):
+        """
+        Initialize the bot with a script.
+
+        Args:
+            script (dict or str or CompiledScript): The script definition, path or compiled script.
+        """
+        self.script = script if isinstance(script, CompiledScript) else compile_script(script)
+        super().__init__(state=getattr(BotState, self.script.initial_state, self.script.initial_state))
+        self.variables = dict(self.script.variables)
+        self._state_names = {getattr(BotState, name, name): name for name in self.script.states}
+
+    def run(self):
+        """
+        The main loop of the scripted bot: runs the steps of the current state and applies
+        the transition returned by a `goto` step.
+        """
+        print(f"Starting scripted bot {self.script.name}")
+        while not self.stopped:
+            state_name = self._state_names[self.state]
+            wait, steps = self.script.states[state_name]
+            if wait:
+                self.wait(wait)
+
+            for step in steps:
+                if self.stopped:
+                    break
+                next_state = step(self, self.variables)
+                if next_state is not None:
+                    self.lock.acquire()
+                    self.state = getattr(BotState, next_state, next_state)
+                    self.lock.release()
+                    break
+
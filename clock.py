@@ -0,0 +1,233 @@
+import threading
+import time
+
+
+class RealClock:
+    """
+    Clock following the wall clock, used by default.
+
+    Times are `time.perf_counter()` values, so they can be compared with the timestamps
+    of frames shared by other processes.
+    """
+
+    def time(self):
+        """
+        Get the current time.
+
+        Returns:
+            float: The current time in seconds.
+        """
+        return time.perf_counter()
+
+    def sleep(self, seconds, producer=False):
+        """
+        Pause the calling thread.
+
+        Args:
+            seconds (float): The number of seconds to sleep.
+            producer (bool, optional): Whether the caller is a frame producer such as a capture loop, only used by the simulated clock.
+        """
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait_for(self, condition, predicate, timeout=None):
+        """
+        Wait on a held condition until a predicate is true, like `Condition.wait_for`.
+
+        Args:
+            condition (threading.Condition): The condition, acquired by the caller.
+            predicate (callable): Function returning a true value once the wait is over.
+            timeout (float, optional): Maximum time to wait in seconds, None waits forever.
+
+        Returns:
+            bool: The last value of the predicate, false if the timeout expired.
+        """
+        return condition.wait_for(predicate, timeout)
+
+
+class SimulatedClock:
+    """
+    Clock whose time only advances when it is slept on, so an hour of bot activity can be
+    simulated in a fraction of a second.
+
+    Capture loops sleep on the clock as producers: they do not advance the time but follow
+    it, capturing a frame each time it reaches their next capture time. Any other thread
+    sleeping advances the time and then waits until every producer captured at the new
+    time, so it always resumes with a frame of the screen at that time, like after a real
+    sleep. Waits on a condition step the time from one capture to the next until the
+    predicate holds or the timeout expires; without producers, when nothing notifies the
+    condition for `idle_timeout` real seconds, the time jumps straight to the end of the wait.
+    An untimed wait has no end to jump to, so it fails instead when nothing notifies it for
+    `producer_timeout` real seconds.
+
+    The time is shared by all threads: each sleeping thread advances it, so when several
+    threads sleep concurrently the simulated durations are upper bounds.
+
+    Attributes:
+        idle_timeout (float): Real seconds without notification after which a wait moves the time forward.
+        producer_timeout (float): Maximum real seconds a sleeping thread waits for the producers to capture.
+    """
+
+    def __init__(self, start=0.0, idle_timeout=0.010, producer_timeout=1.0):
+        """
+        Initialize the clock.
+
+        Args:
+            start (float, optional): The initial time in seconds (default 0.0).
+            idle_timeout (float, optional): Real seconds without notification before a wait moves the time forward (default 0.010).
+            producer_timeout (float, optional): Maximum real seconds a sleeping thread waits for the producers to capture (default 1.0).
+        """
+        self.idle_timeout = idle_timeout
+        self.producer_timeout = producer_timeout
+        self._now = start
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)  # Notified when the time advances or a producer sleeps
+        self._producers = {}  # Producer thread -> time it sleeps until, None while it captures
+
+    def time(self):
+        """
+        Get the current simulated time.
+
+        Returns:
+            float: The current time in seconds.
+        """
+        return self._now
+
+    def advance(self, seconds):
+        """
+        Advance the simulated time.
+
+        Args:
+            seconds (float): The number of seconds to advance by.
+        """
+        if seconds > 0:
+            with self._condition:
+                self._now += seconds
+                self._condition.notify_all()
+
+    def sleep(self, seconds, producer=False):
+        """
+        Advance the simulated time and wait until the producers captured a frame at the new
+        time. A producer instead waits until the time reaches the end of its sleep.
+
+        Args:
+            seconds (float): The number of seconds to sleep.
+            producer (bool, optional): Whether the caller is a frame producer such as a capture loop (default False).
+        """
+        if producer:
+            self._sleep_producer(seconds)
+            return
+
+        self.advance(seconds)
+        with self._condition:
+            self._condition.wait_for(self._producers_caught_up, self.producer_timeout)
+
+    def _sleep_producer(self, seconds):
+        """
+        Helper function to make a producer wait until the time reaches the end of its sleep.
+
+        The wait is bounded in real time so a stopped capture loop notices it even when
+        nothing advances the time.
+        """
+        thread = threading.current_thread()
+        with self._condition:
+            wake_time = self._now + max(seconds, 0)
+            self._producers[thread] = wake_time
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._now >= wake_time, self.producer_timeout / 4)
+            self._producers[thread] = None
+
+    def _producers_caught_up(self):
+        """
+        Helper function to check that every running producer sleeps until a time still to come,
+        i.e. it captured at the current time. Called with the lock held.
+        """
+        return all(wake_time is not None and wake_time > self._now
+                   for thread, wake_time in self._producers.items() if thread.is_alive())
+
+    def _step(self, deadline):
+        """
+        Helper function to move the time to the next capture of the producers, without going past a deadline.
+
+        Returns:
+            bool: False if there is no producer to follow.
+        """
+        with self._condition:
+            wake_times = [wake_time for thread, wake_time in self._producers.items() if thread.is_alive()]
+            if not wake_times:
+                return False
+            sleeping = [wake_time for wake_time in wake_times if wake_time is not None]
+            if sleeping and len(sleeping) == len(wake_times):
+                # Every producer waits for its next capture, move the time to the earliest one
+                self._now = max(self._now, min(min(sleeping), deadline))
+                self._condition.notify_all()
+            return True
+
+    def wait_for(self, condition, predicate, timeout=None):
+        """
+        Wait on a held condition until a predicate is true, with the timeout in simulated time.
+
+        Args:
+            condition (threading.Condition): The condition, acquired by the caller.
+            predicate (callable): Function returning a true value once the wait is over.
+            timeout (float, optional): Maximum time to wait in simulated seconds, None waits forever.
+
+        Returns:
+            bool: The last value of the predicate, false if the timeout expired.
+
+        Raises:
+            RuntimeError: If an untimed wait has no producer to follow and is not notified
+                          within `producer_timeout` real seconds, as it would never return.
+        """
+        deadline = self._now + timeout if timeout is not None else float('inf')
+        result = predicate()
+        while not result:
+            if self._now >= deadline:
+                break
+            if self._step(deadline):
+                # The producers capture at the new time and notify the condition
+                condition.wait(self.idle_timeout)
+            elif timeout is None:
+                # There is no end of the wait to skip to, only another thread can still end it
+                if not condition.wait(self.producer_timeout) and not predicate():
+                    raise RuntimeError(f'Untimed wait not notified within {self.producer_timeout} real seconds '
+                                       'and without producers to advance the simulated time')
+            elif not condition.wait(self.idle_timeout):
+                # Nothing is happening, skip the rest of the wait
+                with self._condition:
+                    self._now = max(self._now, deadline)
+                    self._condition.notify_all()
+            result = predicate()
+        return result
+
+
+# **************************************************
+# * Default Clock
+# **************************************************
+
+_default_clock = RealClock()  # Clock picked up by the bots, capture backends and action queues when created
+
+
+def set_clock(clock):
+    """
+    Replace the default clock. Objects created afterwards use the new clock.
+
+    Args:
+        clock (RealClock or SimulatedClock): The new default clock.
+
+    Returns:
+        object: The new default clock.
+    """
+    global _default_clock
+    _default_clock = clock
+    return clock
+
+
+def get_clock():
+    """
+    Get the default clock.
+
+    Returns:
+        object: The default clock.
+    """
+    return _default_clock
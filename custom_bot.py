@@ -1,6 +1,6 @@
 from bot import BotState, Bot
-import cv2
-from utils import detect_template_in_image 
+from template_library import load_template
+from template_tracker import TemplateTracker
 
 class Bot(Bot):
     """
@@ -12,7 +12,7 @@ class Bot(Bot):
         The main loop of the custom bot, executing its logic based on the current state.
         This method overrides the base class's run method with customized behavior.
         """
-        needle_img = None
+        tracker = None
         while not self.stopped:
             self.wait()  # Wait for a short period before each iteration
             
@@ -21,7 +21,8 @@ class Bot(Bot):
                 # Perform specific actions during initialization
                 print("Custom Bot is initializing.")
                 
-                needle_img = cv2.imread('needle.jpg', cv2.IMREAD_UNCHANGED)
+                # Track the needle so most frames only search around the previous hit
+                tracker = TemplateTracker(load_template('needle.jpg', pyramid_levels=2), pyramid_levels=2)
                 
                 self.lock.acquire()
                 self.state = BotState.SEARCHING
@@ -29,10 +30,10 @@ class Bot(Bot):
 
             elif self.state == BotState.SEARCHING:
                 # Custom searching logic
-                print("Custom Bot is searching for a target.")
+                print(f"Custom Bot is searching for a target (tracker hit rate {tracker.hit_rate:.0%}).")
                 
                 # Call your custom template detection logic here
-                self.rectangles = detect_template_in_image(self.screenshot, template=needle_img)
+                self.rectangles = tracker.detect(self.screenshot)
 
                 # If any template is found, transition to the TRADING state
                 if len(self.rectangles) > 0:
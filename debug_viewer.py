@@ -0,0 +1,230 @@
+import cv2
+import numpy as np
+from utils import draw_debug_overlay
+from clock import get_clock
+
+
+class RegionSelector:
+    """
+    Two-click selection of an area of the screenshot: the first click starts the
+    selection, the second one ends it and reports the selected area.
+
+    Attributes:
+        on_select (callable): Function called with the start and end points of each selected area.
+        selecting (bool): True between the two clicks.
+        start_point (tuple): Start of the area being selected.
+        end_point (tuple): End of the area being selected, follows the mouse.
+    """
+
+    def __init__(self, on_select=None):
+        """
+        Initialize the selector.
+
+        Args:
+            on_select (callable, optional): Function called with (start, end) when an area is selected.
+        """
+        self.on_select = on_select
+        self.selecting = False
+        self.start_point = (0, 0)
+        self.end_point = (0, 0)
+
+    @property
+    def selection(self):
+        """
+        The (start, end) points of the area being selected, None when not selecting.
+        """
+        return (self.start_point, self.end_point) if self.selecting else None
+
+    def move(self, pos):
+        """
+        Follow the mouse with the end of the area being selected.
+
+        Args:
+            pos (tuple): Mouse position (x, y) in the screenshot.
+        """
+        if self.selecting:
+            self.end_point = pos
+
+    def click(self, pos):
+        """
+        Start a selection, or end it and report the selected area.
+
+        Args:
+            pos (tuple): Click position (x, y) in the screenshot.
+        """
+        if self.selecting:
+            self.selecting = False
+            if self.on_select is not None:
+                self.on_select(self.start_point, self.end_point)
+        else:
+            self.selecting = True
+            self.start_point = pos
+            self.end_point = pos
+
+
+class FrameRateMeter:
+    """
+    Measures the capture rate from the sequence numbers of the frames seen, once per second.
+
+    Attributes:
+        fps (float): The latest measured rate.
+    """
+
+    def __init__(self):
+        self.fps = 0
+        self._start = None  # (time, frame seq) at the start of the measurement
+
+    def update(self, frame, now):
+        """
+        Account for a frame.
+
+        Args:
+            frame (Frame): The latest frame.
+            now (float): The current time in seconds.
+
+        Returns:
+            float: The measured rate.
+        """
+        if self._start is None or frame.seq < self._start[1]:
+            self._start = (now, frame.seq)
+            return self.fps
+        elapsed_time = now - self._start[0]
+        if elapsed_time > 1.0:
+            self.fps = (frame.seq - self._start[1]) / elapsed_time
+            self._start = (now, frame.seq)
+        return self.fps
+
+
+class DebugViewer:
+    """
+    Window showing the captured frames with the debug overlay.
+
+    The viewer renders at most `fps` times per second whatever the capture rate, and can
+    display the frames downscaled; mouse positions are mapped back to the screenshot, so
+    selections and right clicks behave the same at any scale. Each frame is copied (or
+    resized) into a buffer reused from one render to the next, then the overlay is drawn
+    on it.
+
+    HighGUI windows must be driven from the main thread on macOS, so the viewer does not
+    run its own thread: the main loop calls `show` with each new frame and pumps the
+    window events with `cv2.waitKey`.
+
+    Attributes:
+        window_name (str): Name of the window.
+        fps (float): Maximum number of renders per second, 0 to render every frame.
+        scale (float): Size of the displayed image relative to the screenshot.
+        get_screen_position (callable): Function translating a screenshot position to the screen position.
+        on_right_click (callable): Function called with the screenshot position of each right click.
+        selector (RegionSelector): Selection of areas with the left button.
+        mouse_pos (tuple): Mouse position in the screenshot.
+        frame_rate (FrameRateMeter): Measured capture rate, shown in the overlay.
+        clock (RealClock or SimulatedClock): Clock used for the render rate and FPS measurement.
+    """
+
+    def __init__(self, window_name, get_screen_position, fps=15, scale=1.0, on_select=None, on_right_click=None):
+        """
+        Initialize the viewer. The window opens with the first rendered frame.
+
+        Args:
+            window_name (str): Name of the window.
+            get_screen_position (callable): Function translating a screenshot position to the screen position.
+            fps (float, optional): Maximum number of renders per second, 0 to render every frame (default 15).
+            scale (float, optional): Size of the displayed image relative to the screenshot (default 1.0).
+            on_select (callable, optional): Function called with (start, end) when an area is selected.
+            on_right_click (callable, optional): Function called with the screenshot position of each right click.
+        """
+        self.window_name = window_name
+        self.get_screen_position = get_screen_position
+        self.fps = fps
+        self.scale = scale
+        self.on_right_click = on_right_click
+        self.selector = RegionSelector(on_select)
+        self.mouse_pos = (0, 0)
+        self.frame_rate = FrameRateMeter()
+        self.clock = get_clock()
+        self._buffer = None  # Displayed image, reused between renders
+        self._window_open = False
+        self._next_render = 0
+
+    def to_screenshot_position(self, pos):
+        """
+        Map a position in the displayed image to the screenshot.
+
+        Args:
+            pos (tuple): The (x, y) position in the window.
+
+        Returns:
+            tuple: The (x, y) position in the screenshot.
+        """
+        return (int(pos[0] / self.scale), int(pos[1] / self.scale))
+
+    def mouse_callback(self, event, x, y, flags, param):
+        """
+        Callback function to handle mouse events for selecting areas in the window.
+
+        Args:
+            event (int): Mouse event (click, move, release).
+            x (int): X-coordinate of the mouse in the window.
+            y (int): Y-coordinate of the mouse in the window.
+            flags (int): Event flags.
+            param (object): Additional parameters.
+        """
+        self.mouse_pos = self.to_screenshot_position((x, y))
+        if event == cv2.EVENT_MOUSEMOVE:
+            self.selector.move(self.mouse_pos)
+        elif event == cv2.EVENT_RBUTTONDOWN:
+            if self.on_right_click is not None:
+                self.on_right_click(self.mouse_pos)
+        elif event == cv2.EVENT_LBUTTONDOWN:
+            self.selector.click(self.mouse_pos)
+
+    def show(self, frame, rectangles=None):
+        """
+        Render a frame with the overlay, unless the previous render is too recent.
+
+        Args:
+            frame (Frame): The frame to show.
+            rectangles (list, optional): Detected rectangles [(x, y, width, height)] in the screenshot.
+
+        Returns:
+            bool: True if the frame was rendered.
+        """
+        now = self.clock.time()
+        fps = self.frame_rate.update(frame, now)
+        if now < self._next_render:
+            return False
+        self._next_render = now + 1.0 / self.fps if self.fps > 0 else now
+
+        self._render(frame.image)
+        draw_debug_overlay(self._buffer, fps, self.mouse_pos, self.get_screen_position,
+                           self.selector.selection, rectangles, scale=self.scale)
+
+        cv2.imshow(self.window_name, self._buffer)
+        if not self._window_open:
+            # The window exists once shown, register the callback a single time
+            cv2.setMouseCallback(self.window_name, self.mouse_callback)
+            self._window_open = True
+        return True
+
+    def _render(self, image):
+        """
+        Helper function to copy or resize the screenshot into the reused buffer.
+        """
+        if self.scale == 1.0:
+            if self._buffer is None or self._buffer.shape != image.shape:
+                self._buffer = np.empty_like(image)
+            np.copyto(self._buffer, image)
+            return
+
+        size = (max(int(image.shape[1] * self.scale), 1), max(int(image.shape[0] * self.scale), 1))
+        if self._buffer is None or self._buffer.shape[1::-1] != size or self._buffer.shape[2:] != image.shape[2:]:
+            self._buffer = np.empty((size[1], size[0]) + image.shape[2:], dtype=image.dtype)
+        cv2.resize(image, size, dst=self._buffer, interpolation=cv2.INTER_AREA)
+
+    def close(self):
+        """
+        Close the window.
+        """
+        if self._window_open:
+            cv2.destroyWindow(self.window_name)
+            self._window_open = False
@@ -0,0 +1,277 @@
+import argparse
+import json
+import cv2
+import numpy as np
+from utils import crop_image
+
+
+class DigitRecognizer:
+    """
+    A fast recognizer for integer fields rendered in a single fixed game font.
+
+    The field is binarized and split into connected components. Small components
+    (commas, dots) are treated as separators, every other component is normalized to a
+    fixed glyph size and matched against all calibrated digit glyphs at once with a
+    single matrix product (normalized cross-correlation).
+
+    Attributes:
+        glyphs (ndarray): Normalized glyph vectors of shape (number of glyphs, GLYPH_HEIGHT * GLYPH_WIDTH).
+        labels (list): The character of each glyph.
+    """
+
+    GLYPH_WIDTH = 12  # Width of the normalized glyphs
+    GLYPH_HEIGHT = 16  # Height of the normalized glyphs
+    SEPARATOR_HEIGHT_RATIO = 0.6  # Components lower than this ratio of the tallest one are separators
+    MIN_COMPONENT_AREA = 2  # Components with fewer pixels are noise
+
+    def __init__(self, glyphs, labels):
+        """
+        Initialize the recognizer with a calibrated glyph set.
+
+        Args:
+            glyphs (ndarray): Normalized glyph vectors, one row per glyph.
+            labels (list): The character of each glyph.
+        """
+        self.glyphs = np.asarray(glyphs, dtype=np.float32)
+        self.labels = list(labels)
+
+    # **************************************************
+    # * Persistence
+    # **************************************************
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a glyph set created by `calibrate`.
+
+        Args:
+            path (str): Path of the `.npz` glyph set.
+
+        Returns:
+            DigitRecognizer: The recognizer using the glyph set.
+        """
+        data = np.load(path)
+        return cls(data['glyphs'], [str(label) for label in data['labels']])
+
+    def save(self, path):
+        """
+        Save the glyph set.
+
+        Args:
+            path (str): Path of the `.npz` glyph set.
+        """
+        np.savez_compressed(path, glyphs=self.glyphs, labels=np.array(self.labels))
+
+    # **************************************************
+    # * Segmentation
+    # **************************************************
+
+    @staticmethod
+    def binarize(image):
+        """
+        Convert an image to a binary image with white text on a black background.
+
+        Args:
+            image (ndarray): The field image (grayscale or BGR).
+
+        Returns:
+            ndarray: The binary image.
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # The border is mostly background, invert if the background came out white
+        border = np.concatenate((binary[0], binary[-1], binary[:, 0], binary[:, -1]))
+        if np.count_nonzero(border) > border.size // 2:
+            binary = cv2.bitwise_not(binary)
+        return binary
+
+    @classmethod
+    def segment(cls, image):
+        """
+        Split a field into its characters.
+
+        Args:
+            image (ndarray): The field image (grayscale or BGR).
+
+        Returns:
+            tuple: The normalized glyph vectors of the characters, shape (N, GLYPH_HEIGHT * GLYPH_WIDTH),
+                   and a list of N booleans telling which characters are separators, both sorted left to right.
+        """
+        binary = cls.binarize(image)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+        # Skip the background component and the noise, then order characters left to right
+        stats = stats[1:]
+        ids = np.nonzero(stats[:, cv2.CC_STAT_AREA] >= cls.MIN_COMPONENT_AREA)[0]
+        ids = ids[np.argsort(stats[ids, cv2.CC_STAT_LEFT])]
+        if len(ids) == 0:
+            return np.empty((0, cls.GLYPH_HEIGHT * cls.GLYPH_WIDTH), dtype=np.float32), []
+
+        heights = stats[ids, cv2.CC_STAT_HEIGHT]
+        separators = list(heights < heights.max() * cls.SEPARATOR_HEIGHT_RATIO)
+
+        vectors = np.empty((len(ids), cls.GLYPH_HEIGHT * cls.GLYPH_WIDTH), dtype=np.float32)
+        for row, i in enumerate(ids):
+            x, y, w, h = stats[i, :4]
+            mask = (labels[y:y + h, x:x + w] == i + 1).astype(np.uint8) * 255
+
+            # Pad narrow characters (e.g. '1') to the glyph aspect ratio instead of stretching them
+            padded_w = max(w, int(round(h * cls.GLYPH_WIDTH / cls.GLYPH_HEIGHT)))
+            canvas = np.zeros((h, padded_w), dtype=np.uint8)
+            left = (padded_w - w) // 2
+            canvas[:, left:left + w] = mask
+
+            glyph = cv2.resize(canvas, (cls.GLYPH_WIDTH, cls.GLYPH_HEIGHT), interpolation=cv2.INTER_AREA)
+            vectors[row] = glyph.ravel()
+
+        return cls._normalize(vectors), separators
+
+    @staticmethod
+    def _normalize(vectors):
+        """
+        Normalize glyph vectors to zero mean and unit length, so their dot product is
+        the normalized cross-correlation.
+
+        Args:
+            vectors (ndarray): Glyph vectors, one row per glyph.
+
+        Returns:
+            ndarray: The normalized glyph vectors.
+        """
+        vectors = vectors - vectors.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-6)
+
+    # **************************************************
+    # * Recognition
+    # **************************************************
+
+    def recognize(self, image):
+        """
+        Recognize the digits of a field, ignoring separators.
+
+        Args:
+            image (ndarray): The field image (grayscale or BGR).
+
+        Returns:
+            tuple: The recognized digits (str) and the confidence of the weakest character (float, 0 to 1).
+        """
+        vectors, separators = self.segment(image)
+        if len(vectors) == 0:
+            return '', 0.0
+
+        characters = vectors[np.logical_not(separators)]
+        if len(characters) == 0:
+            return '', 0.0
+
+        scores = characters @ self.glyphs.T
+        best = scores.argmax(axis=1)
+        confidence = float(scores[np.arange(len(best)), best].min())
+        text = ''.join(self.labels[i] for i in best)
+        return text, max(confidence, 0.0)
+
+    def read_integer(self, image):
+        """
+        Read an integer field.
+
+        Args:
+            image (ndarray): The field image (grayscale or BGR).
+
+        Returns:
+            tuple: The integer (or None if no digit was found) and the recognition confidence.
+        """
+        text, confidence = self.recognize(image)
+        if not text.isdigit():
+            return None, 0.0
+        return int(text), confidence
+
+    # **************************************************
+    # * Calibration
+    # **************************************************
+
+    @classmethod
+    def calibrate(cls, samples):
+        """
+        Build a glyph set from labeled field images.
+
+        Args:
+            samples (list): A list of (image, label) tuples, where label is the text of the field
+                            (e.g. '12,500'). Separators in the label are ignored.
+
+        Returns:
+            DigitRecognizer: A recognizer using the averaged glyph of every digit seen.
+
+        Raises:
+            ValueError: If no sample could be used for calibration.
+        """
+        sums = {}
+        counts = {}
+        for image, label in samples:
+            digits = [c for c in label if c.isdigit()]
+            vectors, separators = cls.segment(image)
+            characters = vectors[np.logical_not(separators)] if len(vectors) else vectors
+            if len(characters) != len(digits):
+                print(f'Skipping sample "{label}": found {len(characters)} characters for {len(digits)} digits')
+                continue
+            for digit, vector in zip(digits, characters):
+                sums[digit] = sums.get(digit, 0) + vector
+                counts[digit] = counts.get(digit, 0) + 1
+
+        if not sums:
+            raise ValueError('No usable calibration samples')
+
+        labels = sorted(sums)
+        glyphs = cls._normalize(np.stack([sums[digit] / counts[digit] for digit in labels]))
+        missing = sorted(set('0123456789') - set(labels))
+        if missing:
+            print(f'Warning: no calibration sample for digits {", ".join(missing)}')
+        return cls(glyphs, labels)
+
+
+def calibrate_from_file(labels_path, output_path):
+    """
+    Build and save a glyph set from a JSON file of labeled screenshots.
+
+    The file holds a list of samples such as
+    `{"image": "shots/price_1.png", "label": "12,500", "area": [[274, 653], [396, 684]]}`,
+    where `area` is optional and uses the same format as the bots' `AREA_*` constants.
+
+    Args:
+        labels_path (str): Path of the JSON labels file.
+        output_path (str): Path of the `.npz` glyph set to write.
+
+    Returns:
+        DigitRecognizer: The calibrated recognizer.
+    """
+    with open(labels_path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    samples = []
+    for entry in entries:
+        image = cv2.imread(entry['image'], cv2.IMREAD_COLOR)
+        if image is None:
+            print(f'Skipping unreadable image: {entry["image"]}')
+            continue
+        if entry.get('area'):
+            image = crop_image(image, entry['area'][0], entry['area'][1])
+        samples.append((image, str(entry['label'])))
+
+    recognizer = DigitRecognizer.calibrate(samples)
+    recognizer.save(output_path)
+    print(f'Saved glyphs for {"".join(recognizer.labels)} to {output_path}')
+    return recognizer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tools for the glyph-template digit recognizer.")
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+    calibrate_parser = subparsers.add_parser("calibrate", help="Build a glyph set from labeled screenshots.")
+    calibrate_parser.add_argument("labels", help="JSON file listing the labeled screenshots.")
+    calibrate_parser.add_argument("--output", help="Path of the glyph set to write.", default="digit_glyphs.npz")
+    args = parser.parse_args()
+
+    if args.command == "calibrate":
+        calibrate_from_file(args.labels, args.output)
+    else:
+        parser.print_help()
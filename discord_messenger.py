@@ -1,93 +1,335 @@
-import discord
 import asyncio
-from threading import Thread
+import hashlib
+import time
+from collections import deque
+from threading import Thread, Condition, Event
 from io import BytesIO
-from PIL import Image
+import cv2
+from metrics import get_registry
+from profiling import profiled_target
+
+try:
+    import discord
+except ImportError:  # Optional dependency, only the local stand-in client works without it
+    discord = None
+
+# Discord rejects text messages longer than this
+MAX_MESSAGE_LENGTH = 2000
+
+# Image encodings: file extension and OpenCV quality flag
+IMAGE_FORMATS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY),
+    'png': ('.png', None),
+}
+
+# What to do with a new message when the outbound queue is full
+DROP_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the rate of the messages sent to a channel.
+
+    Discord allows short bursts and then a steady rate per channel (5 messages per 5
+    seconds); the bucket holds `capacity` tokens refilled at `rate` tokens per second, and
+    each message takes one. It follows the wall clock like the Discord rate limits.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. the burst size.
+        tokens (float): Tokens currently available.
+    """
+
+    def __init__(self, rate=1.0, capacity=5):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate (float, optional): Tokens added per second (default 1.0).
+            capacity (float, optional): Maximum number of tokens (default 5).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._last = time.monotonic()
+
+    def _refill(self):
+        """
+        Helper function to add the tokens earned since the last call.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def get_delay(self):
+        """
+        Get the time until a token is available, without taking it.
+
+        Returns:
+            float: Seconds to wait, 0 if a token is available.
+        """
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """
+        Take a token, which must be available.
+        """
+        self._refill()
+        self.tokens -= 1
+
 
 class DiscordMessenger:
     """
     A Discord bot that runs in a separate thread and can send messages to a specified channel asynchronously.
 
+    Messages are never sent from the caller's thread: they go into a bounded outbound queue
+    drained by a background thread, which encodes the screenshots with OpenCV, merges the
+    text messages waiting for the same channel into one, optionally skips messages identical
+    to one sent within `dedup_window` seconds, and waits for the token bucket of the channel
+    before each send. When the queue is full, `drop_policy` decides whether the oldest
+    queued message or the new one is dropped.
+
     Attributes:
         channel_id (int): The Discord channel ID where the bot sends messages.
         token (str): The bot's token used for authentication with Discord.
-        client (DiscordClient): The custom Discord client for interacting with the Discord API.
+        client (DiscordClient or LocalDiscordClient): The client sending the messages.
         loop (asyncio.AbstractEventLoop): The asyncio event loop for handling asynchronous tasks.
+        max_queue (int): Maximum number of queued messages.
+        image_format (str): Encoding of the screenshots: 'jpeg', 'webp' or 'png'.
+        image_quality (int): JPEG/WebP quality, from 0 to 100.
+        rate (float): Messages per second allowed per channel.
+        burst (int): Messages that can be sent at once per channel before the rate applies.
+        dedup_window (float): Seconds during which an identical message is not sent again, 0 to send every message.
+        drop_policy (str): 'drop_oldest' or 'drop_newest' when the queue is full.
+        send_timeout (float): Maximum time in seconds to wait for Discord to accept a message.
     """
 
-    def __init__(self, channel_id="", token=""):
+    def __init__(self, channel_id="", token="", client=None, max_queue=32, image_format='jpeg', image_quality=85,
+                 rate=1.0, burst=5, dedup_window=0.0, drop_policy='drop_oldest', send_timeout=10.0):
         """
         Initializes the DiscordBot with a specified channel ID and bot token.
 
         Args:
             channel_id (str or int): The Discord channel ID where the bot will send messages.
             token (str): The bot's token for authentication with Discord.
+            client (object, optional): Client to send the messages with, e.g. a `LocalDiscordClient` (default: a `DiscordClient`).
+            max_queue (int, optional): Maximum number of queued messages (default 32).
+            image_format (str, optional): Encoding of the screenshots: 'jpeg', 'webp' or 'png' (default 'jpeg').
+            image_quality (int, optional): JPEG/WebP quality, from 0 to 100 (default 85).
+            rate (float, optional): Messages per second allowed per channel (default 1.0).
+            burst (int, optional): Messages that can be sent at once per channel (default 5).
+            dedup_window (float, optional): Seconds during which an identical message is not sent again,
+                                            e.g. for repeated status messages (default 0, every message is sent).
+            drop_policy (str, optional): 'drop_oldest' or 'drop_newest' when the queue is full (default 'drop_oldest').
+            send_timeout (float, optional): Maximum time in seconds to wait for Discord to accept a message (default 10).
         """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f'Unknown image format: {image_format}')
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f'Unknown drop policy: {drop_policy}')
+        if client is None and discord is None:
+            raise ImportError('discord.py is not installed, install it or pass a LocalDiscordClient')
+
         self.channel_id = int(channel_id)  # Ensure channel_id is an integer
         self.token = token
-        self.client = DiscordClient(intents=discord.Intents.default())
+        self.client = client if client is not None else DiscordClient(intents=discord.Intents.default())
         self.loop = asyncio.get_event_loop()
+        self.max_queue = max_queue
+        self.image_format = image_format
+        self.image_quality = image_quality
+        self.rate = rate
+        self.burst = burst
+        self.dedup_window = dedup_window
+        self.drop_policy = drop_policy
+        self.send_timeout = send_timeout
+
+        self._pending = deque()  # Queued (kind, channel_id, payload, filename) messages
+        self._condition = Condition()  # Notified when a message is queued or the messenger stops
+        self._stopping = False
+        self._stopped = Event()  # Interrupts the waits for a token when stopping
+        self._buckets = {}  # Channel id -> TokenBucket
+        self._recent = {}  # Message digest -> time it was last sent
+        self._worker = None
+
+        metrics = get_registry()
+        self._results = {result: metrics.counter('discord_messages_total', 'Number of Discord messages by outcome.', result=result)
+                         for result in ('sent', 'coalesced', 'duplicate', 'dropped', 'failed')}
+        self._queue_length = metrics.gauge('discord_queue_length', 'Number of Discord messages waiting to be sent.')
 
     def send(self, message):
         """
-        Sends a message to the specified Discord channel asynchronously.
+        Queues a message for the specified Discord channel.
 
         Args:
             message (str): The message content to send to the Discord channel.
         """
-        # Schedule the coroutine to run in the client's event loop
-        asyncio.run_coroutine_threadsafe(self.client.send_message(self.channel_id, message), self.client.loop)
-    
+        self._enqueue(('text', self.channel_id, message, None))
+
     def send_image(self, image_bytes, filename="image.png"):
         """
-        Sends an image to the specified Discord channel asynchronously.
+        Queues an encoded image for the specified Discord channel.
 
         Args:
             image_bytes (bytes): The image data as bytes.
             filename (str): The filename to use when sending the image (default: "image.png").
         """
-        asyncio.run_coroutine_threadsafe(self.client.send_image(self.channel_id, image_bytes, filename), self.client.loop)
+        self._enqueue(('image', self.channel_id, image_bytes, filename))
 
-    def send_screencap(self, screencap, top_left, bottom_right, filename="screencap.png"):
+    def send_screencap(self, screencap, top_left, bottom_right, filename=None):
         """
-        Converts a numpy array screencap to bytes and sends it to the Discord channel.
+        Queues a crop of a screenshot for the Discord channel, encoded by the background thread.
 
         Args:
-            screencap (numpy.ndarray): The full screenshot as a numpy array.
-            start_point (tuple): (x, y) coordinates of the top-left corner of the crop.
-            end_point (tuple): (x, y) coordinates of the bottom-right corner of the crop.
-            filename (str): The filename to use for the image (default is "screencap.png").
-        """
+            screencap (numpy.ndarray): The full screenshot as a numpy array, in BGR order as captured.
+            top_left (tuple): (x, y) coordinates of the top-left corner of the crop.
+            bottom_right (tuple): (x, y) coordinates of the bottom-right corner of the crop.
+            filename (str, optional): The filename to use for the image (default "screencap" with the extension of `image_format`).
 
+        Raises:
+            ValueError: If the crop is empty, i.e. the corners share an x or y coordinate or lie outside the screenshot.
+        """
         # Ensure coordinates are in correct order (top-left, bottom-right)
         x1, y1 = min(top_left[0], bottom_right[0]), min(top_left[1], bottom_right[1])
         x2, y2 = max(top_left[0], bottom_right[0]), max(top_left[1], bottom_right[1])
-        
-        # Extract the sub-region from the screencap using numpy slicing
-        cropped_screencap = screencap[y1:y2, x1:x2]
 
-        # Convert the numpy array to an image
-        image = Image.fromarray(cropped_screencap)
+        # Copy only the crop, the screenshot buffer may be reused by the capture
+        cropped_screencap = screencap[y1:y2, x1:x2].copy()
+        if cropped_screencap.size == 0:
+            raise ValueError(f'Empty screencap crop from {top_left} to {bottom_right}')
+        filename = filename or f'screencap{IMAGE_FORMATS[self.image_format][0]}'
+        self._enqueue(('screencap', self.channel_id, cropped_screencap, filename))
 
-        # Convert the image to bytes using BytesIO
-        image_bytes_io = BytesIO()
-        image.save(image_bytes_io, format='PNG')  # Save as PNG to the BytesIO buffer
-        image_bytes_io.seek(0)  # Go to the start of the BytesIO buffer
+    def _enqueue(self, message):
+        """
+        Helper function to queue a message, applying the drop policy when the queue is full.
+        """
+        with self._condition:
+            if len(self._pending) >= self.max_queue:
+                self._results['dropped'].inc()
+                if self.drop_policy == 'drop_newest':
+                    return
+                self._pending.popleft()
+            self._pending.append(message)
+            self._queue_length.set(len(self._pending))
+            self._condition.notify()
+
+    # **************************************************
+    # * Outbound Thread
+    # **************************************************
+
+    def _run_outbound(self):
+        """
+        The main loop of the outbound thread: sends the queued messages within the rate limits.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    break
+                if self._stopped.is_set():
+                    # The flush timed out, drop what is left
+                    self._results['dropped'].inc(len(self._pending))
+                    self._pending.clear()
+                    self._queue_length.set(0)
+                    break
+                channel_id = self._pending[0][1]
 
-        # Send the image to the Discord channel
-        asyncio.run_coroutine_threadsafe(self.client.send_image(self.channel_id, image_bytes_io.getvalue(), filename), self.client.loop)
+            # Wait for a token before taking the message, text queued meanwhile is merged into it
+            bucket = self._buckets.setdefault(channel_id, TokenBucket(self.rate, self.burst))
+            delay = bucket.get_delay()
+            if delay > 0:
+                self._stopped.wait(delay)
+                continue
+
+            kind, channel_id, payload, filename = self._take_message()
+            # A message that cannot be encoded or sent must not stop the thread, the next ones are still sent
+            try:
+                if kind == 'screencap':
+                    payload = self._encode(payload)
+                    kind = 'image'
+
+                digest = hashlib.blake2b(payload.encode() if kind == 'text' else payload, digest_size=16).digest()
+                now = time.monotonic()
+                if now - self._recent.get((channel_id, digest), float('-inf')) < self.dedup_window:
+                    self._results['duplicate'].inc()
+                    continue
+                self._recent = {key: sent for key, sent in self._recent.items() if now - sent < self.dedup_window}
+                self._recent[(channel_id, digest)] = now
+
+                bucket.take()
+                if kind == 'text':
+                    coroutine = self.client.send_message(channel_id, payload)
+                else:
+                    coroutine = self.client.send_image(channel_id, payload, filename)
+                asyncio.run_coroutine_threadsafe(coroutine, self.client.loop).result(self.send_timeout)
+            except Exception as e:
+                self._results['failed'].inc()
+                print(f'Failed to send a Discord message: {e!r}')
+            else:
+                self._results['sent'].inc()
+
+    def _take_message(self):
+        """
+        Helper function to take the next message, merging the text messages queued after it for the same channel.
+
+        Returns:
+            tuple: The (kind, channel_id, payload, filename) message.
+        """
+        with self._condition:
+            kind, channel_id, payload, filename = self._pending.popleft()
+            if kind == 'text':
+                while self._pending and self._pending[0][0] == 'text' and self._pending[0][1] == channel_id \
+                        and len(payload) + 1 + len(self._pending[0][2]) <= MAX_MESSAGE_LENGTH:
+                    payload = f'{payload}\n{self._pending.popleft()[2]}'
+                    self._results['coalesced'].inc()
+            self._queue_length.set(len(self._pending))
+        return kind, channel_id, payload, filename
+
+    def _encode(self, image):
+        """
+        Helper function to encode a BGR image in `image_format`.
+
+        Args:
+            image (numpy.ndarray): The image, in the BGR order OpenCV expects.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        extension, quality_flag = IMAGE_FORMATS[self.image_format]
+        params = [quality_flag, self.image_quality] if quality_flag is not None else []
+        ok, encoded = cv2.imencode(extension, image, params)
+        if not ok:
+            raise ValueError(f'Could not encode the image as {self.image_format}')
+        return encoded.tobytes()
+
+    # **************************************************
+    # * Threading Methods
+    # **************************************************
 
     def start(self):
         """
-        Starts the Discord bot in a separate thread and connects it to Discord.
+        Starts the Discord bot and the outbound thread, and connects the bot to Discord.
         """
+        self._worker = Thread(target=profiled_target(self._run_outbound, 'DiscordOutbound'), name='DiscordOutbound', daemon=True)
+        self._worker.start()
         t = Thread(target=self.run)
         t.start()
 
-    def stop(self):
+    def stop(self, timeout=5.0):
         """
-        Stops the Discord bot and closes the Discord client connection.
+        Sends the queued messages, then stops the Discord bot and closes the Discord client connection.
+
+        Args:
+            timeout (float, optional): Maximum time in seconds to wait for the queued messages (default 5.0).
         """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        self._stopped.set()
         asyncio.run_coroutine_threadsafe(self.client.close(), self.client.loop)
 
     def run(self):
@@ -97,7 +339,69 @@ class DiscordMessenger:
         self.client.run(self.token)
 
 
-class DiscordClient(discord.Client):
+class LocalDiscordClient:
+    """
+    Stand-in for `DiscordClient` recording the messages instead of sending them, to run
+    and test the messenger without a Discord connection or token.
+
+    Attributes:
+        loop (asyncio.AbstractEventLoop): The event loop running the sends.
+        latency (float): Simulated time in seconds taken by each send.
+        messages (list): Sent messages as (time, channel_id, kind, payload, filename), kind being 'text' or 'image'.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+        Initializes the stand-in client.
+
+        Args:
+            latency (float, optional): Simulated time in seconds taken by each send (default 0.0).
+        """
+        self.loop = asyncio.new_event_loop()
+        self.latency = latency
+        self.messages = []
+
+    def run(self, token):
+        """
+        Runs the event loop until the client is closed.
+
+        Args:
+            token (str): Ignored.
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def close(self):
+        """
+        Stops the event loop.
+        """
+        self.loop.stop()
+
+    async def send_message(self, channel_id, message):
+        """
+        Records a text message.
+
+        Args:
+            channel_id (int): The channel ID.
+            message (str): The message content.
+        """
+        await asyncio.sleep(self.latency)
+        self.messages.append((time.monotonic(), channel_id, 'text', message, None))
+
+    async def send_image(self, channel_id, image_bytes, filename):
+        """
+        Records an image.
+
+        Args:
+            channel_id (int): The channel ID.
+            image_bytes (bytes): The image data.
+            filename (str): The name of the image file.
+        """
+        await asyncio.sleep(self.latency)
+        self.messages.append((time.monotonic(), channel_id, 'image', image_bytes, filename))
+
+
+class DiscordClient(discord.Client if discord is not None else object):
     """
     A custom Discord client for handling bot events and sending messages.
 
@@ -131,7 +435,7 @@ class DiscordClient(discord.Client):
             await channel.send(message)  # Send the message if the channel is found
         else:
             print(f"Channel ID {channel_id} not found.")
-    
+
     async def send_image(self, channel_id, image_bytes, filename):
         """
         Sends an image as bytes to a specified channel after ensuring the bot is ready.
@@ -147,4 +451,4 @@ class DiscordClient(discord.Client):
             image_file = discord.File(BytesIO(image_bytes), filename=filename)
             await channel.send(file=image_file)  # Send the image file to the channel
         else:
-            print(f"Channel ID {channel_id} not found.")
\ No newline at end of file
+            print(f"Channel ID {channel_id} not found.")
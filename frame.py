@@ -0,0 +1,38 @@
+class Frame:
+    """
+    An immutable record of a single captured screenshot.
+
+    Frames are published by the capture backends with a strictly increasing sequence
+    number, so consumers can tell a new frame from a stale one without comparing pixels.
+
+    Attributes:
+        seq (int): Sequence number of the frame, starting at 1 for the first capture.
+        timestamp (float): Clock time (`time.perf_counter()` with the real clock) taken right before the capture started.
+        image (ndarray): The captured pixel buffer (read-only).
+    """
+
+    __slots__ = ('seq', 'timestamp', 'image')
+
+    def __init__(self, seq, timestamp, image):
+        """
+        Initialize the frame and freeze its pixel buffer.
+
+        Args:
+            seq (int): Sequence number of the frame.
+            timestamp (float): Capture timestamp of the frame.
+            image (ndarray): The captured pixel buffer.
+        """
+        # Freeze the pixel buffer so no consumer can modify a frame shared with others
+        image.flags.writeable = False
+        object.__setattr__(self, 'seq', seq)
+        object.__setattr__(self, 'timestamp', timestamp)
+        object.__setattr__(self, 'image', image)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Frame objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Frame objects are immutable')
+
+    def __repr__(self):
+        return f'Frame(seq={self.seq}, timestamp={self.timestamp:.6f}, shape={self.image.shape})'
@@ -0,0 +1,282 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from frame import Frame
+
+
+class SharedFrameRingBuffer:
+    """
+    A ring buffer of preallocated frames in shared memory, written by one capture
+    process and read by any number of bot processes.
+
+    The segment starts with a small int64 header followed by the pixel slots:
+
+        header[0]            sequence number of the latest committed frame
+        header[1:5]          number of slots, frame height, width and channels
+        header[5 + 3*i]      seqlock counter of slot i (odd while the slot is written)
+        header[5 + 3*i + 1]  sequence number of the frame stored in slot i
+        header[5 + 3*i + 2]  capture timestamp of slot i (float64 bits)
+
+    Readers never take a lock: they read the slot counter, the pixels and the counter
+    again, and retry if the writer touched the slot in between (seqlock). Waiting readers
+    sleep until the next frame is due from the interval between the last two frames,
+    instead of polling continuously.
+
+    Attributes:
+        name (str): Name of the shared memory segment.
+        slots (int): Number of preallocated frames.
+        shape (tuple): Shape (height, width, channels) of every frame.
+        writable (bool): Whether this mapping is the writer side of the buffer.
+    """
+
+    CONTROL_FIELDS = 5  # Latest sequence number, slots, height, width, channels
+    SLOT_FIELDS = 3  # Seqlock counter, frame sequence number, timestamp
+
+    def __init__(self, shm, writable):
+        """
+        Map the header and frame slots of an existing shared memory segment.
+        Use `create` or `attach` instead of calling this directly.
+
+        Args:
+            shm (SharedMemory): The shared memory segment.
+            writable (bool): Whether this mapping is allowed to write frames.
+        """
+        self._shm = shm
+        self.name = shm.name
+        self.writable = writable
+
+        control = np.ndarray((self.CONTROL_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.slots = int(control[1])
+        self.shape = (int(control[2]), int(control[3]), int(control[4]))
+
+        header_size = self.CONTROL_FIELDS + self.slots * self.SLOT_FIELDS
+        self._header = np.ndarray((header_size,), dtype=np.int64, buffer=shm.buf)
+        self._slot_header = self._header[self.CONTROL_FIELDS:].reshape(self.slots, self.SLOT_FIELDS)
+        self._timestamps = self._slot_header[:, 2].view(np.float64)
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=header_size * 8)
+        if not writable:
+            # Readers map the pixels read-only so a bot cannot corrupt frames of others
+            self._frames.flags.writeable = False
+
+        self._write_slot = None  # Slot currently being written by `begin_write`
+
+    @classmethod
+    def create(cls, name, shape, slots=4):
+        """
+        Create a new shared ring buffer.
+
+        Args:
+            name (str): Name of the shared memory segment, None for a generated name.
+            shape (tuple): Shape (height, width, channels) of the frames.
+            slots (int, optional): Number of preallocated frames (default 4).
+
+        Returns:
+            SharedFrameRingBuffer: The writer side of the ring buffer.
+        """
+        height, width, channels = shape
+        header_size = cls.CONTROL_FIELDS + slots * cls.SLOT_FIELDS
+        size = header_size * 8 + slots * height * width * channels
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((header_size,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[1:5] = (slots, height, width, channels)
+        del header  # Release the export so the segment can be closed later
+        return cls(shm, writable=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to an existing shared ring buffer as a reader.
+
+        Args:
+            name (str): Name of the shared memory segment.
+
+        Returns:
+            SharedFrameRingBuffer: The read-only side of the ring buffer.
+        """
+        # Readers do not own the segment: keep the resource tracker from unlinking it on exit
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 always tracks attached segments
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, writable=False)
+
+    @property
+    def latest_seq(self):
+        """
+        int: Sequence number of the latest committed frame, 0 before the first write.
+        """
+        return int(self._header[0])
+
+    # **************************************************
+    # * Writer Methods
+    # **************************************************
+
+    def begin_write(self):
+        """
+        Start writing the next frame and return its slot, so the capture can write
+        pixels directly into shared memory.
+
+        Returns:
+            ndarray: The writable pixel buffer of the next slot.
+        """
+        if not self.writable:
+            raise Exception('Ring buffer is attached read-only')
+        slot = (self.latest_seq + 1) % self.slots
+        self._slot_header[slot, 0] += 1  # Odd counter marks the slot as being written
+        self._write_slot = slot
+        return self._frames[slot]
+
+    def commit_write(self, timestamp):
+        """
+        Publish the frame started with `begin_write`.
+
+        Args:
+            timestamp (float): `time.perf_counter()` value taken right before the capture started.
+
+        Returns:
+            int: Sequence number of the committed frame.
+        """
+        slot = self._write_slot
+        seq = self.latest_seq + 1
+        self._slot_header[slot, 1] = seq
+        self._timestamps[slot] = timestamp
+        self._slot_header[slot, 0] += 1  # Even counter marks the slot as stable again
+        self._header[0] = seq
+        self._write_slot = None
+        return seq
+
+    def abort_write(self):
+        """
+        Give up the frame started with `begin_write` without publishing it, e.g. when the
+        capture failed or its size changed.
+        """
+        slot = self._write_slot
+        self._slot_header[slot, 1] = 0  # The slot no longer holds its previous frame
+        self._slot_header[slot, 0] += 1
+        self._write_slot = None
+
+    def write(self, image, timestamp):
+        """
+        Copy a captured image into the next slot and publish it.
+
+        Args:
+            image (ndarray): The captured image, matching the ring buffer shape.
+            timestamp (float): `time.perf_counter()` value taken right before the capture started.
+
+        Returns:
+            int: Sequence number of the committed frame.
+        """
+        np.copyto(self.begin_write(), image)
+        return self.commit_write(timestamp)
+
+    # **************************************************
+    # * Reader Methods
+    # **************************************************
+
+    def read_latest(self, after_seq=0, copy=True):
+        """
+        Read the latest committed frame without locking.
+
+        Args:
+            after_seq (int, optional): Only return frames newer than this sequence number (default 0).
+            copy (bool, optional): Copy the pixels out of shared memory (default True). Without a copy
+                                   the frame is a zero-copy view that stays valid until the writer
+                                   laps the ring; check it with `is_current`.
+
+        Returns:
+            Frame: The latest frame, or None if there is no frame newer than `after_seq`.
+        """
+        while True:
+            seq = self.latest_seq
+            if seq <= after_seq:
+                return None
+
+            slot = seq % self.slots
+            version = self._slot_header[slot, 0]
+            if version & 1:
+                continue  # The writer already lapped the ring and is rewriting this slot
+
+            image = self._frames[slot].copy() if copy else self._frames[slot]
+            timestamp = float(self._timestamps[slot])
+            frame_seq = int(self._slot_header[slot, 1])
+
+            if self._slot_header[slot, 0] == version and frame_seq == seq:
+                return Frame(seq, timestamp, image)
+
+    def is_current(self, frame):
+        """
+        Check that a zero-copy frame has not been overwritten by the writer yet.
+
+        Args:
+            frame (Frame): A frame returned by `read_latest`.
+
+        Returns:
+            bool: True if the slot still holds the frame.
+        """
+        slot = frame.seq % self.slots
+        return not self._slot_header[slot, 0] & 1 and self._slot_header[slot, 1] == frame.seq
+
+    def get_next_frame_time(self):
+        """
+        Estimate when the writer starts capturing the next frame, from the interval between
+        the capture timestamps of the last two frames.
+
+        Returns:
+            float: The `time.perf_counter()` value of the next capture, 0 if unknown.
+        """
+        seq = self.latest_seq
+        if seq < 2:
+            return 0
+        slot, previous_slot = seq % self.slots, (seq - 1) % self.slots
+        interval = self._timestamps[slot] - self._timestamps[previous_slot]
+        if self._slot_header[previous_slot, 1] != seq - 1 or interval <= 0:
+            return 0
+        return float(self._timestamps[slot] + interval)
+
+    def wait_for_frame(self, after_seq=0, timeout=None, poll_interval=0.001, copy=True):
+        """
+        Wait until a frame newer than `after_seq` is committed: sleep until the next frame
+        is due, then poll until it is.
+
+        Args:
+            after_seq (int, optional): Sequence number of the last frame seen by the caller (default 0).
+            timeout (float, optional): Maximum time to wait in seconds, None waits forever.
+            poll_interval (float, optional): Delay between two polls of a frame that is due in seconds (default 0.001).
+            copy (bool, optional): Copy the pixels out of shared memory (default True).
+
+        Returns:
+            Frame: The latest frame, or None if no newer frame was committed before the timeout.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            frame = self.read_latest(after_seq, copy=copy)
+            if frame is not None:
+                return frame
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                return None
+            delay = max(self.get_next_frame_time() - now, poll_interval)
+            if deadline is not None:
+                delay = min(delay, deadline - now)
+            time.sleep(delay)
+
+    # **************************************************
+    # * Lifecycle Methods
+    # **************************************************
+
+    def close(self):
+        """
+        Unmap the shared memory segment from this process.
+        """
+        self._header = self._slot_header = self._timestamps = self._frames = None
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Destroy the shared memory segment. Only the writer should call this.
+        """
+        self._shm.unlink()
@@ -0,0 +1,158 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from bot import BotState
+
+
+class HeadlessRunner:
+    """
+    Runs a capture backend and a bot without any window, for servers and containers.
+
+    The main thread blocks on the capture condition and hands each new frame to the bot
+    once; nothing runs between frames. The run ends on SIGINT/SIGTERM, on a `stop` command
+    sent to the optional control socket, or when the capture stops (e.g. at the end of a
+    replay). Nothing here imports HighGUI, so the runner works with
+    `opencv-python-headless`.
+
+    The control socket accepts one command per line and answers with one line:
+        stop: Stop the run, answers 'ok'.
+        status: Answers a JSON object with the bot state and the latest frame.
+
+    Attributes:
+        screencap (ScreenCaptureBase): The capture backend, started by the caller.
+        bot (Bot): The bot, started by the caller.
+        control (str): Local TCP port or Unix socket path of the control socket, None to disable it.
+        stopped (threading.Event): Set when the run must end.
+        frame (Frame): Latest frame handed to the bot.
+    """
+
+    def __init__(self, screencap, bot, control=None):
+        """
+        Initialize the runner.
+
+        Args:
+            screencap (ScreenCaptureBase): The capture backend, started by the caller.
+            bot (Bot): The bot, started by the caller.
+            control (str, optional): Local TCP port or Unix socket path of the control socket (default: no socket).
+        """
+        self.screencap = screencap
+        self.bot = bot
+        self.control = control
+        self.stopped = threading.Event()
+        self.frame = None
+        self._server = None
+
+    def run(self):
+        """
+        Hand the new frames to the bot until the run is stopped. Must be called from the main thread
+        for the signal handlers.
+        """
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._on_signal)
+        if self.control is not None:
+            self._start_control_server()
+
+        try:
+            last_seq = 0  # Sequence number of the last frame handed to the bot
+            while not self.stopped.is_set():
+                # The timeout only bounds how long a stop request waits
+                frame = self.screencap.wait_for_frame(last_seq, timeout=0.5)
+                if frame is None:
+                    if self.screencap.stopped:
+                        print('Capture stopped, stopping the headless run.')
+                        break
+                    continue
+                last_seq = frame.seq
+                self.frame = frame
+                self.bot.update_frame(frame)
+        finally:
+            self._stop_control_server()
+
+    def stop(self):
+        """
+        Ask the run to end, from any thread.
+        """
+        self.stopped.set()
+
+    def get_status(self):
+        """
+        Get the status reported by the control socket.
+
+        Returns:
+            dict: The bot state, whether it is stopped, and the sequence number and clock timestamp of the latest frame.
+        """
+        frame = self.frame
+        return {
+            'state': BotState.get_name(self.bot.state),
+            'stopped': self.bot.stopped,
+            'frame_seq': frame.seq if frame is not None else None,
+            'frame_timestamp': frame.timestamp if frame is not None else None,
+        }
+
+    def _on_signal(self, signum, stack_frame):
+        """
+        Helper function to stop the run on SIGINT/SIGTERM.
+        """
+        print(f'Received signal {signum}, stopping the headless run.')
+        self.stop()
+
+    # **************************************************
+    # * Control Socket
+    # **************************************************
+
+    def handle_command(self, command):
+        """
+        Run a command of the control socket.
+
+        Args:
+            command (str): 'stop' or 'status'.
+
+        Returns:
+            str: The answer.
+        """
+        if command == 'stop':
+            self.stop()
+            return 'ok'
+        if command == 'status':
+            return json.dumps(self.get_status())
+        return f'error: unknown command {command!r}'
+
+    def _start_control_server(self):
+        """
+        Helper function to serve the control socket from a background thread.
+        """
+        runner = self
+
+        class ControlHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    answer = runner.handle_command(line.decode('utf-8', 'replace').strip())
+                    self.wfile.write(answer.encode('utf-8') + b'\n')
+
+        if str(self.control).isdigit():
+            server_class = type('ControlServer', (socketserver.ThreadingMixIn, socketserver.TCPServer), {'daemon_threads': True, 'allow_reuse_address': True})
+            self._server = server_class(('127.0.0.1', int(self.control)), ControlHandler)
+        elif hasattr(socket, 'AF_UNIX'):
+            if os.path.exists(self.control):
+                os.remove(self.control)  # Left over by a previous run
+            server_class = type('ControlServer', (socketserver.ThreadingMixIn, socketserver.UnixStreamServer), {'daemon_threads': True})
+            self._server = server_class(self.control, ControlHandler)
+        else:
+            raise ValueError('Unix sockets are not supported on this platform, use a port for the control socket')
+        threading.Thread(target=self._server.serve_forever, name='ControlServer', daemon=True).start()
+        print(f'Control socket listening on {self.control}')
+
+    def _stop_control_server(self):
+        """
+        Helper function to close the control socket.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if not str(self.control).isdigit() and os.path.exists(self.control):
+            os.remove(self.control)
+        self._server = None
@@ -0,0 +1,318 @@
+import queue
+import threading
+from concurrent.futures import Future
+from clock import get_clock
+from tracing import get_tracer
+from profiling import profiled_target
+
+
+class PyAutoGUIInputBackend:
+    """
+    Input backend sending real mouse events through pyautogui.
+
+    pyautogui sleeps `pyautogui.PAUSE` seconds (0.1 by default) after every call, which
+    adds up quickly over a click sequence. The backend sets it to `pause` instead, the
+    delays a sequence really needs being given explicitly to the action queue.
+    """
+
+    def __init__(self, pause=0.0):
+        """
+        Initialize the backend.
+
+        Args:
+            pause (float, optional): Value of `pyautogui.PAUSE`, the delay after every event (default 0.0).
+        """
+        import pyautogui  # Imported here so headless runs with another backend do not need a display
+        self.pyautogui = pyautogui
+        self.pyautogui.PAUSE = pause
+
+    def move_to(self, x, y):
+        """
+        Move the mouse to a screen position.
+
+        Args:
+            x (int): X-coordinate on the screen.
+            y (int): Y-coordinate on the screen.
+        """
+        self.pyautogui.moveTo(x=x, y=y)
+
+    def click(self, x, y):
+        """
+        Click at a screen position.
+
+        Args:
+            x (int): X-coordinate on the screen.
+            y (int): Y-coordinate on the screen.
+        """
+        self.pyautogui.click(x=x, y=y)
+
+
+class RecordingInputBackend:
+    """
+    Input backend recording the mouse events instead of sending them, so bots can run
+    and be benchmarked without a display.
+
+    Listeners are called with `(kind, x, y)` for every event, which lets a simulated
+    screen react to the clicks.
+
+    Attributes:
+        events (list): Recorded events as (clock time, kind, x, y), kind being 'move' or 'click'.
+        position (tuple): Current simulated mouse position.
+        listeners (list): Functions called with (kind, x, y) for every event.
+    """
+
+    def __init__(self, max_events=10000, clock=None):
+        """
+        Initialize the backend.
+
+        Args:
+            max_events (int, optional): Maximum number of kept events, the oldest are dropped first (default 10000).
+            clock (object, optional): Clock timestamping the events (default: the default clock).
+        """
+        self.max_events = max_events
+        self.clock = clock or get_clock()
+        self.events = []
+        self.position = (0, 0)
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def _record(self, kind, x, y):
+        """
+        Helper function to record an event and notify the listeners.
+        """
+        with self._lock:
+            self.events.append((self.clock.time(), kind, x, y))
+            if len(self.events) > self.max_events:
+                del self.events[:len(self.events) - self.max_events]
+            self.position = (x, y)
+        for listener in self.listeners:
+            listener(kind, x, y)
+
+    def move_to(self, x, y):
+        """
+        Record a mouse move.
+        """
+        self._record('move', x, y)
+
+    def click(self, x, y):
+        """
+        Record a click.
+        """
+        self._record('click', x, y)
+
+    def get_clicks(self):
+        """
+        Get the recorded clicks.
+
+        Returns:
+            list: The (x, y) positions of the recorded clicks, oldest first.
+        """
+        with self._lock:
+            return [(x, y) for _, kind, x, y in self.events if kind == 'click']
+
+    def clear(self):
+        """
+        Forget the recorded events.
+        """
+        with self._lock:
+            self.events.clear()
+
+
+INPUT_BACKENDS = {
+    'pyautogui': PyAutoGUIInputBackend,
+    'recording': RecordingInputBackend,
+}
+
+
+class ActionQueue:
+    """
+    A dedicated thread running click sequences on an input backend.
+
+    Sequences are queued as lists of actions and run back to back in order, so a bot can
+    queue a whole buy sequence at once and only wait for it when it needs to. Each queued
+    sequence returns a Future resolved with the clock time taken after its last event.
+
+    Actions are tuples:
+        ('move', x, y): Move the mouse.
+        ('click', x, y): Click at a position.
+        ('sleep', seconds): Pause the sequence.
+
+    Attributes:
+        backend (object): The input backend receiving the events.
+        event_delay (float): Minimal delay in seconds between two events of a sequence.
+        clock (RealClock or SimulatedClock): Clock used for the delays and completion times.
+        tracer (Tracer): Tracer receiving a span per sequence, None when tracing is disabled.
+    """
+
+    def __init__(self, backend, event_delay=0.0, clock=None):
+        """
+        Initialize the queue and start its thread.
+
+        Args:
+            backend (object): The input backend, e.g. `PyAutoGUIInputBackend` or `RecordingInputBackend`.
+            event_delay (float, optional): Minimal delay in seconds between two events (default 0.0).
+            clock (object, optional): Clock used for the delays and completion times (default: the default clock).
+        """
+        self.backend = backend
+        self.event_delay = event_delay
+        self.clock = clock or get_clock()
+        self.tracer = get_tracer()
+        self._stopped = False
+        self._stop_lock = threading.Lock()  # Orders the submissions with the stop sentinel
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=profiled_target(self.run, 'ActionQueue'), name='ActionQueue', daemon=True)
+        self._thread.start()
+
+    def submit(self, actions):
+        """
+        Queue a sequence of actions.
+
+        Args:
+            actions (list): The actions of the sequence.
+
+        Returns:
+            Future: Resolved with the completion time of the sequence, or with the exception it raised, cancelled if the queue is stopped.
+        """
+        future = Future()
+        with self._stop_lock:
+            if self._stopped:
+                future.cancel()
+            else:
+                self._queue.put((list(actions), future))
+        return future
+
+    def click(self, point, delay=0.100):
+        """
+        Queue a move to a point followed by a click.
+
+        Args:
+            point (tuple): The (x, y) screen position.
+            delay (float, optional): Time to wait between the move and the click (default 0.100 seconds).
+
+        Returns:
+            Future: Resolved with the completion time of the click.
+        """
+        return self.submit(click_actions([point], delay))
+
+    def run(self):
+        """
+        The main loop of the action thread.
+        """
+        while True:
+            actions, future = self._queue.get()
+            if actions is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = self.clock.time()
+            try:
+                self._run_sequence(actions)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                end = self.clock.time()
+                if self.tracer is not None:
+                    self.tracer.complete('input_sequence', start, end, category='input', args={'actions': len(actions)})
+                future.set_result(end)
+
+    def _run_sequence(self, actions):
+        """
+        Helper function to send the events of a sequence, keeping at least `event_delay`
+        seconds between two events.
+        """
+        last_event_time = None
+        for action in actions:
+            if action[0] == 'sleep':
+                self.clock.sleep(action[1])
+                continue
+
+            if last_event_time is not None and self.event_delay > 0:
+                self.clock.sleep(self.event_delay - (self.clock.time() - last_event_time))
+
+            if action[0] == 'move':
+                self.backend.move_to(action[1], action[2])
+            elif action[0] == 'click':
+                self.backend.click(action[1], action[2])
+            else:
+                raise ValueError(f'Unknown input action: {action[0]}')
+            last_event_time = self.clock.time()
+
+    def stop(self):
+        """
+        Stop the action thread once the queued sequences are done. Sequences submitted
+        afterwards are cancelled, so a bot waiting on them does not block forever.
+        """
+        # No sequence can be queued after the sentinel, so the thread runs all the queued ones
+        with self._stop_lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put((None, None))
+        self._thread.join()
+
+
+def click_actions(points, delay=0.100):
+    """
+    Build the actions of a click sequence.
+
+    Args:
+        points (list): The (x, y) screen positions to click in order.
+        delay (float, optional): Time to wait between each move and its click (default 0.100 seconds).
+
+    Returns:
+        list: The actions.
+    """
+    actions = []
+    for x, y in points:
+        actions.append(('move', x, y))
+        if delay > 0:
+            actions.append(('sleep', delay))
+        actions.append(('click', x, y))
+    return actions
+
+
+# **************************************************
+# * Default Action Queue
+# **************************************************
+
+_default_queue = None  # Queue used by `Bot.click`, created on first use
+_default_queue_lock = threading.Lock()
+
+
+def configure_input(backend='pyautogui', event_delay=0.0, pause=0.0):
+    """
+    Create the default action queue.
+
+    Args:
+        backend (str or object, optional): 'pyautogui', 'recording' or an input backend instance (default 'pyautogui').
+        event_delay (float, optional): Minimal delay in seconds between two events of a sequence (default 0.0).
+        pause (float, optional): Value of `pyautogui.PAUSE` for the pyautogui backend (default 0.0).
+
+    Returns:
+        ActionQueue: The new default queue.
+    """
+    global _default_queue
+    if isinstance(backend, str):
+        if backend not in INPUT_BACKENDS:
+            raise ValueError(f'Unknown input backend: {backend}')
+        backend = PyAutoGUIInputBackend(pause=pause) if backend == 'pyautogui' else INPUT_BACKENDS[backend]()
+
+    action_queue = ActionQueue(backend, event_delay=event_delay)
+    with _default_queue_lock:
+        previous, _default_queue = _default_queue, action_queue
+    if previous is not None:
+        previous.stop()
+    return action_queue
+
+
+def get_action_queue():
+    """
+    Get the default action queue, creating a pyautogui queue on first use.
+
+    Returns:
+        ActionQueue: The default queue.
+    """
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = ActionQueue(PyAutoGUIInputBackend())
+        return _default_queue
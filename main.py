@@ -1,25 +1,70 @@
 import platform
-import time
 import argparse
-import cv2
 from utils import extract_text_from_image, parse_rectangle_string, convert_string_to_boolean
-import pytesseract
-import pyautogui
+from ocr_engine import configure_ocr
+from ocr_cache import configure_ocr_cache
+from input_backend import configure_input, INPUT_BACKENDS
+from clock import RealClock, SimulatedClock, set_clock
+from metrics import get_registry
+from tracing import configure_tracing
+from profiling import configure_profiling, PROFILE_MODES
 import importlib
 import sys
+import signal
 
 # Setup argument parser
 parser = argparse.ArgumentParser(description="A bot that captures screenshots from a window or specific screen area and triggers actions based on the visual input.")
 parser.add_argument("--window_name", help="Specify the name of the window to capture. Leave blank to capture the entire screen.")
 parser.add_argument("--window_rect", type=str, help="Specify the rectangle to capture as 'x,y,width,height'.", default="")
 parser.add_argument("--debug", type=str, help="Enable or disable debug mode. Use 'true' or 'false'.", default="true")
+parser.add_argument("--control", help="Headless mode (--debug false): accept 'stop' and 'status' commands on this local TCP port or Unix socket path.")
+parser.add_argument("--stream_port", type=int, help="Stream the annotated bot view as MJPEG on http://<stream_host>:<port>/, e.g. to watch a headless bot.")
+parser.add_argument("--stream_host", help="Address the MJPEG stream listens on. Use '0.0.0.0' to watch from the LAN.", default="127.0.0.1")
+parser.add_argument("--stream_fps", type=float, help="Maximum frame rate of the MJPEG stream.", default=10)
+parser.add_argument("--stream_quality", type=int, help="JPEG quality of the MJPEG stream, from 0 to 100.", default=80)
+parser.add_argument("--viewer_fps", type=float, help="Maximum refresh rate of the debug viewer, independent of the capture rate. Use 0 to show every frame.", default=15)
+parser.add_argument("--viewer_scale", type=float, help="Scale of the debug viewer image, e.g. 0.5 to display a 4K capture at half size.", default=1.0)
 parser.add_argument("--bot", help="Specify the name of the bot to use. Leave blank to use the default bot.")
+parser.add_argument("--script", help="Run a JSON/YAML bot script (see scripts/) instead of a bot module.")
+parser.add_argument("--replay", help="Replay a directory of PNG images, a .npy stack or a video file instead of capturing the screen.")
+parser.add_argument("--replay_fps", type=float, help="Playback rate of the replayed frames. Use 0 to replay as fast as possible.", default=20)
+parser.add_argument("--replay_loop", type=str, help="Restart the replay when all frames are played. Use 'true' or 'false'.", default="true")
+parser.add_argument("--ocr_engine", help="OCR engine to use: 'tesserocr', 'subprocess' or 'auto' to use tesserocr when installed.", default="auto")
+parser.add_argument("--ocr_workers", type=int, help="Number of OCR engines in the pool, i.e. how many reads can run in parallel. Only tesserocr engines are kept warm.", default=1)
+parser.add_argument("--ocr_cache_size", type=int, help="Number of OCR results cached by crop hash. Use 0 to disable the cache.", default=1024)
+parser.add_argument("--ocr_cache_mode", help="OCR cache key: 'exact' pixels or 'quantized' pixels tolerant to capture noise.", default="exact")
+parser.add_argument("--ocr_cache_file", help="File used to persist the OCR cache between runs.")
+parser.add_argument("--digit_glyphs", help="Glyph set created by 'python digit_recognizer.py calibrate' used to read integer fields without OCR.")
+parser.add_argument("--input", choices=sorted(INPUT_BACKENDS), help="Input backend: 'pyautogui' sends real clicks, 'recording' only records them (headless runs).", default="pyautogui")
+parser.add_argument("--input_delay", type=float, help="Minimal delay in seconds between two mouse events of a click sequence.", default=0.0)
+parser.add_argument("--input_pause", type=float, help="Delay in seconds pyautogui adds after every mouse event (pyautogui.PAUSE).", default=0.0)
+parser.add_argument("--clock", choices=["real", "simulated"], help="Clock used for waits and timestamps: 'simulated' skips the waits instantly (use with --replay and --input recording).", default="real")
+parser.add_argument("--metrics_port", type=int, help="Serve the bot metrics on http://127.0.0.1:<port>/metrics (Prometheus text) and /metrics.json.")
+parser.add_argument("--metrics_file", help="Write a JSON snapshot of the bot metrics to this file periodically.")
+parser.add_argument("--metrics_interval", type=float, help="Seconds between two metrics snapshots written to --metrics_file.", default=10.0)
+parser.add_argument("--trace_file", help="Record the capture, read and click spans of each decision and write them as a Chrome trace (chrome://tracing, Perfetto) on exit.")
+parser.add_argument("--profile", nargs="?", const="both", choices=PROFILE_MODES, help="Profile the capture, bot, input and viewer threads with cProfile, stack sampling or both (default). Profiles are written on exit and on SIGUSR1.")
+parser.add_argument("--profile_dir", help="Directory receiving the per-thread and merged profiles.", default="profiles")
+parser.add_argument("--profile_interval", type=float, help="Seconds between two stack samples of the sampling profiler.", default=0.005)
+parser.add_argument("--shared_memory", help="Name of the shared memory ring buffer to read frames from (or to write frames to with share_capture).")
+parser.add_argument("--shared_memory_views", type=str, help="Read the shared memory frames as zero-copy views instead of copies. Use 'true' or 'false'.", default="false")
 subparsers = parser.add_subparsers(dest="command", help="Available commands")
 subparsers.add_parser("list_window_names", help="List the names of all currently active windows.")
+share_capture_parser = subparsers.add_parser("share_capture", help="Capture frames into the --shared_memory ring buffer for bots running in other processes.")
+share_capture_parser.add_argument("--slots", type=int, help="Number of frames kept in the shared memory ring buffer.", default=4)
 args = parser.parse_args()
 
 # Dynamically import the specified bot module
-if args.bot is None:
+if args.script is not None:
+    from functools import partial
+    from bot_script import ScriptedBot, BotScriptError, compile_script
+    try:
+        script = compile_script(args.script)
+    except (OSError, ValueError, BotScriptError) as e:
+        print(f"Error: Could not load the bot script '{args.script}': {e}")
+        sys.exit(1)  # Exit if the script is invalid
+    Bot = partial(ScriptedBot, script)
+elif args.bot is None:
     from bot import Bot
 else:
     try:
@@ -34,10 +79,42 @@ else:
 
 # Import platform-specific screen capturing modules
 if platform.system() == "Windows":
-    from screencapture_windows import ScreenCapture
+    import pytesseract
     pytesseract.pytesseract.tesseract_cmd = 'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
+
+if args.shared_memory is not None and args.command != "share_capture":
+    from screencapture_shared import ScreenCapture
+elif args.replay is not None:
+    from screencapture_replay import ScreenCapture
+elif platform.system() == "Windows":
+    from screencapture_windows import ScreenCapture
 elif platform.system() == "Darwin":
     from screencapture_macos import ScreenCapture
+else:
+    print(f"Error: Screen capture is not supported on {platform.system()}, use --replay to replay recorded frames.")
+    sys.exit(1)  # Exit if no capture backend is available
+
+# Select the clock before creating the capture, input and bot objects that pick it up
+set_clock(SimulatedClock() if args.clock == "simulated" else RealClock())
+tracer = configure_tracing() if args.trace_file is not None else None
+profiler = None
+if args.profile is not None:
+    # Configured before the capture, input and bot threads start so they all get profiled
+    profiler = configure_profiling(mode=args.profile, interval=args.profile_interval, directory=args.profile_dir)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.dump())
+
+# Pre-warm the OCR engines before the first read
+ocr_pool = configure_ocr(size=args.ocr_workers, engine=args.ocr_engine)
+configure_ocr_cache(max_size=args.ocr_cache_size, mode=args.ocr_cache_mode, path=args.ocr_cache_file)
+action_queue = configure_input(backend=args.input, event_delay=args.input_delay, pause=args.input_pause)
+
+# Export the metrics recorded by the capture thread and the bot
+metrics = get_registry()
+if args.metrics_port is not None:
+    metrics.start_http_server(args.metrics_port)
+if args.metrics_file is not None:
+    metrics_stopped = metrics.start_snapshots(args.metrics_file, args.metrics_interval)
 
 # **************************************************
 # * Properties and Constants
@@ -45,48 +122,28 @@ elif platform.system() == "Darwin":
 DEBUG = convert_string_to_boolean(args.debug)  # Enable debug mode for extra logging and visuals
 window_name = args.window_name  # Window name to capture
 window_rect = parse_rectangle_string(args.window_rect)  # Default capture area rectangle (left, top, width, height)
-mouse_pos = (0, 0)  # Current mouse position
-fps = 0  # Frames per second tracking
-frame_count = 0  # Frame count for FPS calculation
-start_time = time.time()  # Initial timestamp for FPS calculation
-drawing = False  # Toggle for drawing a rectangle on mouse events
-start_point = (0, 0)  # Rectangle starting point
-end_point = (0, 0)  # Rectangle ending point
 
 # Initialize the screen capture class and bot
-screencap = ScreenCapture(window_name, window_rect)
+if args.shared_memory is not None and args.command != "share_capture":
+    screencap = ScreenCapture(args.shared_memory, window_rect, copy=not convert_string_to_boolean(args.shared_memory_views))
+elif args.replay is not None:
+    screencap = ScreenCapture(args.replay, window_rect, fps=args.replay_fps, loop=convert_string_to_boolean(args.replay_loop, default=True))
+else:
+    screencap = ScreenCapture(window_name, window_rect)
 bot = Bot()
+if args.digit_glyphs is not None:
+    from digit_recognizer import DigitRecognizer
+    bot.digit_recognizer = DigitRecognizer.load(args.digit_glyphs)
 
-def mouse_callback(event, x, y, flags, param):
+def move_mouse_to(pos):
     """
-    Callback function to handle mouse events for selecting areas in the window.
+    Move the mouse to the screen position of a point of the screenshot, e.g. on a right-click in the viewer.
 
     Args:
-        event (int): Mouse event (click, move, release).
-        x (int): X-coordinate of the mouse.
-        y (int): Y-coordinate of the mouse.
-        flags (int): Event flags.
-        param (object): Additional parameters.
+        pos (tuple): The (x, y) point in the screenshot.
     """
-    global mouse_pos, drawing, start_point, end_point
-    mouse_pos = (x, y)
-    
-    # Handle mouse dragging to update the end point for the rectangle
-    if event == cv2.EVENT_MOUSEMOVE and drawing:
-        end_point = (x, y)
-    elif event == cv2.EVENT_RBUTTONDOWN:
-        # Simulate right-click and move the mouse to the clicked screen position
-        screen_x, screen_y = screencap.get_screen_position(mouse_pos)
-        pyautogui.moveTo(x=screen_x, y=screen_y)
-    elif event == cv2.EVENT_LBUTTONDOWN:
-        # Toggle drawing mode when left mouse button is clicked
-        if drawing:
-            drawing = False
-            capture_content_in_range(start_point, end_point)
-        else:
-            drawing = True
-            start_point = (x, y)
-            end_point = (x, y)
+    screen_x, screen_y = screencap.get_screen_position(pos)
+    action_queue.submit([('move', screen_x, screen_y)])
 
 def capture_content_in_range(start, end):
     """
@@ -106,81 +163,75 @@ def capture_content_in_range(start, end):
     print('------------------------- End -------------------------')
     return content
 
-def draw_detected_rectangles(image, rectangles):
-    """
-    Draw rectangles on the image based on the detected regions.
-
-    Args:
-        image (numpy.ndarray): The image where the rectangles will be drawn.
-        rectangles (list): List of detected rectangles [(x, y, width, height)].
-    
-    Returns:
-        numpy.ndarray: The image with drawn rectangles.
-    """
-    line_color = (0, 255, 0)  # Green color for the rectangle (BGR format)
-    line_type = cv2.LINE_4
-
-    for (x, y, w, h) in rectangles:
-        top_left = (x, y)
-        bottom_right = (x + w, y + h)
-        cv2.rectangle(image, top_left, bottom_right, line_color, lineType=line_type)
-    
-    return image
-
 # **************************************************
 # * Main Application Loop
 # **************************************************
 
 if args.command == "list_window_names":
     screencap.list_window_names()
+elif args.command == "share_capture":
+    from screencapture_shared import share_capture
+    share_capture(screencap, args.shared_memory, slots=args.slots)
 else:
     screencap.start()
+    bot.set_frame_source(screencap)
     bot.start()
 
-    while True:
-        if screencap.screenshot is None:
-            continue
-
-        bot.update_screenshot(screencap.screenshot)
-
-        if DEBUG:
-            # Calculate and display FPS
-            frame_count += 1
-            elapsed_time = time.time() - start_time
-            if elapsed_time > 1.0:
-                fps = frame_count / elapsed_time
-                frame_count = 0
-                start_time = time.time()
-
-            # Display the screenshot with overlay information
-            debug_window_name = f'{window_name} - Viewer'
-            display_image = screencap.screenshot.copy()
-
-            # Display mouse position and FPS on the image
-            global_x, global_y = screencap.get_screen_position(mouse_pos)
-            cv2.putText(display_image, f"FPS: {fps:.2f} x: {mouse_pos[0]}({global_x}) y: {mouse_pos[1]}({global_y})",
-                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 100, 100), 2)
-
-            # Draw the rectangle if in drawing mode
-            if drawing:
-                cv2.rectangle(display_image, start_point, end_point, (100, 100, 100), 1)
-                start_x, start_y = screencap.get_screen_position(start_point)
-                cv2.putText(display_image, f"{start_x}, {start_y}", start_point, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100, 100, 100), 2)
-                end_x, end_y = screencap.get_screen_position(end_point)
-                cv2.putText(display_image, f"{end_x}, {end_y}", end_point, cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100, 100, 100), 2)
-
-            # Draw detected rectangles if available
-            if bot.rectangles is not None:
-                draw_detected_rectangles(display_image, bot.rectangles)
-
-            # Show the window with the updated image
-            cv2.imshow(debug_window_name, display_image)
-            cv2.setMouseCallback(debug_window_name, mouse_callback)
-
-        # Press 'q' to quit the application
-        key = cv2.waitKey(50)
-        if key == ord('q'):
-            screencap.stop()
-            bot.stop()
-            cv2.destroyAllWindows()
-            break
\ No newline at end of file
+    stream = None
+    if args.stream_port is not None:
+        from mjpeg_server import MJPEGServer
+        stream = MJPEGServer(screencap, bot, port=args.stream_port, host=args.stream_host, fps=args.stream_fps,
+                             quality=args.stream_quality, on_select=capture_content_in_range)
+        stream.start()
+
+    if profiler is not None:
+        profiler.profile_current_thread("Viewer" if DEBUG else "Main")
+
+    if DEBUG:
+        # cv2 is loaded by the bot in every mode, but only the viewer opens windows: headless runs
+        # call no HighGUI function, so they also work with opencv-python-headless
+        import cv2
+        from debug_viewer import DebugViewer
+        viewer = DebugViewer(f'{window_name} - Viewer', screencap.get_screen_position, fps=args.viewer_fps, scale=args.viewer_scale,
+                             on_select=capture_content_in_range, on_right_click=move_mouse_to)
+        frame_timeout = 1.0 / args.viewer_fps if args.viewer_fps > 0 else 0.5  # Keep the window responsive when the capture is slower
+
+        last_seq = 0  # Sequence number of the last frame handed to the bot
+        while True:
+            # Block until a new frame is published instead of spinning on the screenshot
+            frame = screencap.wait_for_frame(last_seq, timeout=frame_timeout) or screencap.frame
+            if frame is None:
+                continue
+
+            if frame.seq != last_seq:
+                last_seq = frame.seq
+                bot.update_frame(frame)
+
+            # Display the screenshot with overlay information, at most at the viewer rate
+            viewer.show(frame, bot.rectangles)
+
+            # Press 'q' to quit the application
+            key = cv2.waitKey(1)
+            if key == ord('q'):
+                cv2.destroyAllWindows()
+                break
+    else:
+        # Hand new frames to the bot until a signal or a 'stop' command on the control socket
+        from headless_runner import HeadlessRunner
+        HeadlessRunner(screencap, bot, control=args.control).run()
+
+    if stream is not None:
+        stream.stop()
+    screencap.stop()
+    bot.stop()
+    if args.metrics_file is not None:
+        metrics_stopped.set()
+        metrics.save_snapshot(args.metrics_file)  # Keep the final values
+    if tracer is not None:
+        tracer.save(args.trace_file)
+    if profiler is not None:
+        profiler.stop()
+
+# Let the queued clicks finish and release the OCR engines
+action_queue.stop()
+ocr_pool.close()
@@ -0,0 +1,446 @@
+import argparse
+import importlib
+import json
+import random
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from screencapture_base import ScreenCaptureBase
+from clock import RealClock, SimulatedClock, set_clock
+from input_backend import configure_input
+from tracing import configure_tracing
+
+# Market screens of the pww_bot_* modules. Coordinates are the ones the bots click and read:
+# - refresh: buttons showing a new listing in the field area
+# - clear: buttons closing the listing
+# - buy: the button completing a purchase
+# - buttons: every button drawn on the screen with its label
+PROFILES = {
+    'pww_bot_book': {
+        'field': 'price',
+        'area': [(274, 653), (396, 684)],
+        'target': (25000, 65000),
+        'refresh': [(281, 792)],
+        'clear': [(501, 190)],
+        'buy': [(281, 850)],
+        'buttons': {(161, 389): 'SELECT', (281, 792): 'VIEW', (501, 190): 'X', (281, 850): 'BUY'},
+    },
+    'pww_bot_equipment': {
+        'field': 'price',
+        'area': [(139, 393), (273, 421)],
+        'target': (5000, 12000),
+        'refresh': [(284, 583)],
+        'clear': [],
+        'buy': [(396, 612)],
+        'buttons': {(51, 316): 'FILTER', (284, 583): 'OK', (161, 389): 'SELECT', (281, 813): 'BUY',
+                    (285, 663): 'CONFIRM', (396, 612): 'CONFIRM'},
+    },
+    'pww_bot_multi_books': {
+        'field': 'price',
+        'area': [(139, 393), (273, 421)],
+        'target': (25000, 40000),
+        'refresh': [(161, 387), (161, 468), (161, 544), (161, 622), (419, 387), (419, 468), (419, 544), (419, 622)],
+        'clear': [(82, 265)],
+        'buy': [(281, 827)],
+        'buttons': {(82, 265): 'BACK', (281, 792): 'VIEW', (281, 827): 'BUY', (161, 468): 'ITEM', (161, 544): 'ITEM',
+                    (161, 622): 'ITEM', (419, 387): 'ITEM', (419, 468): 'ITEM', (419, 544): 'ITEM', (419, 622): 'ITEM'},
+    },
+    'pww_bot_equipment_lookup': {
+        'field': 'stats',
+        'area': [(29, 634), (319, 927)],
+        'target': ('+56.86', 2),
+        'refresh': [(68, 387), (68, 468), (68, 544), (68, 622), (326, 387), (326, 468), (326, 544), (326, 622)],
+        'clear': [(459, 811)],
+        'buy': [],
+        'buttons': {(68, 387): 'ITEM', (68, 468): 'ITEM', (68, 544): 'ITEM', (68, 622): 'ITEM', (326, 387): 'ITEM',
+                    (326, 468): 'ITEM', (326, 544): 'ITEM', (326, 622): 'ITEM', (459, 811): 'CLOSE', (357, 723): 'NEXT'},
+    },
+}
+
+STAT_NAMES = ('ATK', 'DEF', 'HP', 'CRIT', 'SPD', 'HIT', 'EVA', 'RES')
+STAT_VALUES = ('+56.86', '+20%', '+12.40', '+8%', '+33.10', '+5%')
+
+
+class MarketSimulator(ScreenCaptureBase):
+    """
+    A synthetic market screen acting both as capture backend and as input sink, so the
+    pww_bot_* modules can run end to end without the game.
+
+    The screen is rendered with `cv2.putText` at the coordinates the bots use. Clicks
+    received from a `RecordingInputBackend` change the screen after a random UI latency:
+    refresh buttons show a new listing with a random price (or stat block), clear buttons
+    close it. A listing matches the bot's target with probability `hit_rate`, and the
+    delay between a matching listing appearing and the buy click is recorded as hit latency.
+
+    Attributes:
+        profile (dict): Layout of the simulated market, one of `PROFILES`.
+        latency (tuple): Minimum and maximum UI latency in seconds.
+        hit_rate (float): Probability of a listing matching the target.
+        listings (int): Number of listings shown.
+        matches (int): Number of matching listings shown.
+        buys (int): Number of buy clicks.
+        hit_latencies (list): Seconds between a matching listing appearing and its buy click.
+    """
+
+    BACKGROUND = (40, 32, 28)  # BGR color of the screen background
+    TEXT_COLOR = (235, 235, 235)  # BGR color of the field text
+    BUTTON_COLOR = (90, 70, 60)  # BGR color of the buttons
+
+    def __init__(self, profile, size=(560, 1060), latency=(0.050, 0.300), hit_rate=0.05, fps=20, seed=None):
+        """
+        Initialize the simulator.
+
+        Args:
+            profile (str or dict): Name of a profile of `PROFILES` or a profile definition.
+            size (tuple, optional): Width and height of the screen (default (560, 1060)).
+            latency (tuple, optional): Minimum and maximum UI latency in seconds (default (0.050, 0.300)).
+            hit_rate (float, optional): Probability of a listing matching the target (default 0.05).
+            fps (float, optional): Rate of the published frames (default 20).
+            seed (int, optional): Seed of the random listings and latencies.
+        """
+        super().__init__()
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.w, self.h = size
+        self.latency = latency
+        self.hit_rate = hit_rate
+        self.capture_interval = 1 / fps if fps else 0
+        self.random = random.Random(seed)
+
+        self.listings = 0
+        self.matches = 0
+        self.buys = 0
+        self.hit_latencies = []
+
+        self._refresh = {tuple(point) for point in self.profile['refresh']}
+        self._clear = {tuple(point) for point in self.profile['clear']}
+        self._buy = {tuple(point) for point in self.profile['buy']}
+        self._pending = []  # Screen changes waiting for their UI latency, as (apply time, listing)
+        self._listing = None  # Displayed listing as (text, matching, time it appeared), None when closed
+        self._state_lock = threading.Lock()
+        self._base = self._render_base()
+        self._image = None
+
+    # **************************************************
+    # * Input Sink
+    # **************************************************
+
+    def attach(self, backend):
+        """
+        Receive the clicks of an input backend.
+
+        Args:
+            backend (RecordingInputBackend): The backend whose events drive the simulator.
+        """
+        backend.listeners.append(self.on_input)
+
+    def on_input(self, kind, x, y):
+        """
+        React to an input event.
+
+        Args:
+            kind (str): 'move' or 'click'.
+            x (int): X-coordinate on the screen.
+            y (int): Y-coordinate on the screen.
+        """
+        if kind != 'click':
+            return
+        x, y = x - self.offset_x, y - self.offset_y
+        now = self.clock.time()
+        apply_time = now + self.random.uniform(*self.latency)
+        with self._state_lock:
+            if (x, y) in self._refresh:
+                self._pending.append((apply_time, self._new_listing()))
+            elif (x, y) in self._clear:
+                self._pending.append((apply_time, None))
+            elif (x, y) in self._buy:
+                self.buys += 1
+                if self._listing is not None and self._listing[1]:
+                    self.hit_latencies.append(now - self._listing[2])
+                    self._listing = (self._listing[0], False, self._listing[2])
+
+    def _new_listing(self):
+        """
+        Helper function to draw the text of a random listing.
+
+        Returns:
+            tuple: The text lines and whether the listing matches the target.
+        """
+        matching = self.random.random() < self.hit_rate
+        target = self.profile['target']
+        if self.profile['field'] == 'price':
+            low, high = target
+            if matching:
+                price = self.random.randint(low + 1, high - 1)
+            else:
+                price = self.random.choice([self.random.randint(100, low), self.random.randint(high, high * 3)])
+            return [f'{price:,}'], matching
+
+        text, count = target
+        values = [self.random.choice([v for v in STAT_VALUES if v != text]) for _ in range(len(STAT_NAMES))]
+        if matching:
+            for i in self.random.sample(range(len(values)), count + 1):
+                values[i] = text
+        return [f'{name} {value}' for name, value in zip(STAT_NAMES, values)], matching
+
+    # **************************************************
+    # * Capture Source
+    # **************************************************
+
+    def get_screenshot(self):
+        """
+        Render the current market screen, applying the changes whose UI latency elapsed.
+
+        Returns:
+            ndarray: The screen as a contiguous BGR image.
+        """
+        now = self.clock.time()
+        changed = self._image is None
+        with self._state_lock:
+            while self._pending and self._pending[0][0] <= now:
+                _, listing = self._pending.pop(0)
+                if listing is not None:
+                    self.listings += 1
+                    self.matches += listing[1]
+                    listing = (listing[0], listing[1], now)
+                self._listing = listing
+                changed = True
+            listing = self._listing
+
+        if changed:
+            # Published frames are read-only, render changes into a new image
+            self._image = self._render(listing)
+        return self._image
+
+    def _render_base(self):
+        """
+        Helper function to render the static part of the screen.
+        """
+        image = np.full((self.h, self.w, 3), self.BACKGROUND, dtype=np.uint8)
+        for (x, y), label in self.profile['buttons'].items():
+            cv2.rectangle(image, (x - 40, y - 14), (x + 40, y + 14), self.BUTTON_COLOR, -1)
+            cv2.putText(image, label, (x - 34, y + 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45, self.TEXT_COLOR, 1, cv2.LINE_AA)
+        return image
+
+    def _render(self, listing):
+        """
+        Helper function to render the screen with the displayed listing.
+        """
+        image = self._base.copy()
+        (x1, y1), (x2, y2) = self.profile['area']
+        cv2.rectangle(image, (x1, y1), (x2, y2), self.BACKGROUND, -1)
+        if listing is not None:
+            self.render_field(image, listing[0])
+        return image
+
+    def render_field(self, image, lines):
+        """
+        Draw the text of a listing into the field area.
+
+        Args:
+            image (ndarray): The screen to draw into.
+            lines (list): The text lines of the listing.
+        """
+        (x1, y1), (x2, y2) = self.profile['area']
+        line_height = (y2 - y1) // max(len(lines), 1)
+        scale = min(0.8, line_height / 32)
+        for i, line in enumerate(lines):
+            baseline = y1 + i * line_height + int(line_height * 0.75)
+            cv2.putText(image, line, (x1 + 6, baseline), cv2.FONT_HERSHEY_SIMPLEX, scale, self.TEXT_COLOR, 1, cv2.LINE_AA)
+
+    def calibration_samples(self, count=50):
+        """
+        Render random price fields with their labels, to calibrate a `DigitRecognizer`.
+
+        Args:
+            count (int, optional): Number of samples (default 50).
+
+        Returns:
+            list: (image, label) tuples.
+        """
+        (x1, y1), (x2, y2) = self.profile['area']
+        samples = []
+        for _ in range(count):
+            lines, _ = self._new_listing()
+            image = self._render(None)
+            self.render_field(image, lines)
+            samples.append((image[y1:y2, x1:x2].copy(), lines[0]))
+        return samples
+
+    # **************************************************
+    # * Report
+    # **************************************************
+
+    def get_report(self, elapsed):
+        """
+        Summarize the simulated session.
+
+        Args:
+            elapsed (float): Duration of the session in clock seconds.
+
+        Returns:
+            dict: Listings, matches, buys, cycles per minute and hit latency statistics, or a note when the
+                  profile has no buy button to measure the hit latency with.
+        """
+        with self._state_lock:
+            latencies = np.array(self.hit_latencies)
+            report = {
+                'elapsed': elapsed,
+                'listings': self.listings,
+                'matches': self.matches,
+                'buys': self.buys,
+                'hits': len(latencies),
+                'cycles_per_minute': self.listings / elapsed * 60 if elapsed > 0 else 0.0,
+            }
+        if not self._buy:
+            report['note'] = 'Hit latency is not measured: the bot of this profile does not click a buy button.'
+        elif len(latencies) > 0:
+            report['hit_latency'] = {
+                'mean': float(latencies.mean()),
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'max': float(latencies.max()),
+            }
+        return report
+
+
+# **************************************************
+# * End to End Runner
+# **************************************************
+
+def _timed(function, durations):
+    """
+    Helper function to record the real duration of every call of a function.
+    """
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            durations.append(time.perf_counter() - start)
+    return timed
+
+
+def run_simulation(bot_factory, simulator, duration, action_queue, digit_recognizer=None, timeout=None):
+    """
+    Run a bot against a simulator and report its throughput.
+
+    The simulator, the bot and the action queue must use the same clock.
+
+    Args:
+        bot_factory (callable): Function creating the bot, e.g. a bot module's `Bot` class.
+        simulator (MarketSimulator): The simulated market.
+        duration (float): Duration of the session in clock seconds.
+        action_queue (ActionQueue): Action queue on a `RecordingInputBackend`.
+        digit_recognizer (DigitRecognizer, optional): Recognizer used by the bot for integer fields.
+        timeout (float, optional): Maximum real duration of the session in seconds (default: twice
+                                   `duration` plus 60 seconds). The simulated clock only advances
+                                   while the bot consumes frames, so a stuck bot would never end it.
+
+    Returns:
+        dict: The simulator report, with the real duration and the OCR times in seconds, and an
+              `error` when the bot thread died or the session timed out.
+    """
+    simulator.attach(action_queue.backend)
+    simulator.start()
+    bot = bot_factory()
+    bot.action_queue = action_queue
+    bot.digit_recognizer = digit_recognizer
+    ocr_durations = []
+    bot._read_text = _timed(bot._read_text, ocr_durations)
+    bot._read_integer = _timed(bot._read_integer, ocr_durations)
+    bot.set_frame_source(simulator)
+
+    clock = simulator.clock
+    real_start = time.perf_counter()
+    start = clock.time()
+    deadline = real_start + (timeout if timeout is not None else 2 * duration + 60)
+    error = None
+    bot.start()
+    try:
+        while clock.time() - start < duration:
+            if not bot.thread.is_alive():
+                error = f'The bot thread stopped after {clock.time() - start:.1f} clock seconds, see its traceback above'
+                break
+            if time.perf_counter() >= deadline:
+                error = f'The session did not reach {duration} clock seconds in {deadline - real_start:.0f} real seconds'
+                break
+            time.sleep(0.010)
+    finally:
+        bot.stop()
+        simulator.stop()
+    elapsed = clock.time() - start
+
+    report = simulator.get_report(elapsed)
+    report['real_elapsed'] = time.perf_counter() - real_start
+    if error is not None:
+        report['error'] = error
+    durations = np.array(ocr_durations)
+    report['ocr'] = {'reads': len(durations)}
+    if len(durations) > 0:
+        report['ocr'].update(mean=float(durations.mean()), p95=float(np.percentile(durations, 95)), max=float(durations.max()))
+    return report
+
+
+def main():
+    """
+    Run a bot module or bot script end to end against the simulator and print the report as JSON.
+
+    Returns:
+        int: 1 if the bot thread died or the session timed out, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Run a bot against a synthetic market screen and report its throughput.")
+    parser.add_argument("profile", choices=sorted(PROFILES), help="Market screen to simulate.")
+    parser.add_argument("--bot", help="Bot module to run (default: the module named like the profile).")
+    parser.add_argument("--script", help="Run a JSON/YAML bot script instead of a bot module.")
+    parser.add_argument("--duration", type=float, help="Duration of the session in clock seconds.", default=600)
+    parser.add_argument("--clock", choices=["real", "simulated"], help="Clock of the session: 'simulated' runs the session as fast as the bot processes the frames.", default="real")
+    parser.add_argument("--latency", type=str, help="Minimum and maximum UI latency in seconds as 'min,max'.", default="0.05,0.3")
+    parser.add_argument("--hit_rate", type=float, help="Probability of a listing matching the target.", default=0.05)
+    parser.add_argument("--fps", type=float, help="Rate of the simulated frames.", default=20)
+    parser.add_argument("--seed", type=int, help="Seed of the random listings and latencies.")
+    parser.add_argument("--digit_glyphs", help="Glyph set used to read prices. Use 'calibrate' to calibrate one on simulated prices.")
+    parser.add_argument("--output", help="Write the report to this JSON file.")
+    parser.add_argument("--trace", help="Write the spans of the session to this Chrome trace file.")
+    parser.add_argument("--timeout", type=float, help="Maximum real duration of the session in seconds (default: twice the duration plus 60).")
+    args = parser.parse_args()
+
+    set_clock(SimulatedClock() if args.clock == "simulated" else RealClock())
+    tracer = configure_tracing() if args.trace is not None else None
+    action_queue = configure_input(backend='recording')
+    simulator = MarketSimulator(args.profile, latency=tuple(float(v) for v in args.latency.split(',')),
+                                hit_rate=args.hit_rate, fps=args.fps, seed=args.seed)
+
+    if args.script is not None:
+        from functools import partial
+        from bot_script import ScriptedBot
+        bot_factory = partial(ScriptedBot, args.script)
+    else:
+        bot_factory = importlib.import_module(args.bot or args.profile).Bot
+
+    digit_recognizer = None
+    if args.digit_glyphs == 'calibrate':
+        from digit_recognizer import DigitRecognizer
+        digit_recognizer = DigitRecognizer.calibrate(simulator.calibration_samples())
+    elif args.digit_glyphs is not None:
+        from digit_recognizer import DigitRecognizer
+        digit_recognizer = DigitRecognizer.load(args.digit_glyphs)
+
+    report = run_simulation(bot_factory, simulator, args.duration, action_queue, digit_recognizer, timeout=args.timeout)
+    action_queue.stop()
+    if tracer is not None:
+        tracer.save(args.trace)
+
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if 'error' in report:
+        print(f'Error: {report["error"]}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,371 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default histogram buckets in seconds, from a cached read to a slow trading state
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """
+    A value that only goes up, e.g. a number of clicks.
+    """
+
+    kind = 'counter'
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """
+        Increase the counter.
+
+        Args:
+            amount (float, optional): The increment (default 1).
+        """
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """
+    A value that goes up and down, e.g. the current state of the bot.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        """
+        Set the gauge.
+
+        Args:
+            value (float): The new value.
+        """
+        self.value = value
+
+    def inc(self, amount=1):
+        """
+        Increase the gauge.
+
+        Args:
+            amount (float, optional): The increment (default 1).
+        """
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        """
+        Decrease the gauge.
+
+        Args:
+            amount (float, optional): The decrement (default 1).
+        """
+        self.inc(-amount)
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """
+    A distribution of observed values over fixed buckets, e.g. OCR latencies.
+
+    Observing a value only increments a bucket count, so the cost does not depend on the
+    number of observations.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets, in increasing order.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last count holds the values above every bound
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """
+        Record a value.
+
+        Args:
+            value (float): The observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self, clock=None):
+        """
+        Measure the duration of a `with` block.
+
+        Args:
+            clock (object, optional): Clock giving the time (default: `time.perf_counter`).
+
+        Returns:
+            _Timer: A context manager observing the duration of the block.
+        """
+        return _Timer(self, clock.time if clock is not None else time.perf_counter)
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = []
+            total = 0
+            for count in self.counts[:-1]:
+                total += count
+                cumulative.append(total)
+            return {'buckets': dict(zip(self.buckets, cumulative)), 'count': self.count, 'sum': self.sum}
+
+
+class _Timer:
+    """
+    Helper context manager observing the duration of a block in a histogram.
+    """
+
+    def __init__(self, histogram, now):
+        self.histogram = histogram
+        self.now = now
+
+    def __enter__(self):
+        self.start = self.now()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(self.now() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    A set of named metrics with optional labels, exported in the Prometheus text format
+    and as JSON snapshots.
+
+    Metrics are created on first use and the same object is returned afterwards, so hot
+    paths can look a metric up once and keep it.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # (name, labels) -> metric
+        self._help = {}  # name -> (kind, help)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        """
+        Helper function to get or create a metric.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                kind = self._help.setdefault(name, (cls.kind, help))[0]
+                if kind != cls.kind:
+                    raise ValueError(f'Metric {name} is already registered as a {kind}')
+                metric = self._metrics.setdefault(key, cls(**kwargs))
+        return metric
+
+    def counter(self, name, help='', **labels):
+        """
+        Get or create a counter.
+
+        Args:
+            name (str): Name of the metric, e.g. 'bot_clicks_total'.
+            help (str, optional): Description of the metric.
+            **labels: Labels identifying the series, e.g. kind='text'.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help='', **labels):
+        """
+        Get or create a gauge.
+
+        Args:
+            name (str): Name of the metric.
+            help (str, optional): Description of the metric.
+            **labels: Labels identifying the series.
+
+        Returns:
+            Gauge: The gauge.
+        """
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help='', buckets=DEFAULT_BUCKETS, **labels):
+        """
+        Get or create a histogram.
+
+        Args:
+            name (str): Name of the metric, e.g. 'bot_read_seconds'.
+            help (str, optional): Description of the metric.
+            buckets (tuple, optional): Upper bounds of the buckets (default `DEFAULT_BUCKETS`).
+            **labels: Labels identifying the series.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    # **************************************************
+    # * Export
+    # **************************************************
+
+    def snapshot(self):
+        """
+        Get the current value of every metric.
+
+        Returns:
+            dict: For each metric name, its kind, help and the values of its series with their labels.
+        """
+        with self._lock:
+            metrics = list(self._metrics.items())
+            descriptions = dict(self._help)
+
+        snapshot = {}
+        for (name, labels), metric in sorted(metrics, key=lambda item: item[0]):
+            kind, help = descriptions[name]
+            entry = snapshot.setdefault(name, {'type': kind, 'help': help, 'series': []})
+            entry['series'].append({'labels': dict(labels), 'value': metric.snapshot()})
+        return snapshot
+
+    def render_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        lines = []
+        for name, entry in self.snapshot().items():
+            if entry['help']:
+                lines.append(f'# HELP {name} {entry["help"]}')
+            lines.append(f'# TYPE {name} {entry["type"]}')
+            for series in entry['series']:
+                labels, value = series['labels'], series['value']
+                if entry['type'] != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                for bound, count in value['buckets'].items():
+                    lines.append(f'{name}_bucket{_format_labels(dict(labels, le=bound))} {count}')
+                lines.append(f'{name}_bucket{_format_labels(dict(labels, le="+Inf"))} {value["count"]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value["sum"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def save_snapshot(self, path):
+        """
+        Write a JSON snapshot of the metrics.
+
+        Args:
+            path (str): Path of the snapshot file, replaced atomically.
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'time': time.time(), 'metrics': self.snapshot()}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_snapshots(self, path, interval=10.0):
+        """
+        Write a JSON snapshot of the metrics periodically from a background thread. Call
+        `save_snapshot` after stopping it to keep the final values.
+
+        Args:
+            path (str): Path of the snapshot file.
+            interval (float, optional): Seconds between two snapshots (default 10).
+
+        Returns:
+            threading.Event: Event stopping the snapshots when set.
+        """
+        stopped = threading.Event()
+
+        def run():
+            while not stopped.wait(interval):
+                self.save_snapshot(path)
+
+        threading.Thread(target=run, name='MetricsSnapshots', daemon=True).start()
+        return stopped
+
+    def start_http_server(self, port=9100, host='127.0.0.1'):
+        """
+        Serve the metrics over HTTP from a background thread: `/metrics` in the Prometheus
+        text format and `/metrics.json` as a JSON snapshot.
+
+        Args:
+            port (int, optional): Port to listen on (default 9100).
+            host (str, optional): Address to listen on (default '127.0.0.1', local only).
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = registry.render_prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the bot output
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True).start()
+        return self._server
+
+
+def _format_labels(labels):
+    """
+    Helper function to format labels as `{name="value",...}`.
+    """
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+# **************************************************
+# * Default Registry
+# **************************************************
+
+_default_registry = MetricsRegistry()  # Registry instrumented by the bots and capture backends
+
+
+def get_registry():
+    """
+    Get the default metrics registry.
+
+    Returns:
+        MetricsRegistry: The default registry.
+    """
+    return _default_registry
@@ -0,0 +1,295 @@
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import cv2
+import numpy as np
+from utils import draw_debug_overlay
+from debug_viewer import RegionSelector, FrameRateMeter
+from bot import BotState
+
+# Page showing the stream; clicks and moves are sent back in screenshot coordinates
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head><title>opencv-percept-bot</title></head>
+<body style="margin: 0; background: #202020">
+<img id="feed" src="/stream" style="max-width: 100%; cursor: crosshair">
+<script>
+const feed = document.getElementById('feed');
+function position(event) {
+    const rect = feed.getBoundingClientRect();
+    const x = Math.round((event.clientX - rect.left) * feed.naturalWidth / rect.width);
+    const y = Math.round((event.clientY - rect.top) * feed.naturalHeight / rect.height);
+    return `x=${x}&y=${y}`;
+}
+feed.addEventListener('click', event => fetch('/click?' + position(event)));
+let lastMove = 0;
+feed.addEventListener('mousemove', event => {
+    if (event.timeStamp - lastMove > 100) {
+        lastMove = event.timeStamp;
+        fetch('/move?' + position(event));
+    }
+});
+</script>
+</body>
+</html>
+"""
+
+
+class MJPEGServer:
+    """
+    Local HTTP server streaming the annotated frames of a bot as MJPEG, to watch a headless
+    bot from a browser.
+
+    A single encoder thread draws the overlay (FPS, mouse position, selection, detected
+    rectangles and bot state) into a reused buffer and encodes it to JPEG, at most `fps`
+    times per second and only while at least one client is connected. Each client receives
+    the latest JPEG at its own rate (`/stream?fps=5`), skipping the frames it is too slow for.
+
+    Clicking in the page at `/` selects an area with two clicks like the debug viewer.
+
+    Attributes:
+        screencap (ScreenCaptureBase): The capture backend publishing the frames.
+        bot (Bot): The bot whose rectangles and state are shown.
+        fps (float): Maximum encoding rate, and rate of the clients not asking for less.
+        quality (int): JPEG quality, from 0 to 100.
+        selector (RegionSelector): Selection of areas with clicks in the page.
+        mouse_pos (tuple): Latest mouse position in the page, in screenshot coordinates.
+        clients (int): Number of connected stream clients.
+    """
+
+    def __init__(self, screencap, bot, port=8080, host='127.0.0.1', fps=10, quality=80, on_select=None):
+        """
+        Initialize the server.
+
+        Args:
+            screencap (ScreenCaptureBase): The capture backend publishing the frames.
+            bot (Bot): The bot whose rectangles and state are shown.
+            port (int, optional): Port to listen on (default 8080).
+            host (str, optional): Address to listen on, '0.0.0.0' to stream to the LAN (default '127.0.0.1').
+            fps (float, optional): Maximum encoding rate (default 10).
+            quality (int, optional): JPEG quality, from 0 to 100 (default 80).
+            on_select (callable, optional): Function called with (start, end) when an area is selected in the page.
+        """
+        self.screencap = screencap
+        self.bot = bot
+        self.address = (host, port)
+        self.fps = fps
+        self.quality = quality
+        self.selector = RegionSelector(on_select)
+        self.mouse_pos = (0, 0)
+        self.clients = 0
+        self.stopped = True
+        self.condition = threading.Condition()  # Notified when a JPEG is encoded or the clients change
+        self.jpeg = None  # Latest encoded frame
+        self.jpeg_seq = 0  # Incremented with each encoded frame
+        self._overlay_changed = False  # Set by clicks and moves, re-encodes the current frame
+        self._frame_rate = FrameRateMeter()
+        self._buffer = None  # Annotated image, reused between encodings
+        self._server = None
+
+    def start(self):
+        """
+        Start the HTTP server and the encoder thread.
+        """
+        self.stopped = False
+        self._server = ThreadingHTTPServer(self.address, self._make_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='MJPEGServer', daemon=True).start()
+        threading.Thread(target=self.run, name='MJPEGEncoder', daemon=True).start()
+        print(f'Streaming the bot view on http://{self.address[0]}:{self._server.server_address[1]}/')
+
+    def stop(self):
+        """
+        Stop the server and the encoder thread.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # **************************************************
+    # * Encoding
+    # **************************************************
+
+    def run(self):
+        """
+        The main loop of the encoder thread: encodes new frames while clients are connected.
+        """
+        # Streaming runs in real time, even when the bot runs on a simulated clock
+        interval = 1.0 / self.fps if self.fps > 0 else 0
+        last_seq = 0
+        next_time = 0
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.clients > 0 or self.stopped)
+                if self.stopped:
+                    break
+
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            frame = self.screencap.wait_for_frame(last_seq, timeout=interval or 0.5)
+            if frame is None:
+                if not self._overlay_changed or self.screencap.frame is None:
+                    continue
+                frame = self.screencap.frame
+            self._overlay_changed = False
+            last_seq = frame.seq
+            next_time = time.perf_counter() + interval
+
+            jpeg = self.encode(frame)
+            with self.condition:
+                self.jpeg = jpeg
+                self.jpeg_seq += 1
+                self.condition.notify_all()
+
+    def encode(self, frame):
+        """
+        Draw the overlay on a frame and encode it to JPEG.
+
+        Args:
+            frame (Frame): The frame to encode.
+
+        Returns:
+            bytes: The JPEG image.
+        """
+        image = frame.image
+        if self._buffer is None or self._buffer.shape != image.shape:
+            self._buffer = np.empty_like(image)
+        np.copyto(self._buffer, image)
+
+        fps = self._frame_rate.update(frame, time.perf_counter())
+        draw_debug_overlay(self._buffer, fps, self.mouse_pos, self.screencap.get_screen_position,
+                           self.selector.selection, self.bot.rectangles)
+        cv2.putText(self._buffer, f"State: {BotState.get_name(self.bot.state)}", (10, 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 100, 100), 2)
+
+        _, jpeg = cv2.imencode('.jpg', self._buffer, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes()
+
+    def wait_for_jpeg(self, after_seq, timeout=1.0):
+        """
+        Wait for a JPEG newer than `after_seq`.
+
+        Args:
+            after_seq (int): Sequence number of the last JPEG sent by the caller.
+            timeout (float, optional): Maximum time to wait in seconds (default 1.0).
+
+        Returns:
+            tuple: The (seq, jpeg) of the latest JPEG, or None if none was encoded before the timeout.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.jpeg_seq > after_seq or self.stopped, timeout) or self.stopped:
+                return None
+            return self.jpeg_seq, self.jpeg
+
+    # **************************************************
+    # * HTTP
+    # **************************************************
+
+    def _make_handler(self):
+        """
+        Helper function to build the request handler class bound to this server.
+        """
+        server = self
+
+        class MJPEGHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/':
+                    self._send(200, 'text/html; charset=utf-8', PAGE)
+                elif url.path == '/stream':
+                    try:
+                        fps = float(query.get('fps', [server.fps])[0])
+                    except ValueError:
+                        fps = math.nan
+                    if not math.isfinite(fps):
+                        self.send_error(400)
+                        return
+                    server.stream(self, fps)
+                elif url.path in ('/click', '/move'):
+                    try:
+                        pos = (int(query['x'][0]), int(query['y'][0]))
+                    except (KeyError, ValueError):
+                        self.send_error(400)
+                        return
+                    server.on_mouse(url.path[1:], pos)
+                    self._send(204, 'text/plain', b'')
+                else:
+                    self.send_error(404)
+
+            def _send(self, code, content_type, body):
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep the requests out of the bot output
+
+        return MJPEGHandler
+
+    def on_mouse(self, kind, pos):
+        """
+        Handle a click or a move in the page, like the mouse callback of the debug viewer.
+
+        Args:
+            kind (str): 'click' or 'move'.
+            pos (tuple): The (x, y) position in the screenshot.
+        """
+        self.mouse_pos = pos
+        if kind == 'click':
+            # The page throttles the moves, so the last one may not be where the click ends the selection
+            self.selector.move(pos)
+            self.selector.click(pos)
+        else:
+            self.selector.move(pos)
+        self._overlay_changed = True
+
+    def stream(self, handler, fps):
+        """
+        Send the encoded frames to a client as a multipart MJPEG stream until it disconnects.
+
+        Args:
+            handler (BaseHTTPRequestHandler): The request handler of the client.
+            fps (float): Rate asked by the client, capped to the server rate.
+        """
+        interval = 1.0 / min(fps, self.fps) if fps > 0 and self.fps > 0 else 0
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        wfile = handler.wfile
+
+        with self.condition:
+            self.clients += 1
+            self.condition.notify_all()
+        try:
+            last_seq = 0
+            while not self.stopped:
+                start = time.perf_counter()
+                result = self.wait_for_jpeg(last_seq)
+                if result is None:
+                    continue
+                last_seq, jpeg = result
+                wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n')
+                wfile.write(jpeg)
+                wfile.write(b'\r\n')
+                wfile.flush()
+
+                # Rate-limit this client, the frames encoded meanwhile are skipped
+                delay = interval - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client disconnected
+        finally:
+            with self.condition:
+                self.clients -= 1
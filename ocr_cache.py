@@ -0,0 +1,218 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+
+class OCRCache:
+    """
+    A bounded LRU cache of OCR results keyed by a hash of the cropped pixels.
+
+    In 'exact' mode the key is a hash of the raw pixels, so only identical crops hit.
+    In 'quantized' mode the crop is converted to grayscale, downscaled by 2 and
+    quantized to 16 levels before hashing, so crops differing only by capture noise or
+    slight anti-aliasing changes share the same result.
+
+    Attributes:
+        max_size (int): Maximum number of cached results.
+        mode (str): Key mode, 'exact' or 'quantized'.
+        path (str): Optional file the cache is loaded from and saved to.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that needed OCR.
+    """
+
+    MODES = ('exact', 'quantized')
+
+    def __init__(self, max_size=1024, mode='exact', path=None):
+        """
+        Initialize the cache, loading previous results from `path` if it exists.
+
+        Args:
+            max_size (int, optional): Maximum number of cached results (default 1024).
+            mode (str, optional): Key mode, 'exact' or 'quantized' (default 'exact').
+            path (str, optional): File used to persist the cache between runs.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown OCR cache mode: {mode}')
+
+        self.max_size = max_size
+        self.mode = mode
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def key(self, image):
+        """
+        Compute the cache key of an image.
+
+        Args:
+            image (ndarray): The cropped image.
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        if self.mode == 'quantized':
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            small = cv2.resize(gray, (max(1, gray.shape[1] // 2), max(1, gray.shape[0] // 2)), interpolation=cv2.INTER_AREA)
+            image = small >> 4
+        image = np.ascontiguousarray(image)
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(image.shape).encode())
+        digest.update(image.data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached result and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str: The cached text, or None on a miss.
+        """
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        """
+        Store a result, evicting the least recently used one when the cache is full.
+
+        Args:
+            key (str): The cache key.
+            text (str): The OCR result.
+        """
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def image_to_string(self, image, ocr):
+        """
+        Return the cached text of an image, running `ocr` on a miss.
+
+        Args:
+            image (ndarray): The cropped image.
+            ocr (callable): Function extracting the text of an image.
+
+        Returns:
+            str: The extracted text.
+        """
+        key = self.key(image)
+        text = self.get(key)
+        if text is None:
+            text = ocr(image)
+            self.put(key, text)
+        return text
+
+    @property
+    def hit_rate(self):
+        """
+        float: Ratio of lookups answered from the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        """
+        Remove all cached results and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    # **************************************************
+    # * Persistence
+    # **************************************************
+
+    def load(self, path):
+        """
+        Load cached results saved by `save`. Results saved with another key mode are ignored.
+
+        Args:
+            path (str): Path of the cache file.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f'Could not load OCR cache {path}: {e}')
+            return
+
+        if data.get('mode') != self.mode:
+            return
+        with self._lock:
+            for key, text in data.get('entries', [])[-self.max_size:]:
+                self._entries[key] = text
+
+    def save(self, path=None):
+        """
+        Save the cached results, from least to most recently used.
+
+        Args:
+            path (str, optional): Path of the cache file (default `self.path`).
+        """
+        path = path or self.path
+        if path is None:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'mode': self.mode, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+# **************************************************
+# * Default Cache
+# **************************************************
+
+_default_cache = None  # Cache used by `extract_text_from_image`, created by `configure_ocr_cache`, None when disabled
+
+
+def configure_ocr_cache(max_size=1024, mode='exact', path=None):
+    """
+    Replace the default OCR cache. There is no cache until this is called, typically once at
+    startup from the command line options. A cache with a `path` is saved when the process exits.
+
+    Args:
+        max_size (int, optional): Maximum number of cached results, 0 disables the cache (default 1024).
+        mode (str, optional): Key mode, 'exact' or 'quantized' (default 'exact').
+        path (str, optional): File used to persist the cache between runs.
+
+    Returns:
+        OCRCache: The new default cache, or None if disabled.
+    """
+    global _default_cache
+    _default_cache = OCRCache(max_size=max_size, mode=mode, path=path) if max_size > 0 else None
+    if _default_cache is not None and path is not None:
+        atexit.register(_default_cache.save)
+    return _default_cache
+
+
+def get_ocr_cache():
+    """
+    Get the default OCR cache.
+
+    Returns:
+        OCRCache: The default cache, or None if disabled.
+    """
+    return _default_cache
@@ -0,0 +1,287 @@
+import queue
+import threading
+import cv2
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # Optional dependency, fall back to the tesseract subprocess
+    tesserocr = None
+
+
+class SubprocessOCREngine:
+    """
+    OCR engine running one `tesseract` subprocess per call through pytesseract.
+
+    This is the slowest engine but it only needs the tesseract executable, so it is
+    always available and used as the fallback of the other engines. The engine is
+    stateless: every call starts a new `tesseract` process and loads the language
+    data again, nothing is kept warm between calls.
+    """
+
+    def __init__(self, lang='eng', config=''):
+        """
+        Initialize the engine.
+
+        Args:
+            lang (str, optional): Tesseract language(s) to use (default 'eng').
+            config (str, optional): Additional tesseract command line options.
+        """
+        self.lang = lang
+        self.config = config
+
+    def image_to_string(self, image):
+        """
+        Extract text from an image.
+
+        Args:
+            image (ndarray): The image to process.
+
+        Returns:
+            str: The extracted text.
+        """
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+    def close(self):
+        """
+        Release the engine resources.
+        """
+        pass
+
+
+class TesserocrOCREngine:
+    """
+    OCR engine keeping a Tesseract API instance loaded in-process through tesserocr.
+
+    The language data is loaded once when the engine is created, and tesserocr releases
+    the GIL while recognizing, so a pool of these engines scales across threads.
+    """
+
+    def __init__(self, lang='eng', path=None, psm=None):
+        """
+        Initialize the engine and load the language data.
+
+        Args:
+            lang (str, optional): Tesseract language(s) to use (default 'eng').
+            path (str, optional): Path of the tessdata directory, None for the default location.
+            psm (int, optional): Tesseract page segmentation mode, None for the default.
+
+        Raises:
+            Exception: If tesserocr is not installed.
+        """
+        if tesserocr is None:
+            raise Exception('tesserocr is not installed')
+        kwargs = {'lang': lang}
+        if path is not None:
+            kwargs['path'] = path
+        if psm is not None:
+            kwargs['psm'] = psm
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+
+    def image_to_string(self, image):
+        """
+        Extract text from an image.
+
+        Args:
+            image (ndarray): The image to process (grayscale, BGR or BGRA as captured).
+
+        Returns:
+            str: The extracted text.
+        """
+        # Tesseract reads the bytes as RGB(A), while the captured frames are BGR(A)
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        elif image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self.api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+        return self.api.GetUTF8Text()
+
+    def close(self):
+        """
+        Release the Tesseract API instance.
+        """
+        self.api.End()
+
+
+class OCREnginePool:
+    """
+    A pool of OCR engines shared by all threads.
+
+    Each call borrows an engine for the duration of the recognition, so up to `size`
+    recognitions run in parallel. If an engine fails, the call falls back to the
+    tesseract subprocess path.
+
+    Only tesserocr engines are warm: they keep the language data loaded between calls.
+    With the subprocess engine every call still starts a `tesseract` process, and the
+    pool only bounds how many of them run at the same time.
+
+    Attributes:
+        engine (str): Name of the engine type used by the pool ('tesserocr', 'subprocess', or
+                      'custom' for engines passed in).
+        size (int): Number of engines in the pool.
+    """
+
+    def __init__(self, size=1, engine='auto', lang='eng', path=None, engines=None, fallback=None):
+        """
+        Create the pool and pre-warm all of its engines.
+
+        Args:
+            size (int, optional): Number of engines to create (default 1).
+            engine (str, optional): 'tesserocr', 'subprocess', or 'auto' to use tesserocr
+                                    when it is installed and loads (default 'auto').
+            lang (str, optional): Tesseract language(s) to use (default 'eng').
+            path (str, optional): Path of the tessdata directory used by tesserocr.
+            engines (list, optional): Already created engines to pool instead of creating
+                                      them, `size` and `engine` are then ignored.
+            fallback (object, optional): Engine used when an engine fails or after `close`
+                                         (default: a subprocess engine).
+
+        Raises:
+            ValueError: If the engine is unknown.
+            Exception: If the 'tesserocr' engine was requested and cannot be created.
+        """
+        self.fallback = fallback if fallback is not None else SubprocessOCREngine(lang=lang)
+        self._engines = queue.LifoQueue()
+        self._all_engines = []
+
+        if engines is not None:
+            self._all_engines = list(engines)
+            self.size = len(self._all_engines)
+            self.engine = 'custom'
+        else:
+            self.size = max(1, size)
+            self.engine = self._create_engines(engine, lang, path)
+
+        for instance in self._all_engines:
+            self._engines.put(instance)
+
+    def _create_engines(self, engine, lang, path):
+        """
+        Helper function to create the engines of the pool.
+
+        Args:
+            engine (str): 'tesserocr', 'subprocess' or 'auto'.
+            lang (str): Tesseract language(s) to use.
+            path (str): Path of the tessdata directory used by tesserocr.
+
+        Returns:
+            str: Name of the engine type created.
+
+        Raises:
+            ValueError: If the engine is unknown.
+        """
+        auto = engine == 'auto'
+        if auto:
+            engine = 'tesserocr' if tesserocr is not None else 'subprocess'
+        if engine not in ('tesserocr', 'subprocess'):
+            raise ValueError(f'Unknown OCR engine: {engine}')
+
+        if engine == 'tesserocr':
+            try:
+                for _ in range(self.size):
+                    self._all_engines.append(TesserocrOCREngine(lang=lang, path=path))
+            except Exception as e:
+                for instance in self._all_engines:
+                    instance.close()
+                if not auto:
+                    raise
+                print(f'Could not load tesserocr ({e}), falling back to the tesseract subprocess.')
+                engine = 'subprocess'
+
+        if engine == 'subprocess':
+            self._all_engines = [SubprocessOCREngine(lang=lang) for _ in range(self.size)]
+        return engine
+
+    def image_to_string(self, image):
+        """
+        Extract text from an image with the next available engine.
+
+        Args:
+            image (ndarray): The image to process.
+
+        Returns:
+            str: The extracted text.
+        """
+        instance = self._engines.get()
+        try:
+            return instance.image_to_string(image)
+        except Exception as e:
+            if isinstance(instance, SubprocessOCREngine):
+                raise
+            print(f'OCR engine failed ({e}), falling back to the tesseract subprocess.')
+            return self.fallback.image_to_string(image)
+        finally:
+            self._engines.put(instance)
+
+    def close(self):
+        """
+        Release all engines of the pool once their reads in progress are done. Later reads
+        use the tesseract subprocess, so a thread still reading does not block.
+        """
+        for _ in self._all_engines:
+            self._engines.get().close()
+        for _ in self._all_engines:
+            self._engines.put(self.fallback)
+        self._all_engines = []
+
+
+# **************************************************
+# * Default Pool
+# **************************************************
+
+_default_pool = None  # Pool used by `image_to_string`, created on first use
+_default_pool_lock = threading.Lock()
+
+
+def configure_ocr(size=1, engine='auto', lang='eng', path=None):
+    """
+    Create the default OCR engine pool, typically once at startup so that all engines
+    are warm before the first read.
+
+    Args:
+        size (int, optional): Number of engines to create (default 1).
+        engine (str, optional): 'tesserocr', 'subprocess' or 'auto' (default 'auto').
+        lang (str, optional): Tesseract language(s) to use (default 'eng').
+        path (str, optional): Path of the tessdata directory used by tesserocr.
+
+    Returns:
+        OCREnginePool: The new default pool.
+    """
+    global _default_pool
+    pool = OCREnginePool(size=size, engine=engine, lang=lang, path=path)
+    with _default_pool_lock:
+        previous, _default_pool = _default_pool, pool
+    if previous is not None:
+        previous.close()
+    return pool
+
+
+def get_ocr_pool():
+    """
+    Get the default OCR engine pool, creating a single-engine pool on first use.
+
+    Returns:
+        OCREnginePool: The default pool.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = OCREnginePool()
+        return _default_pool
+
+
+def image_to_string(image):
+    """
+    Extract text from an image with the default OCR engine pool.
+
+    Args:
+        image (ndarray): The image to process.
+
+    Returns:
+        str: The extracted text.
+    """
+    return get_ocr_pool().image_to_string(image)
@@ -0,0 +1,252 @@
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+PROFILE_MODES = ('cprofile', 'sampling', 'both')
+
+
+class ThreadProfiler:
+    """
+    Profiles the capture, bot, action and viewer threads of a run together.
+
+    `cProfile` only profiles the thread it is enabled in, so each thread target is wrapped
+    to run under its own `cProfile.Profile`. A sampling thread can also record the stacks
+    of every thread at a fixed interval, which costs far less than `cProfile` and also
+    shows where threads wait.
+
+    From Python 3.12, `cProfile` is built on `sys.monitoring`, which allows a single active
+    profiler per process, so the per-thread profiles fail past the first thread. On these
+    versions the profiler falls back to sampling only.
+
+    `dump` writes, for each thread and merged over all threads:
+        <name>.pstats: cProfile statistics, for `python -m pstats` or snakeviz.
+        <name>.collapsed: Sampled stacks in the collapsed format of flamegraph.pl and speedscope,
+            rooted at the thread name.
+
+    Attributes:
+        mode (str): 'cprofile', 'sampling' or 'both'.
+        interval (float): Seconds between two stack samples.
+        directory (str): Directory receiving the profiles.
+        profiles (dict): `cProfile.Profile` of each profiled thread, keyed by thread name.
+        samples (dict): Counts of the sampled stacks of each thread, keyed by thread name.
+    """
+
+    def __init__(self, mode='both', interval=0.005, directory='profiles'):
+        """
+        Initialize the profiler and start the sampling thread if needed.
+
+        Args:
+            mode (str, optional): 'cprofile', 'sampling' or 'both' (default 'both').
+            interval (float, optional): Seconds between two stack samples (default 0.005).
+            directory (str, optional): Directory receiving the profiles (default 'profiles').
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unknown profile mode: {mode}')
+        if mode != 'sampling' and sys.version_info >= (3, 12):
+            print('From Python 3.12, cProfile allows one active profiler per process, so the threads '
+                  'cannot be profiled separately: profiling with stack sampling only.')
+            mode = 'sampling'
+        self.mode = mode
+        self.interval = interval
+        self.directory = directory
+        self.profiles = {}
+        self.samples = {}
+        self._names = {}  # Thread id -> name given to `wrap` or `profile_current_thread`
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        if mode in ('sampling', 'both'):
+            self._sampler = threading.Thread(target=self._sample, name='ProfileSampler', daemon=True)
+            self._sampler.start()
+
+    def _new_profile(self, name):
+        """
+        Helper function to name the calling thread uniquely and create its profile.
+
+        Returns:
+            cProfile.Profile: The profile of the thread, None in sampling mode.
+        """
+        with self._lock:
+            unique_name, index = name, 1
+            while unique_name in self._names.values():
+                index += 1
+                unique_name = f'{name}-{index}'
+            self._names[threading.get_ident()] = unique_name
+            if self.mode == 'sampling':
+                return None
+            profile = self.profiles[unique_name] = cProfile.Profile()
+        return profile
+
+    def wrap(self, target, name):
+        """
+        Wrap a thread target to run under its own profile.
+
+        Args:
+            target (callable): The thread target, e.g. `bot.run`.
+            name (str): Name of the thread in the profiles.
+
+        Returns:
+            callable: The target to pass to `Thread`.
+        """
+        def profiled(*args, **kwargs):
+            profile = self._new_profile(name)
+            if profile is None:
+                return target(*args, **kwargs)
+            profile.enable()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+
+        return profiled
+
+    def profile_current_thread(self, name):
+        """
+        Profile the rest of the calling thread, e.g. the main viewer loop.
+
+        Args:
+            name (str): Name of the thread in the profiles.
+        """
+        profile = self._new_profile(name)
+        if profile is not None:
+            profile.enable()
+
+    def _sample(self):
+        """
+        The main loop of the sampling thread: counts the current stack of every other thread.
+        """
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                if any(thread_id not in names for thread_id in frames):
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    names.update(self._names)
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                        frame = frame.f_back
+                    samples = self.samples.setdefault(names.get(thread_id, str(thread_id)), Counter())
+                    samples[';'.join(reversed(stack))] += 1
+
+    def dump(self):
+        """
+        Write the profiles collected so far, without stopping the profiling.
+
+        Returns:
+            pstats.Stats: The cProfile statistics merged over all threads, None in sampling mode.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            profiles = dict(self.profiles)
+            samples = {name: Counter(counts) for name, counts in self.samples.items()}
+
+        merged = None
+        for name, profile in profiles.items():
+            # snapshot_stats() reads a running profile without disabling it, unlike dump_stats()
+            profile.snapshot_stats()
+            path = os.path.join(self.directory, f'{_file_name(name)}.pstats')
+            with open(path, 'wb') as f:
+                marshal.dump(profile.stats, f)
+            if merged is None:
+                merged = pstats.Stats(path)
+            else:
+                merged.add(path)
+        if merged is not None:
+            merged.dump_stats(os.path.join(self.directory, 'merged.pstats'))
+
+        if samples:
+            merged_lines = []
+            for name, counts in samples.items():
+                lines = [f'{stack} {count}' for stack, count in counts.most_common()]
+                _write_lines(os.path.join(self.directory, f'{_file_name(name)}.collapsed'), lines)
+                merged_lines.extend(f'{name};{line}' for line in lines)
+            _write_lines(os.path.join(self.directory, 'merged.collapsed'), merged_lines)
+
+        print(f'Profiles of {len(profiles) or len(samples)} threads written to {self.directory}')
+        return merged
+
+    def stop(self):
+        """
+        Stop the sampling thread and write the profiles.
+
+        Returns:
+            pstats.Stats: The cProfile statistics merged over all threads, None in sampling mode.
+        """
+        self._stopped.set()
+        return self.dump()
+
+
+def _file_name(name):
+    """
+    Helper function to make a thread name usable as a file name.
+    """
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+
+
+def _write_lines(path, lines):
+    """
+    Helper function to write lines of text to a file.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+# **************************************************
+# * Default Profiler
+# **************************************************
+
+_default_profiler = None  # Profiler wrapping the threads started afterwards, None disables profiling
+
+
+def configure_profiling(mode='both', interval=0.005, directory='profiles'):
+    """
+    Enable profiling. Threads started afterwards by the bots, capture backends and action
+    queues are profiled.
+
+    Args:
+        mode (str, optional): 'cprofile', 'sampling' or 'both' (default 'both').
+        interval (float, optional): Seconds between two stack samples (default 0.005).
+        directory (str, optional): Directory receiving the profiles (default 'profiles').
+
+    Returns:
+        ThreadProfiler: The new default profiler.
+    """
+    global _default_profiler
+    _default_profiler = ThreadProfiler(mode=mode, interval=interval, directory=directory)
+    return _default_profiler
+
+
+def get_profiler():
+    """
+    Get the default profiler.
+
+    Returns:
+        ThreadProfiler: The default profiler, or None when profiling is disabled.
+    """
+    return _default_profiler
+
+
+def profiled_target(target, name):
+    """
+    Wrap a thread target with the default profiler, if profiling is enabled.
+
+    Args:
+        target (callable): The thread target.
+        name (str): Name of the thread in the profiles.
+
+    Returns:
+        callable: The target to pass to `Thread`.
+    """
+    if _default_profiler is None:
+        return target
+    return _default_profiler.wrap(target, name)
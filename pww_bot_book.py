@@ -52,7 +52,8 @@ class Bot(Bot):
                 print("Searching for products...")
                 self.click(POSITION_VIEW_BUTTON)
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the price to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_PRICE_CONTENT, timeout=0.5)
 
                 # Get the detected price from the specified area
                 price = self.extract_integer_from_area(AREA_PRICE_CONTENT)
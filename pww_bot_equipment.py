@@ -53,7 +53,8 @@ class Bot(Bot):
                 self.click(POSITION_FILTER_BUTTON)
                 self.click(POSITION_FILTER_CONFIRM_BUTTON)
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the price to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_PRICE_CONTENT, timeout=0.5)
 
                 # Get the detected price from the specified area
                 price = self.extract_integer_from_area(AREA_PRICE_CONTENT)
@@ -70,10 +71,8 @@ class Bot(Bot):
             elif self.state == BotState.TRADING:
                 # Perform trading actions
                 print(f'Detected product meets the target price. Starting trading...')
-                self.click(POSITION_SELECT_1_BUTTON)
-                self.click(POSITION_BUY_BUTTON)
-                self.click(POSITION_BUY_CONFIRM_BUTTON)
-                self.click(POSITION_BUY_CONFIRM_2_BUTTON)
+                # Queue the whole buy sequence at once so the clicks run back to back
+                self.click_sequence([POSITION_SELECT_1_BUTTON, POSITION_BUY_BUTTON, POSITION_BUY_CONFIRM_BUTTON, POSITION_BUY_CONFIRM_2_BUTTON])
                 print(f'Transaction completed successfully.')
 
                 self.lock.acquire()
@@ -141,7 +140,8 @@ class PWWBot2(Bot):
                 print("Searching for products...")
                 self.click(POSITION_VIEW_BUTTON)
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the price to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_PRICE_CONTENT, timeout=0.5)
 
                 # Get the detected price from the specified area
                 price = self.extract_integer_from_area(AREA_PRICE_CONTENT)
@@ -54,7 +54,8 @@ class Bot(Bot):
                 self.click(POSITION_ITEMS_BUTTON[i])
                 i += 1
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the item content to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_ITEM_CONTENT, timeout=0.5)
 
                 content = self.extract_text_from_area(AREA_ITEM_CONTENT)
                 for item in TARGET_ITEM_CONTENT:
@@ -139,7 +140,8 @@ class PWWBot2(Bot):
                 print("Searching for products...")
                 self.click(POSITION_VIEW_BUTTON)
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the price to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_PRICE_CONTENT, timeout=0.5)
 
                 # Get the detected price from the specified area
                 price = self.extract_integer_from_area(AREA_PRICE_CONTENT)
@@ -59,7 +59,8 @@ class Bot(Bot):
                 self.click(POSITION_ITEMS_BUTTON[i])
                 i += 1
                 
-                self.wait(0.5)  # Wait briefly for the price to update
+                # Wait for the price to update and finish rendering instead of a fixed delay
+                self.wait_until_updated(AREA_PRICE_CONTENT, timeout=0.5)
 
                 # Get the detected price from the specified area
                 price = self.extract_integer_from_area(AREA_PRICE_CONTENT)
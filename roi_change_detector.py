@@ -0,0 +1,147 @@
+import threading
+import cv2
+import numpy as np
+from metrics import get_registry
+
+
+class RegionChangeDetector:
+    """
+    Remembers the last read of each watched screen area and tells whether the area
+    changed since, so unchanged areas can reuse the previous result instead of running OCR.
+
+    Areas are compared on a downsampled copy of their pixels: an area counts as changed
+    when any downsampled pixel differs by more than `threshold` grey levels, which still
+    catches a single changed digit while ignoring the smallest capture noise.
+
+    The checks and skipped reads of each area are counted in `roi_checked_total` and
+    `roi_skipped_total`, labelled with the area, as well as in `get_statistics`.
+
+    Attributes:
+        threshold (int): Maximum per-pixel difference of an unchanged area.
+        downsample (int): Factor the areas are downsampled by before comparing.
+        metrics (MetricsRegistry): Registry receiving the checked and skipped counters of each area.
+    """
+
+    def __init__(self, threshold=8, downsample=2):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold (int, optional): Maximum per-pixel difference of an unchanged area (default 8).
+            downsample (int, optional): Factor the areas are downsampled by before comparing (default 2).
+        """
+        self.threshold = threshold
+        self.downsample = downsample
+        self._areas = {}  # Signature and result of the last read of each area
+        self._statistics = {}  # Number of reads and skipped reads of each area
+        self._counters = {}  # Checked and skipped counters of each area in the metrics registry
+        self._lock = threading.Lock()
+        self.metrics = get_registry()
+
+    def _signature(self, image):
+        """
+        Helper function to compute the downsampled signature of an area.
+
+        Args:
+            image (ndarray): The area crop.
+
+        Returns:
+            ndarray: The signature.
+        """
+        height, width = image.shape[:2]
+        size = (max(1, width // self.downsample), max(1, height // self.downsample))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def get(self, key, image):
+        """
+        Look up the previous result of an area if its pixels did not change.
+
+        Args:
+            key (hashable): Identifier of the area (e.g. its points and the kind of read).
+            image (ndarray): The current crop of the area.
+
+        Returns:
+            tuple: (True, previous result) if the area is unchanged, (False, None) if it must be read again.
+        """
+        signature = self._signature(image)
+        with self._lock:
+            statistics = self._statistics.setdefault(key, {'reads': 0, 'skips': 0})
+            checked, skipped = self._get_counters(key)
+            statistics['reads'] += 1
+            checked.inc()
+            entry = self._areas.get(key)
+            if entry is not None and entry[0].shape == signature.shape:
+                if cv2.absdiff(entry[0], signature).max() <= self.threshold:
+                    statistics['skips'] += 1
+                    skipped.inc()
+                    return True, entry[1]
+        return False, None
+
+    def _get_counters(self, key):
+        """
+        Helper function to get the checked and skipped counters of an area, registering them on first use.
+
+        Args:
+            key (hashable): Identifier of the area.
+
+        Returns:
+            tuple: The checked and skipped counters.
+        """
+        counters = self._counters.get(key)
+        if counters is None:
+            region = _region_label(key)
+            counters = self._counters[key] = (
+                self.metrics.counter('roi_checked_total', 'Number of change checks of a screen area before a read.', region=region),
+                self.metrics.counter('roi_skipped_total', 'Number of reads skipped because the screen area did not change.', region=region),
+            )
+        return counters
+
+    def put(self, key, image, result):
+        """
+        Store the result of a read of an area.
+
+        Args:
+            key (hashable): Identifier of the area.
+            image (ndarray): The crop the result was read from.
+            result (object): The result of the read.
+        """
+        signature = self._signature(image)
+        with self._lock:
+            self._areas[key] = (signature, result)
+
+    def reset(self, key=None):
+        """
+        Forget the stored results, forcing the next reads to run.
+
+        Args:
+            key (hashable, optional): Only forget this area (default: all areas).
+        """
+        with self._lock:
+            if key is None:
+                self._areas.clear()
+            else:
+                self._areas.pop(key, None)
+
+    def get_statistics(self):
+        """
+        Get the read and skip counts of every area.
+
+        Returns:
+            dict: For each area key, the number of reads, skipped reads and the skip ratio.
+        """
+        with self._lock:
+            return {
+                key: dict(statistics, skip_ratio=statistics['skips'] / statistics['reads'] if statistics['reads'] else 0.0)
+                for key, statistics in self._statistics.items()
+            }
+
+
+def _region_label(key):
+    """
+    Helper function to turn an area key into a metric label, e.g. 'integer:274,653,396,684'
+    for the key ('integer', ((274, 653), (396, 684))).
+    """
+    if isinstance(key, tuple) and len(key) == 2 and isinstance(key[0], str):
+        kind, points = key
+        return f"{kind}:{','.join(str(value) for point in points for value in point)}"
+    return str(key)
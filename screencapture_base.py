@@ -0,0 +1,208 @@
+from threading import Thread, Lock, Condition
+import numpy as np
+from frame import Frame
+from clock import get_clock
+from metrics import get_registry
+from tracing import get_tracer
+from profiling import profiled_target
+
+
+class ScreenCaptureBase:
+    """
+    Common interface shared by all screen capture backends.
+
+    A backend only has to implement `get_screenshot`; the threading loop, the
+    screenshot bookkeeping and the coordinate translation are provided here so
+    that every backend exposes the same `get_screenshot`/`start`/`run`/
+    `get_screen_position` surface to `main.py` and the bots.
+
+    Attributes:
+        stopped (bool): Indicates whether the screenshot capturing thread is stopped.
+        lock (threading.Lock): A lock object to synchronize access to the screenshot.
+        condition (threading.Condition): Condition bound to `lock`, notified whenever a new frame is published.
+        frame (Frame): The most recent captured frame.
+        screenshot (ndarray): The pixel buffer of the most recent captured frame.
+        capture_interval (float): Delay in seconds between two captures of the capturing thread.
+        clock (RealClock or SimulatedClock): Clock used for the frame timestamps and the capture delay.
+        capture_seconds (Histogram): Durations of `get_screenshot` in the capture loop.
+        frames_total (Counter): Number of published frames.
+        tracer (Tracer): Tracer receiving a span per capture, None when tracing is disabled.
+        w (int): Width of the capture area.
+        h (int): Height of the capture area.
+        offset_x (int): X-offset of the capture area relative to the screen.
+        offset_y (int): Y-offset of the capture area relative to the screen.
+    """
+
+    # **************************************************
+    # * Threading Properties
+    # **************************************************
+    stopped = True  # Flag to control the capturing thread
+    lock = None  # Threading lock to handle concurrent access to screenshot data
+    condition = None  # Condition notified when a new frame is published
+    frame = None  # Store the latest frame captured by the thread
+    screenshot = None  # Store the latest screenshot captured by the thread
+    capture_interval = 0.050  # Delay between two captures to control capture rate
+    clock = None  # Clock used for the frame timestamps and the capture delay
+    capture_seconds = None  # Histogram of the capture durations
+    frames_total = None  # Counter of the published frames
+    tracer = None  # Tracer receiving the capture spans
+
+    # **************************************************
+    # * Window and Screen Properties
+    # **************************************************
+    w = 0  # Width of the capture area
+    h = 0  # Height of the capture area
+    offset_x = 0  # Horizontal offset of the capture area relative to the screen
+    offset_y = 0  # Vertical offset of the capture area relative to the screen
+
+    def __init__(self):
+        """
+        Initialize the shared capture state.
+        """
+        # Create a thread lock object for synchronization and a condition to signal new frames
+        self.lock = Lock()
+        self.condition = Condition(self.lock)
+        self.clock = get_clock()
+
+        # Look the metrics up once, the capture loop only updates them
+        metrics = get_registry()
+        backend = type(self).__module__
+        self.capture_seconds = metrics.histogram('capture_seconds', 'Duration of a screenshot capture in clock seconds.', backend=backend)
+        self.frames_total = metrics.counter('capture_frames_total', 'Number of frames published by the capture thread.', backend=backend)
+        self.tracer = get_tracer()
+
+    def get_screenshot(self):
+        """
+        Capture a single screenshot.
+
+        Returns:
+            ndarray: The captured screenshot as a contiguous NumPy array (3 channels).
+
+        Raises:
+            NotImplementedError: If the backend does not implement capturing.
+        """
+        raise NotImplementedError('Capture backends must implement get_screenshot()')
+
+    def get_screenshot_into(self, out):
+        """
+        Capture a single screenshot directly into a preallocated buffer, e.g. a slot of a
+        shared memory ring buffer.
+
+        Backends converting a raw capture override it to write the converted pixels straight
+        into `out`; by default the result of `get_screenshot` is copied into it.
+
+        Args:
+            out (ndarray): The buffer receiving the pixels.
+
+        Returns:
+            ndarray: `out` once written, the captured screenshot if its shape differs from `out`
+                     (e.g. the window was resized), or None if there is no screenshot.
+        """
+        screenshot = self.get_screenshot()
+        if screenshot is None or screenshot.shape != out.shape:
+            return screenshot
+        np.copyto(out, screenshot)
+        return out
+
+    @staticmethod
+    def list_window_names():
+        """
+        List the names of all currently visible windows.
+        """
+        print('This capture backend does not capture windows.')
+
+    def get_screen_position(self, pos):
+        """
+        Translate a pixel position from a screenshot to the corresponding screen position.
+
+        Args:
+            pos (tuple): A tuple representing the pixel position (x, y) in the screenshot.
+
+        Returns:
+            tuple: The translated position (x, y) on the actual screen.
+        """
+        return (pos[0] + self.offset_x, pos[1] + self.offset_y)
+
+    # **************************************************
+    # * Frame Delivery Methods
+    # **************************************************
+
+    def publish_screenshot(self, screenshot, timestamp):
+        """
+        Publish a captured screenshot as the next frame and wake up all waiting consumers.
+
+        Args:
+            screenshot (ndarray): The captured screenshot.
+            timestamp (float): Clock time taken right before the capture started.
+
+        Returns:
+            Frame: The published frame.
+        """
+        with self.condition:
+            seq = self.frame.seq + 1 if self.frame is not None else 1
+            self.frame = Frame(seq, timestamp, screenshot)
+            self.screenshot = self.frame.image
+            self.condition.notify_all()
+        self.frames_total.inc()
+        return self.frame
+
+    def is_frame_current(self, frame):
+        """
+        Check that the pixels of a published frame were not overwritten since it was published.
+
+        Args:
+            frame (Frame): A frame published by this backend.
+
+        Returns:
+            bool: Always True, the published frames own their pixels.
+        """
+        return True
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        """
+        Block until a frame newer than `after_seq` has been published.
+
+        Args:
+            after_seq (int, optional): Sequence number of the last frame seen by the caller (default 0).
+            timeout (float, optional): Maximum time to wait in seconds, None waits forever.
+
+        Returns:
+            Frame: The latest frame, or None if no newer frame was published before the timeout.
+        """
+        with self.condition:
+            if not self.clock.wait_for(self.condition, lambda: self.frame is not None and self.frame.seq > after_seq, timeout):
+                return None
+            return self.frame
+
+    # **************************************************
+    # * Threading Methods
+    # **************************************************
+
+    def start(self):
+        """
+        Start a separate thread to continuously capture screenshots in the background.
+        """
+        self.stopped = False
+        t = Thread(target=profiled_target(self.run, 'ScreenCapture'), name='ScreenCapture')
+        t.start()
+
+    def stop(self):
+        """
+        Stop the screenshot capturing thread.
+        """
+        self.stopped = True
+
+    def run(self):
+        """
+        The main loop of the screenshot capturing thread. Continuously captures screenshots
+        until stopped and publishes the latest screenshot as a new frame.
+        """
+        while not self.stopped:
+            timestamp = self.clock.time()
+            screenshot = self.get_screenshot()
+            end = self.clock.time()
+            self.capture_seconds.observe(end - timestamp)
+            frame = self.publish_screenshot(screenshot, timestamp)
+            if self.tracer is not None:
+                self.tracer.complete('capture', timestamp, end, category='capture', args={'frame_seq': frame.seq})
+            self.clock.sleep(self.capture_interval, producer=True)  # Add a slight delay to control capture rate
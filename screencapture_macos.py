@@ -1,11 +1,10 @@
 import cv2
 import numpy as np
 import Quartz.CoreGraphics as CG
-from threading import Thread, Lock
-import time
+from screencapture_base import ScreenCaptureBase
 
 
-class ScreenCapture:
+class ScreenCapture(ScreenCaptureBase):
     """
     A class to capture screenshots from a specific window or the desktop on macOS, 
     manage screen regions, and handle multi-threaded screenshot capturing.
@@ -21,13 +20,6 @@ class ScreenCapture:
         offset_y (int): Y-offset of the window or screen region relative to the screen.
     """
 
-    # **************************************************
-    # * Threading Properties
-    # **************************************************
-    stopped = True  # Flag to control the capturing thread
-    lock = None  # Threading lock to handle concurrent access to screenshot data
-    screenshot = None  # Store the latest screenshot captured by the thread
-
     # **************************************************
     # * Window and Screen Properties
     # **************************************************
@@ -49,8 +41,7 @@ class ScreenCapture:
         Raises:
             Exception: If the specified window is not found.
         """
-        # Create a thread lock object for synchronization
-        self.lock = Lock()
+        super().__init__()
 
         if window_name is None:
             # Capture the entire screen if no window name is provided
@@ -94,6 +85,40 @@ class ScreenCapture:
         Returns:
             ndarray: The captured screenshot as a NumPy array (RGB format).
         """
+        # Drop the alpha channel (RGBA -> RGB) for OpenCV compatibility
+        img = self._grab()[..., :3]
+
+        # Ensure the image is contiguous in memory for OpenCV processing
+        img = np.ascontiguousarray(img)
+
+        return img
+
+    def get_screenshot_into(self, out):
+        """
+        Capture a screenshot of the target window or desktop directly into a preallocated buffer.
+
+        Args:
+            out (ndarray): The buffer receiving the pixels.
+
+        Returns:
+            ndarray: `out` once written, or the captured screenshot if its shape differs from `out`
+                     (e.g. the window was resized or moved to a display with another scale).
+        """
+        img = self._grab()
+        if img.shape[:2] != out.shape[:2]:
+            return np.ascontiguousarray(img[..., :3])
+
+        # Drop the alpha channel while copying the image into the buffer
+        np.copyto(out, img[..., :3])
+        return out
+
+    def _grab(self):
+        """
+        Helper function to capture the raw image of the target window or desktop.
+
+        Returns:
+            ndarray: The captured image with 4 channels, backed by the Quartz image data.
+        """
         # Define the rectangle area to capture
         capture_rect = CG.CGRectMake(self.offset_x, self.offset_y, self.w, self.h)
 
@@ -115,12 +140,6 @@ class ScreenCapture:
         # Adjust shape for OpenCV (height, width, 4 channels - RGBA)
         img = img.reshape((height, width, 4))
 
-        # Drop the alpha channel (RGBA -> RGB) for OpenCV compatibility
-        img = img[..., :3]
-
-        # Ensure the image is contiguous in memory for OpenCV processing
-        img = np.ascontiguousarray(img)
-
         return img
 
     @staticmethod
@@ -149,46 +168,3 @@ class ScreenCapture:
         for window in window_list:
             if 'kCGWindowName' in window and window['kCGWindowName']:
                 print(window['kCGWindowName'])
-
-    def get_screen_position(self, pos):
-        """
-        Translate a pixel position from a screenshot to the corresponding screen position.
-
-        Args:
-            pos (tuple): A tuple representing the pixel position (x, y) in the screenshot.
-
-        Returns:
-            tuple: The translated position (x, y) on the actual screen.
-        """
-        return (pos[0] + self.offset_x, pos[1] + self.offset_y)
-
-    # **************************************************
-    # * Threading Methods
-    # **************************************************
-
-    def start(self):
-        """
-        Start a separate thread to continuously capture screenshots in the background.
-        """
-        self.stopped = False
-        t = Thread(target=self.run)
-        t.start()
-
-    def stop(self):
-        """
-        Stop the screenshot capturing thread.
-        """
-        self.stopped = True
-
-    def run(self):
-        """
-        The main loop of the screenshot capturing thread. Continuously captures screenshots
-        until stopped and stores the latest screenshot.
-        """
-        while not self.stopped:
-            screenshot = self.get_screenshot()
-            # Use a lock to safely update the screenshot in a multi-threaded environment
-            self.lock.acquire()
-            self.screenshot = screenshot
-            self.lock.release()
-            time.sleep(0.050)  # Add a slight delay to control capture rate
\ No newline at end of file
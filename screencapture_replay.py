@@ -0,0 +1,162 @@
+import os
+import cv2
+import numpy as np
+from screencapture_base import ScreenCaptureBase
+
+
+class ScreenCapture(ScreenCaptureBase):
+    """
+    A capture backend that replays recorded frames instead of capturing a live window.
+
+    Frames can come from a directory of PNG images, a `.npy` stack of shape (N, H, W, C)
+    or any video file readable by OpenCV. This allows running every bot on hosts
+    without a game client (e.g. Linux build and benchmark machines).
+
+    Attributes:
+        source (str): Path of the replayed directory, `.npy` stack or video file.
+        fps (float): Playback rate in frames per second, 0 replays as fast as possible.
+        loop (bool): Restart from the first frame once the source is exhausted.
+        frame_index (int): Index of the next frame to be replayed.
+        frame_count (int): Total number of frames in the source.
+    """
+
+    # **************************************************
+    # * Replay Properties
+    # **************************************************
+    source = None  # Path of the replayed source
+    fps = 0  # Playback rate, 0 means as fast as possible
+    loop = True  # Restart the replay when the source is exhausted
+    frame_index = 0  # Index of the next frame to replay
+    frame_count = 0  # Number of frames available in the source
+
+    IMAGE_EXTENSIONS = ('.png',)  # Extensions picked up from a directory source
+
+    def __init__(self, source, window_rect=None, fps=20, loop=True):
+        """
+        Initialize the replay capture backend.
+
+        Args:
+            source (str): A directory of PNG images, a `.npy` stack or a video file.
+            window_rect (tuple, optional): Rectangle (x, y, width, height) the frames were recorded from.
+                                           Its position is used to translate positions to the screen.
+            fps (float, optional): Playback rate in frames per second, 0 for as fast as possible (default 20).
+            loop (bool, optional): Restart from the first frame when the source is exhausted (default True).
+
+        Raises:
+            Exception: If the source does not exist, is not supported or contains no frames.
+        """
+        super().__init__()
+
+        self.source = source
+        self.fps = fps
+        self.loop = loop
+        self.capture_interval = 1.0 / fps if fps else 0
+        self.frame_index = 0
+        self._images = None
+        self._stack = None
+        self._video = None
+
+        if os.path.isdir(source):
+            self._images = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(self.IMAGE_EXTENSIONS)
+            )
+            self.frame_count = len(self._images)
+            first_frame = cv2.imread(self._images[0], cv2.IMREAD_COLOR) if self._images else None
+        elif os.path.isfile(source) and source.lower().endswith('.npy'):
+            # Memory-map the stack so large recordings do not have to fit in memory
+            self._stack = np.load(source, mmap_mode='r')
+            if self._stack.ndim == 3:
+                self._stack = self._stack[..., np.newaxis]
+            self.frame_count = self._stack.shape[0]
+            first_frame = self._stack[0] if self.frame_count else None
+        elif os.path.isfile(source):
+            self._video = cv2.VideoCapture(source)
+            if not self._video.isOpened():
+                raise Exception(f'Unsupported replay source: {source}')
+            self.frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+            ok, first_frame = self._video.read()
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            if not ok:
+                first_frame = None
+        else:
+            raise Exception(f'Replay source not found: {source}')
+
+        if first_frame is None:
+            raise Exception(f'Replay source contains no frames: {source}')
+
+        self.h, self.w = first_frame.shape[:2]
+        if window_rect is not None:
+            self.offset_x = window_rect[0]
+            self.offset_y = window_rect[1]
+
+    def get_screenshot(self):
+        """
+        Return the next frame of the replayed source.
+
+        Returns:
+            ndarray: The next frame as a contiguous NumPy array (3 channels),
+                     or None once the source is exhausted and looping is disabled.
+        """
+        if self.frame_index >= self.frame_count > 0:
+            if not self.loop:
+                return None
+            self.frame_index = 0
+            if self._video is not None:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+        if self._images is not None:
+            img = cv2.imread(self._images[self.frame_index], cv2.IMREAD_COLOR)
+        elif self._stack is not None:
+            img = self._stack[self.frame_index]
+        else:
+            ok, img = self._video.read()
+            if not ok:
+                # Frame counts reported by some containers are estimates only
+                self.frame_count = self.frame_index
+                return self.get_screenshot() if self.loop and self.frame_count > 0 else None
+
+        self.frame_index += 1
+
+        # Convert grayscale frames and drop the alpha channel for OpenCV compatibility
+        if img.ndim == 2 or img.shape[2] == 1:
+            img = cv2.cvtColor(np.ascontiguousarray(img), cv2.COLOR_GRAY2BGR)
+        img = img[..., :3]
+
+        # Ensure the image is contiguous in memory for OpenCV processing
+        img = np.ascontiguousarray(img)
+
+        return img
+
+    # **************************************************
+    # * Threading Methods
+    # **************************************************
+
+    def run(self):
+        """
+        The main loop of the replay thread. Publishes frames at the configured playback
+        rate (or as fast as possible) until stopped or the source is exhausted.
+        """
+        interval = self.capture_interval
+        next_time = self.clock.time()
+        while not self.stopped:
+            timestamp = self.clock.time()
+            screenshot = self.get_screenshot()
+            if screenshot is None:
+                self.stopped = True
+                break
+
+            end = self.clock.time()
+            self.capture_seconds.observe(end - timestamp)
+            frame = self.publish_screenshot(screenshot, timestamp)
+            if self.tracer is not None:
+                self.tracer.complete('capture', timestamp, end, category='capture', args={'frame_seq': frame.seq})
+
+            if interval:
+                # Schedule against a fixed timeline so decoding time does not slow playback down
+                next_time += interval
+                delay = next_time - self.clock.time()
+                if delay > 0:
+                    self.clock.sleep(delay, producer=True)
+                else:
+                    next_time = self.clock.time()
@@ -0,0 +1,158 @@
+from frame_ring_buffer import SharedFrameRingBuffer
+from screencapture_base import ScreenCaptureBase
+
+
+class ScreenCapture(ScreenCaptureBase):
+    """
+    A capture backend that reads frames from a shared memory ring buffer filled by
+    a separate capture process (see `share_capture`).
+
+    Several bot processes can attach to the same ring buffer, so template matching and
+    OCR run on their own cores instead of competing with the capture for one GIL.
+
+    By default the frames are copied out of shared memory, so they stay immutable like the
+    frames of the other backends. With `copy=False` the published frames are read-only
+    views of the shared memory slots instead: no pixel is copied, but a view is overwritten
+    once the capture process laps the ring, i.e. `slots` captures later. The bots check
+    with `is_frame_current` that a view was not overwritten while they read it.
+
+    Attributes:
+        ring_buffer (SharedFrameRingBuffer): The attached read-only ring buffer.
+        poll_interval (float): Delay in seconds between two polls of a frame that is due.
+        copy (bool): Copy the frames out of shared memory instead of publishing views.
+    """
+
+    # **************************************************
+    # * Shared Memory Properties
+    # **************************************************
+    ring_buffer = None  # Attached read-only ring buffer
+    poll_interval = 0.001  # Delay between two polls of a frame that is due
+    copy = True  # Copy the frames out of shared memory
+
+    def __init__(self, name, window_rect=None, copy=True):
+        """
+        Attach to the shared ring buffer published by a capture process.
+
+        Args:
+            name (str): Name of the shared memory segment.
+            window_rect (tuple, optional): Rectangle (x, y, width, height) the capture process records.
+                                           Its position is used to translate positions to the screen.
+            copy (bool, optional): Copy the frames out of shared memory instead of publishing read-only views (default True).
+        """
+        super().__init__()
+
+        self.copy = copy
+        self._ring_frames = {}  # Published sequence number -> ring buffer frame, for the views
+        self.ring_buffer = SharedFrameRingBuffer.attach(name)
+        self.h, self.w = self.ring_buffer.shape[:2]
+        if window_rect is not None:
+            self.offset_x = window_rect[0]
+            self.offset_y = window_rect[1]
+
+    def get_screenshot(self):
+        """
+        Return the latest frame in the ring buffer, as a read-only view unless `copy` is set.
+
+        Returns:
+            ndarray: The latest screenshot, or None before the first frame is committed.
+        """
+        frame = self.ring_buffer.read_latest(copy=self.copy)
+        return frame.image if frame is not None else None
+
+    def is_frame_current(self, frame):
+        """
+        Check that the pixels of a published frame were not overwritten by the capture process.
+
+        Args:
+            frame (Frame): A frame published by this backend.
+
+        Returns:
+            bool: True if the frame was copied or its ring buffer slot still holds it.
+        """
+        if self.copy:
+            return True
+        ring_frame = self._ring_frames.get(frame.seq)
+        return ring_frame is not None and self.ring_buffer.is_current(ring_frame)
+
+    # **************************************************
+    # * Threading Methods
+    # **************************************************
+
+    def run(self):
+        """
+        The main loop of the reading thread. Publishes each frame committed by the capture
+        process with its original capture timestamp, until stopped.
+        """
+        last_seq = 0
+        while not self.stopped:
+            frame = self.ring_buffer.wait_for_frame(last_seq, timeout=0.5, poll_interval=self.poll_interval, copy=self.copy)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+            published = self.publish_screenshot(frame.image, frame.timestamp)
+            if not self.copy:
+                # Older views have been overwritten once the ring is lapped
+                self._ring_frames[published.seq] = frame
+                self._ring_frames.pop(published.seq - self.ring_buffer.slots, None)
+
+
+def share_capture(screencap, name, slots=4, first_frame_timeout=10.0):
+    """
+    Continuously capture screenshots into a shared ring buffer until interrupted.
+
+    Each screenshot is captured straight into the next slot of the ring buffer. The size
+    of the ring buffer is fixed by the first screenshot: screenshots of another size (e.g.
+    after the window was resized) are dropped until the capture has the size again.
+
+    Args:
+        screencap (ScreenCaptureBase): The capture backend producing the screenshots.
+        name (str): Name of the shared memory segment to create.
+        slots (int, optional): Number of preallocated frames in the ring buffer (default 4).
+        first_frame_timeout (float, optional): Maximum time in clock seconds to wait for the first screenshot,
+                                               e.g. until the window appears (default 10).
+
+    Raises:
+        Exception: If no screenshot was captured within `first_frame_timeout` seconds.
+    """
+    # Size the ring buffer from a real screenshot, HiDPI displays capture more pixels than w x h
+    clock = screencap.clock
+    deadline = clock.time() + first_frame_timeout
+    while True:
+        timestamp = clock.time()
+        screenshot = screencap.get_screenshot()
+        if screenshot is not None:
+            break
+        if timestamp >= deadline:
+            raise Exception(f'No screenshot captured within {first_frame_timeout} seconds, nothing to share')
+        clock.sleep(max(screencap.capture_interval, 0.1))
+    ring_buffer = SharedFrameRingBuffer.create(name, screenshot.shape, slots=slots)
+    print(f'Sharing {screenshot.shape[1]}x{screenshot.shape[0]} capture in shared memory "{ring_buffer.name}" ({slots} slots)')
+
+    try:
+        ring_buffer.write(screenshot, timestamp)
+        resized = False
+        while True:
+            clock.sleep(screencap.capture_interval, producer=True)  # Add a slight delay to control capture rate
+            timestamp = clock.time()
+            slot = ring_buffer.begin_write()
+            screenshot = screencap.get_screenshot_into(slot)
+            if screenshot is slot:
+                ring_buffer.commit_write(timestamp)
+                if resized:
+                    print('Capture is back to the shared memory size, sharing frames again')
+                    resized = False
+                continue
+
+            ring_buffer.abort_write()
+            if screenshot is None:
+                break
+            if not resized:
+                # Attached readers mapped the buffer with its size, it cannot be reallocated under them
+                print(f'Capture size changed to {screenshot.shape[1]}x{screenshot.shape[0]}, dropping frames until it is '
+                      f'{ring_buffer.shape[1]}x{ring_buffer.shape[0]} again (restart share_capture to use the new size)')
+                resized = True
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring_buffer.close()
+        ring_buffer.unlink()
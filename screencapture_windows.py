@@ -1,9 +1,8 @@
 import numpy as np
 import win32gui, win32ui, win32con
-from threading import Thread, Lock
-import time
+from screencapture_base import ScreenCaptureBase
 
-class ScreenCapture:
+class ScreenCapture(ScreenCaptureBase):
     """
     A class to capture screenshots from a specific window or the desktop, 
     manage screen regions, and handle multi-threaded screenshot capturing.
@@ -21,13 +20,6 @@ class ScreenCapture:
         offset_y (int): Y-offset of the window on the screen.
     """
 
-    # **************************************************
-    # * Threading Properties
-    # **************************************************
-    stopped = True  # Flag to control the capturing thread
-    lock = None  # Threading lock to handle concurrent access to screenshot data
-    screenshot = None  # Store the latest screenshot captured by the thread
-
     # **************************************************
     # * Window and Screen Properties
     # **************************************************
@@ -51,8 +43,7 @@ class ScreenCapture:
         Raises:
             Exception: If the specified window is not found.
         """
-        # Create a thread lock object for synchronization
-        self.lock = Lock()
+        super().__init__()
 
         border_pixels = 0
         titlebar_pixels = 0
@@ -90,6 +81,39 @@ class ScreenCapture:
         Returns:
             ndarray: The captured screenshot as a NumPy array (RGB format).
         """
+        # Drop the alpha channel (RGBA -> RGB) for OpenCV compatibility
+        img = self._grab()[..., :3]
+
+        # Ensure the image is contiguous in memory for OpenCV processing
+        img = np.ascontiguousarray(img)
+
+        return img
+
+    def get_screenshot_into(self, out):
+        """
+        Capture a screenshot of the target window or desktop directly into a preallocated buffer.
+
+        Args:
+            out (ndarray): The buffer receiving the pixels.
+
+        Returns:
+            ndarray: `out` once written, or the captured screenshot if its shape differs from `out`.
+        """
+        img = self._grab()
+        if img.shape[:2] != out.shape[:2]:
+            return np.ascontiguousarray(img[..., :3])
+
+        # Drop the alpha channel while copying the bitmap into the buffer
+        np.copyto(out, img[..., :3])
+        return out
+
+    def _grab(self):
+        """
+        Helper function to capture the raw bitmap of the target window or desktop.
+
+        Returns:
+            ndarray: The captured bitmap with 4 channels.
+        """
         # Get the window's device context (DC) for capturing
         wDC = win32gui.GetWindowDC(self.hwnd)
         dcObj = win32ui.CreateDCFromHandle(wDC)
@@ -112,12 +136,6 @@ class ScreenCapture:
         win32gui.ReleaseDC(self.hwnd, wDC)
         win32gui.DeleteObject(dataBitMap.GetHandle())
 
-        # Drop the alpha channel (RGBA -> RGB) for OpenCV compatibility
-        img = img[...,:3]
-
-        # Ensure the image is contiguous in memory for OpenCV processing
-        img = np.ascontiguousarray(img)
-
         return img
 
     @staticmethod
@@ -142,46 +160,3 @@ class ScreenCapture:
             if win32gui.IsWindowVisible(hwnd):
                 print(hex(hwnd), win32gui.GetWindowText(hwnd))
         win32gui.EnumWindows(winEnumHandler, None)
-
-    def get_screen_position(self, pos):
-        """
-        Translate a pixel position from a screenshot to the corresponding screen position.
-
-        Args:
-            pos (tuple): A tuple representing the pixel position (x, y) in the screenshot.
-
-        Returns:
-            tuple: The translated position (x, y) on the actual screen.
-        """
-        return (pos[0] + self.offset_x, pos[1] + self.offset_y)
-
-    # **************************************************
-    # * Threading Methods
-    # **************************************************
-    
-    def start(self):
-        """
-        Start a separate thread to continuously capture screenshots in the background.
-        """
-        self.stopped = False
-        t = Thread(target=self.run)
-        t.start()
-
-    def stop(self):
-        """
-        Stop the screenshot capturing thread.
-        """
-        self.stopped = True
-
-    def run(self):
-        """
-        The main loop of the screenshot capturing thread. Continuously captures screenshots
-        until stopped and stores the latest screenshot.
-        """
-        while not self.stopped:
-            screenshot = self.get_screenshot()
-            # Use a lock to safely update the screenshot in a multi-threaded environment
-            self.lock.acquire()
-            self.screenshot = screenshot
-            self.lock.release()
-            time.sleep(0.050)  # Add a slight delay to control capture rate
\ No newline at end of file
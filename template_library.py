@@ -0,0 +1,305 @@
+import os
+import json
+import threading
+import cv2
+import numpy as np
+
+
+class Template:
+    """
+    A template prepared once for matching against 3-channel BGR frames.
+
+    Attributes:
+        name (str): Name of the template (file name without extension).
+        image (ndarray): The template as a contiguous 3-channel BGR image.
+        mask (ndarray): Single-channel mask built from the alpha channel, None if the template is opaque.
+        gray (ndarray): Grayscale version of the template.
+        pyramid (list): BGR images of the template pyramid, `pyramid[0]` is the full resolution image.
+        gray_pyramid (list): Grayscale images of the template pyramid.
+        width (int): Width of the template.
+        height (int): Height of the template.
+    """
+
+    def __init__(self, name, image, mask=None, gray=None, pyramid=None, gray_pyramid=None):
+        """
+        Initialize the template from already prepared arrays. Use `from_image` to prepare
+        a template from a raw image.
+
+        Args:
+            name (str): Name of the template.
+            image (ndarray): Contiguous 3-channel BGR image.
+            mask (ndarray, optional): Single-channel mask, None if the template is opaque.
+            gray (ndarray, optional): Grayscale image.
+            pyramid (list, optional): BGR pyramid images.
+            gray_pyramid (list, optional): Grayscale pyramid images.
+        """
+        self.name = name
+        self.image = image
+        self.mask = mask
+        self.gray = gray if gray is not None else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.pyramid = pyramid if pyramid is not None else [image]
+        self.gray_pyramid = gray_pyramid if gray_pyramid is not None else [self.gray]
+        self.height, self.width = image.shape[:2]
+
+    @classmethod
+    def from_image(cls, name, image, pyramid_levels=0):
+        """
+        Prepare a template from an image as read by `cv2.imread(..., cv2.IMREAD_UNCHANGED)`.
+
+        Args:
+            name (str): Name of the template.
+            image (ndarray): Grayscale, BGR or BGRA image.
+            pyramid_levels (int, optional): Number of downscaled pyramid levels to precompute (default 0).
+
+        Returns:
+            Template: The prepared template.
+        """
+        mask = None
+        if image.ndim == 2 or image.shape[2] == 1:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            alpha = image[..., 3]
+            if np.any(alpha < 255):
+                # Keep transparency as a matching mask, fully transparent pixels are ignored
+                mask = np.ascontiguousarray(alpha)
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        image = np.ascontiguousarray(image)
+
+        pyramid = [image]
+        for _ in range(pyramid_levels):
+            if min(pyramid[-1].shape[:2]) < 2:
+                break
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        gray_pyramid = [cv2.cvtColor(level, cv2.COLOR_BGR2GRAY) for level in pyramid]
+
+        return cls(name, image, mask=mask, gray=gray_pyramid[0], pyramid=pyramid, gray_pyramid=gray_pyramid)
+
+    @classmethod
+    def from_file(cls, path, pyramid_levels=0):
+        """
+        Load and prepare a template from an image file.
+
+        Args:
+            path (str): Path of the template image.
+            pyramid_levels (int, optional): Number of downscaled pyramid levels to precompute (default 0).
+
+        Returns:
+            Template: The prepared template.
+
+        Raises:
+            Exception: If the image cannot be read.
+        """
+        image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise Exception(f'Template not found: {path}')
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls.from_image(name, image, pyramid_levels)
+
+
+class TemplateLibrary:
+    """
+    A set of templates loaded once from a directory and handed out ready to match.
+
+    When `cache_path` is given, the prepared templates are compiled into an `.npz` file
+    that is reused as long as it is newer than every template image and the images keep the
+    modification time and size they had when it was built, so cold starts do not decode and
+    convert all images again.
+
+    Attributes:
+        directory (str): Directory the templates are loaded from.
+        pyramid_levels (int): Number of downscaled pyramid levels precomputed per template.
+        cache_path (str): Optional path of the compiled `.npz` cache.
+        templates (dict): Prepared templates by name.
+    """
+
+    EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')  # Image files picked up from the directory
+
+    def __init__(self, directory=None, pyramid_levels=2, cache_path=None):
+        """
+        Initialize the library and load the templates of `directory`.
+
+        Args:
+            directory (str, optional): Directory containing the template images.
+            pyramid_levels (int, optional): Number of downscaled pyramid levels to precompute (default 2).
+            cache_path (str, optional): Path of the compiled `.npz` cache.
+        """
+        self.directory = directory
+        self.pyramid_levels = pyramid_levels
+        self.cache_path = cache_path
+        self.templates = {}
+
+        if directory is not None:
+            self.load()
+
+    def _template_files(self):
+        """
+        List the template images of the directory.
+
+        Returns:
+            list: Paths of the template images, sorted by name.
+        """
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.lower().endswith(self.EXTENSIONS)
+        )
+
+    def load(self):
+        """
+        Load all templates of the directory, from the compiled cache when it is up to date.
+        """
+        files = self._template_files()
+        if self.cache_path is not None and self._is_cache_fresh(files):
+            self._load_cache()
+            return
+
+        for path in files:
+            template = Template.from_file(path, self.pyramid_levels)
+            self.templates[template.name] = template
+
+        if self.cache_path is not None:
+            self.save_cache()
+
+    def add(self, name, image):
+        """
+        Prepare and add a template from an image.
+
+        Args:
+            name (str): Name of the template.
+            image (ndarray): Grayscale, BGR or BGRA image.
+
+        Returns:
+            Template: The prepared template.
+        """
+        template = Template.from_image(name, image, self.pyramid_levels)
+        self.templates[name] = template
+        return template
+
+    def get(self, name):
+        """
+        Get a prepared template by name.
+
+        Args:
+            name (str): Name of the template (file name without extension).
+
+        Returns:
+            Template: The prepared template, or None if it does not exist.
+        """
+        return self.templates.get(name)
+
+    def __getitem__(self, name):
+        return self.templates[name]
+
+    def __contains__(self, name):
+        return name in self.templates
+
+    def __iter__(self):
+        return iter(self.templates.values())
+
+    def __len__(self):
+        return len(self.templates)
+
+    # **************************************************
+    # * Compiled Cache
+    # **************************************************
+
+    def _is_cache_fresh(self, files):
+        """
+        Check whether the compiled cache can be used instead of the template images.
+
+        Args:
+            files (list): Paths of the template images.
+
+        Returns:
+            bool: True if the cache exists, is newer than every image, was built from images of
+                  the same modification time and size, and matches the settings.
+        """
+        if not os.path.exists(self.cache_path):
+            return False
+        cache_time = os.path.getmtime(self.cache_path)
+        if any(os.path.getmtime(path) > cache_time for path in files):
+            return False
+        with np.load(self.cache_path) as data:
+            meta = json.loads(str(data['__meta__']))
+        names = [os.path.splitext(os.path.basename(path))[0] for path in files]
+        return (meta['pyramid_levels'] == self.pyramid_levels and meta['names'] == names
+                and meta.get('sources') == self._source_stats(files))
+
+    @staticmethod
+    def _source_stats(files):
+        """
+        Helper function to get the modification time and size of the template images, so a
+        replaced image is detected even when its modification time is older than the cache.
+
+        Args:
+            files (list): Paths of the template images.
+
+        Returns:
+            list: [mtime_ns, size] of every image.
+        """
+        return [[stat.st_mtime_ns, stat.st_size] for stat in map(os.stat, files)]
+
+    def _load_cache(self):
+        """
+        Load the prepared templates from the compiled cache.
+        """
+        with np.load(self.cache_path) as data:
+            meta = json.loads(str(data['__meta__']))
+            for name, levels, has_mask in zip(meta['names'], meta['levels'], meta['masks']):
+                pyramid = [data[f'{name}/pyramid/{i}'] for i in range(levels)]
+                gray_pyramid = [data[f'{name}/gray_pyramid/{i}'] for i in range(levels)]
+                mask = data[f'{name}/mask'] if has_mask else None
+                self.templates[name] = Template(name, pyramid[0], mask=mask, gray=gray_pyramid[0],
+                                                pyramid=pyramid, gray_pyramid=gray_pyramid)
+
+    def save_cache(self, path=None):
+        """
+        Compile the prepared templates into an `.npz` file.
+
+        Args:
+            path (str, optional): Path of the compiled cache (default `self.cache_path`).
+        """
+        path = path or self.cache_path
+        arrays = {}
+        meta = {'pyramid_levels': self.pyramid_levels, 'names': [], 'levels': [], 'masks': []}
+        if self.directory is not None:
+            meta['sources'] = self._source_stats(self._template_files())
+        for name, template in self.templates.items():
+            meta['names'].append(name)
+            meta['levels'].append(len(template.pyramid))
+            meta['masks'].append(template.mask is not None)
+            for i, (level, gray_level) in enumerate(zip(template.pyramid, template.gray_pyramid)):
+                arrays[f'{name}/pyramid/{i}'] = level
+                arrays[f'{name}/gray_pyramid/{i}'] = gray_level
+            if template.mask is not None:
+                arrays[f'{name}/mask'] = template.mask
+        arrays['__meta__'] = np.array(json.dumps(meta))
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+# **************************************************
+# * Template File Cache
+# **************************************************
+
+_file_templates = {}  # Templates loaded by path, shared by all callers
+_file_templates_lock = threading.Lock()
+
+
+def load_template(path, pyramid_levels=0):
+    """
+    Load a template file once and return the same prepared template on later calls.
+
+    Args:
+        path (str): Path of the template image.
+        pyramid_levels (int, optional): Number of downscaled pyramid levels to precompute (default 0).
+
+    Returns:
+        Template: The prepared template.
+    """
+    key = (os.path.abspath(path), pyramid_levels)
+    with _file_templates_lock:
+        template = _file_templates.get(key)
+        if template is None:
+            template = Template.from_file(path, pyramid_levels)
+            _file_templates[key] = template
+        return template
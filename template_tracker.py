@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+from utils import detect_template_in_image, non_max_suppression
+
+
+class TemplateTracker:
+    """
+    A tracking layer on top of `detect_template_in_image` for targets that stay in place
+    from one frame to the next.
+
+    After a detection, the next frames are first matched only inside windows around the
+    previous hits. The whole frame is scanned again when the tracked search misses, when
+    nothing is being tracked, and every `full_scan_interval` frames to pick up new instances.
+
+    Attributes:
+        template (ndarray or Template): The template to track.
+        search_margin (int): Number of pixels the previous hits are expanded by on each side.
+        full_scan_interval (int): Maximum number of frames between two full frame scans.
+        rectangles (ndarray): Rectangles (x, y, w, h) found in the last frame.
+        scores (ndarray): Scores of the rectangles found in the last frame.
+        frames (int): Number of processed frames.
+        tracked_hits (int): Number of frames answered by the tracked search alone.
+        full_scans (int): Number of full frame scans.
+    """
+
+    def __init__(self, template, search_margin=32, full_scan_interval=30, pyramid_levels=0, **kwargs):
+        """
+        Initialize the tracker.
+
+        Args:
+            template (ndarray or Template): The template to track.
+            search_margin (int, optional): Expansion in pixels of the previous hits on each side (default 32).
+            full_scan_interval (int, optional): Maximum number of frames between two full scans (default 30).
+            pyramid_levels (int, optional): Pyramid levels used for full frame scans (default 0).
+            **kwargs: Other options of `detect_template_in_image` (threshold, method, grayscale...).
+        """
+        self.template = template
+        self.search_margin = search_margin
+        self.full_scan_interval = full_scan_interval
+        self.pyramid_levels = pyramid_levels
+        self.options = kwargs
+        self.options.pop('return_scores', None)
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the tracked rectangles and reset the statistics.
+        """
+        self.rectangles = np.empty((0, 4), dtype=np.int32)
+        self.scores = np.empty(0, dtype=np.float32)
+        self.frames = 0
+        self.tracked_hits = 0
+        self.full_scans = 0
+        self._frames_since_full_scan = 0
+
+    @property
+    def hit_rate(self):
+        """
+        float: Ratio of frames that did not need a full frame scan.
+        """
+        return self.tracked_hits / self.frames if self.frames else 0.0
+
+    def detect(self, image):
+        """
+        Detect the template in a new frame.
+
+        Args:
+            image (ndarray): The frame to search within.
+
+        Returns:
+            ndarray: Detected rectangles (N, 4) as (x, y, w, h).
+        """
+        self.frames += 1
+
+        if len(self.rectangles) > 0 and self._frames_since_full_scan < self.full_scan_interval:
+            rectangles, scores = self._detect_tracked(image)
+            if len(rectangles) > 0:
+                self.tracked_hits += 1
+                self._frames_since_full_scan += 1
+                self.rectangles, self.scores = rectangles, scores
+                return self.rectangles
+
+        self.full_scans += 1
+        self._frames_since_full_scan = 0
+        self.rectangles, self.scores = detect_template_in_image(image, template=self.template, return_scores=True,
+                                                                pyramid_levels=self.pyramid_levels, **self.options)
+        return self.rectangles
+
+    def _detect_tracked(self, image):
+        """
+        Helper function to search only inside the windows around the previous hits.
+
+        Args:
+            image (ndarray): The frame to search within.
+
+        Returns:
+            tuple: The rectangles found and their scores.
+        """
+        image_h, image_w = image.shape[:2]
+        found_rectangles = []
+        found_scores = []
+        for x, y, w, h in self.rectangles:
+            x1, y1 = max(x - self.search_margin, 0), max(y - self.search_margin, 0)
+            x2, y2 = min(x + w + self.search_margin, image_w), min(y + h + self.search_margin, image_h)
+            if x2 - x1 < w or y2 - y1 < h:
+                continue
+            rectangles, scores = detect_template_in_image(image[y1:y2, x1:x2], template=self.template,
+                                                          return_scores=True, **self.options)
+            if len(rectangles) > 0:
+                found_rectangles.append(rectangles + np.array([x1, y1, 0, 0], dtype=rectangles.dtype))
+                found_scores.append(scores)
+
+        if not found_rectangles:
+            return np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        # Windows of nearby hits overlap, drop the duplicates they produce
+        rectangles = np.concatenate(found_rectangles)
+        scores = np.concatenate(found_scores)
+        lower_is_better = self.options.get('method') in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+        keep = non_max_suppression(rectangles, -scores if lower_is_better else scores,
+                                   self.options.get('iou_threshold', 0.3), self.options.get('top_k'))
+        return rectangles[keep], scores[keep]
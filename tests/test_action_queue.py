@@ -0,0 +1,34 @@
+import threading
+from input_backend import ActionQueue, RecordingInputBackend
+
+
+def test_sequences_submitted_while_stopping_are_run_or_cancelled():
+    action_queue = ActionQueue(RecordingInputBackend())
+    futures = []
+    started = threading.Barrier(5)
+
+    def submit():
+        started.wait()
+        for i in range(200):
+            futures.append(action_queue.submit([('click', i, i)]))
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    action_queue.stop()
+    for thread in threads:
+        thread.join()
+
+    assert len(futures) == 800
+    assert all(future.done() for future in futures)
+    assert len(action_queue.backend.events) == sum(not future.cancelled() for future in futures)
+
+
+def test_stop_can_be_called_twice():
+    action_queue = ActionQueue(RecordingInputBackend())
+    future = action_queue.submit([('click', 1, 1)])
+    action_queue.stop()
+    action_queue.stop()
+    assert future.done() and not future.cancelled()
+    assert action_queue.submit([('click', 2, 2)]).cancelled()
@@ -0,0 +1,81 @@
+import time
+import numpy as np
+from bot import Bot
+from screencapture_base import ScreenCaptureBase
+
+AREA = [(0, 0), (20, 20)]
+
+
+def make_bot():
+    """
+    Helper function to create a running bot reading the frames published by hand on a capture backend.
+    """
+    source = ScreenCaptureBase()
+    bot = Bot()
+    bot.set_frame_source(source)
+    bot.stopped = False
+    bot.frame_timeout = 0.05
+    return bot, source
+
+
+def test_wait_for_fresh_frame_returns_a_frame_captured_after_the_click():
+    bot, source = make_bot()
+    bot.last_action_time = time.perf_counter()
+    frame = source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+    assert bot.wait_for_fresh_frame() is frame
+
+
+def test_wait_for_fresh_frame_does_not_return_a_stale_frame():
+    bot, source = make_bot()
+    source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+    bot.last_action_time = time.perf_counter()
+    assert bot.wait_for_fresh_frame() is None
+
+
+def test_reads_are_skipped_without_a_fresh_frame():
+    bot, source = make_bot()
+    source.publish_screenshot(np.full((40, 40, 3), 255, np.uint8), time.perf_counter())
+    bot.last_action_time = time.perf_counter()
+    assert bot.extract_integer_from_area(AREA) == 0
+    assert bot.extract_text_from_area(AREA) == ''
+    assert bot.decision_frame is None
+
+
+def test_unchanged_reads_are_counted_per_region():
+    bot, source = make_bot()
+    area = [(2, 3), (12, 13)]
+    checked = bot.metrics.counter('roi_checked_total', region='integer:2,3,12,13')
+    skipped = bot.metrics.counter('roi_skipped_total', region='integer:2,3,12,13')
+    before = checked.value, skipped.value
+    bot.digit_recognizer = None
+    bot._read_integer = lambda screenshot, points, crop: 42
+    for _ in range(3):
+        source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+        assert bot.extract_integer_from_area(area) == 42
+    assert (checked.value - before[0], skipped.value - before[1]) == (3, 2)
+
+
+def test_reads_of_overwritten_frames_are_repeated_on_a_newer_frame():
+    bot, source = make_bot()
+    source.is_frame_current = lambda frame: frame.seq != 1
+    source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+    read_frames = []
+
+    def read_integer(screenshot, points, area):
+        # The capture keeps publishing frames while the area is read
+        read_frames.append(source.frame.seq)
+        source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+        return 42
+
+    bot._read_integer = read_integer
+    assert bot.extract_integer_from_area(AREA) == 42
+    assert read_frames == [1, 2]
+
+
+def test_reads_give_up_when_every_frame_is_overwritten():
+    bot, source = make_bot()
+    source.is_frame_current = lambda frame: False
+    source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+    bot._read_text = lambda screenshot, points: 'sold'
+    assert bot.extract_text_from_area(AREA) == ''
+    assert bot.decision_frame is None
@@ -0,0 +1,15 @@
+import os
+from bot import BotState
+from bot_script import ScriptedBot
+from metrics import get_registry
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'pww_bot_book.json')
+
+
+def test_scripted_bot_starts_in_its_initial_state_without_a_transition():
+    transitions = get_registry().counter('bot_state_transitions_total', 'Number of transitions between two states.',
+                                         source='INITIALIZING', target='INITIALIZING')
+    before = transitions.value
+    bot = ScriptedBot(SCRIPT)
+    assert bot.state == BotState.INITIALIZING
+    assert transitions.value == before
@@ -0,0 +1,118 @@
+import threading
+import time
+import numpy as np
+from bot import Bot
+from screencapture_base import ScreenCaptureBase
+
+AREA = [(0, 0), (20, 20)]
+
+
+def make_bot():
+    """
+    Helper function to create a running bot reading the frames published by hand on a capture backend.
+    """
+    source = ScreenCaptureBase()
+    bot = Bot()
+    bot.set_frame_source(source)
+    bot.stopped = False
+    return bot, source
+
+
+def image(value):
+    """
+    Helper function to create a uniform screenshot.
+    """
+    return np.full((40, 40, 3), value, dtype=np.uint8)
+
+
+def publish_every(source, interval, values, stop):
+    """
+    Helper function to publish a screenshot per value from a background thread.
+    """
+    def run():
+        for value in values:
+            if stop.is_set():
+                break
+            source.publish_screenshot(image(value), time.perf_counter())
+            time.sleep(interval)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_wait_until_changed_ignores_frames_captured_before_the_click():
+    bot, source = make_bot()
+    reference = source.publish_screenshot(image(0), time.perf_counter())
+    bot.pre_action_frame = reference
+    bot.last_action_time = time.perf_counter()
+
+    # Effect of an earlier click, captured before the last click landed
+    source.publish_screenshot(image(100), bot.last_action_time - 0.001)
+    assert not bot.wait_until_changed(AREA, timeout=0.05)
+
+    source.publish_screenshot(image(100), time.perf_counter())
+    assert bot.wait_until_changed(AREA, timeout=0.05)
+
+
+def test_wait_until_changed_uses_the_latest_frame_before_the_click_landed():
+    bot, source = make_bot()
+    source.publish_screenshot(image(0), time.perf_counter())
+    bot.pre_action_frame = source.frame
+    # An earlier click blanks the area before the click lands
+    source.publish_screenshot(image(100), time.perf_counter())
+    bot._update_pre_action_frame(time.perf_counter())
+    bot.last_action_time = time.perf_counter()
+
+    source.publish_screenshot(image(100), time.perf_counter())
+    assert not bot.wait_until_changed(AREA, timeout=0.05)
+    source.publish_screenshot(image(200), time.perf_counter())
+    assert bot.wait_until_changed(AREA, timeout=0.05)
+
+
+def test_wait_until_stable():
+    bot, source = make_bot()
+    stop = threading.Event()
+    publish_every(source, 0.005, [0, 50, 100] + [150] * 20, stop)
+    try:
+        assert bot.wait_until_stable(AREA, frames=3, timeout=1.0)
+        assert bot.frame.image[0, 0, 0] == 150
+    finally:
+        stop.set()
+
+
+def test_wait_until_stable_times_out_while_changing():
+    bot, source = make_bot()
+    stop = threading.Event()
+    publish_every(source, 0.005, [i * 7 % 256 for i in range(200)], stop)
+    try:
+        assert not bot.wait_until_stable(AREA, frames=2, timeout=0.1)
+    finally:
+        stop.set()
+
+
+def test_wait_until_updated_bounds_the_combined_wait():
+    bot, source = make_bot()
+    bot.pre_action_frame = source.publish_screenshot(image(0), time.perf_counter())
+    bot.last_action_time = time.perf_counter()
+    stop = threading.Event()
+    # The area changes at once and then keeps changing
+    publish_every(source, 0.005, [i * 7 % 256 + 1 for i in range(400)], stop)
+    try:
+        start = time.perf_counter()
+        assert not bot.wait_until_updated(AREA, timeout=0.2)
+        assert time.perf_counter() - start < 0.3
+    finally:
+        stop.set()
+
+
+def test_wait_until_updated():
+    bot, source = make_bot()
+    bot.pre_action_frame = source.publish_screenshot(image(0), time.perf_counter())
+    bot.last_action_time = time.perf_counter()
+    stop = threading.Event()
+    publish_every(source, 0.005, [0, 0, 80, 160] + [160] * 20, stop)
+    try:
+        assert bot.wait_until_updated(AREA, timeout=1.0)
+        assert bot.frame.image[0, 0, 0] == 160
+    finally:
+        stop.set()
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from clock import SimulatedClock
+
+
+def start_producer(clock, interval, stop):
+    """
+    Helper function to start a thread capturing on the clock every `interval` seconds, like a capture loop.
+
+    Returns:
+        tuple: The thread, the condition notified on each capture and the list of capture times.
+    """
+    condition = threading.Condition()
+    captures = []
+
+    def run():
+        while not stop.is_set():
+            with condition:
+                captures.append(clock.time())
+                condition.notify_all()
+            clock.sleep(interval, producer=True)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, condition, captures
+
+
+def test_sleeping_advances_the_time():
+    clock = SimulatedClock(start=10.0)
+    started = time.perf_counter()
+    clock.sleep(3600)
+    assert clock.time() == 3610.0
+    assert time.perf_counter() - started < 1.0
+
+
+def test_timed_waits_without_producers_jump_to_the_deadline():
+    clock = SimulatedClock()
+    condition = threading.Condition()
+    with condition:
+        assert not clock.wait_for(condition, lambda: False, timeout=5.0)
+    assert clock.time() == 5.0
+
+
+def test_waits_follow_the_captures_of_the_producers():
+    clock = SimulatedClock()
+    stop = threading.Event()
+    thread, condition, captures = start_producer(clock, 0.5, stop)
+    try:
+        with condition:
+            assert not clock.wait_for(condition, lambda: len(captures) >= 100, timeout=2.0)
+            assert clock.time() == 2.0
+            assert clock.wait_for(condition, lambda: len(captures) >= 10)  # Untimed
+        assert captures[:10] == [0.5 * i for i in range(10)]
+        assert clock.time() == 4.5
+    finally:
+        stop.set()
+        clock.advance(1.0)
+        thread.join(2.0)
+
+
+def test_untimed_waits_are_ended_by_a_notification():
+    clock = SimulatedClock()
+    condition = threading.Condition()
+    done = []
+
+    def notify():
+        with condition:
+            done.append(True)
+            condition.notify_all()
+
+    timer = threading.Timer(0.05, notify)
+    timer.start()
+    with condition:
+        assert clock.wait_for(condition, lambda: done)
+    timer.join()
+
+
+def test_untimed_waits_that_can_never_end_fail():
+    clock = SimulatedClock(producer_timeout=0.05)
+    condition = threading.Condition()
+    with condition, pytest.raises(RuntimeError, match='Untimed wait'):
+        clock.wait_for(condition, lambda: False)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import bot as bot_module
+from bot import Bot
+from digit_recognizer import DigitRecognizer
+from market_simulator import MarketSimulator
+
+SIMULATOR = MarketSimulator('pww_bot_book', seed=1)
+RECOGNIZER = DigitRecognizer.calibrate(SIMULATOR.calibration_samples())
+
+
+def render_field(text):
+    """
+    Helper function to render a field in the simulator's game font and return its crop.
+    """
+    (x1, y1), (x2, y2) = SIMULATOR.profile['area']
+    image = np.zeros((y2, x2, 3), np.uint8)
+    SIMULATOR.render_field(image, [text])
+    return image[y1:y2, x1:x2]
+
+
+def test_calibration_learns_every_digit():
+    assert RECOGNIZER.labels == list('0123456789')
+
+
+@pytest.mark.parametrize('text, value', [('907', 907), ('12,500', 12500), ('1,000', 1000), ('98,765', 98765)])
+def test_thousands_separators_are_ignored(text, value):
+    read, confidence = RECOGNIZER.read_integer(render_field(text))
+    assert read == value
+    assert confidence >= Bot.digit_confidence
+
+
+def test_saved_glyphs_read_the_same(tmp_path):
+    RECOGNIZER.save(tmp_path / 'glyphs.npz')
+    loaded = DigitRecognizer.load(tmp_path / 'glyphs.npz')
+    assert loaded.labels == RECOGNIZER.labels
+    assert loaded.read_integer(render_field('12,500')) == RECOGNIZER.read_integer(render_field('12,500'))
+
+
+def test_confident_reads_skip_ocr(monkeypatch):
+    monkeypatch.setattr(bot_module, 'extract_text_from_image', lambda image, top_left, bottom_right: pytest.fail('OCR was used'))
+    bot = Bot()
+    bot.digit_recognizer = RECOGNIZER
+    area = render_field('12,500')
+    assert bot._read_integer(area, [(0, 0), area.shape[1::-1]], area) == 12500
+
+
+def test_unsure_reads_fall_back_to_ocr(monkeypatch):
+    monkeypatch.setattr(bot_module, 'extract_text_from_image', lambda image, top_left, bottom_right: '4,321')
+    bot = Bot()
+    bot.digit_recognizer = RECOGNIZER
+    area = render_field('XYZ')
+    assert RECOGNIZER.read_integer(area)[1] < bot.digit_confidence
+    assert bot._read_integer(area, [(0, 0), area.shape[1::-1]], area) == 4321
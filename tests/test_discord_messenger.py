@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+import pytest
+from discord_messenger import DiscordMessenger, LocalDiscordClient, MAX_MESSAGE_LENGTH
+
+
+def make_messenger(**kwargs):
+    """
+    Helper function to create a messenger recording its messages with a local client.
+    """
+    client = LocalDiscordClient()
+    return DiscordMessenger(channel_id=1, client=client, **kwargs), client
+
+
+def flush(messenger, client):
+    """
+    Helper function to start the messenger, send all queued messages and return them as (time, kind, payload).
+    """
+    messenger.start()
+    messenger.stop()
+    return [(sent, kind, payload) for sent, _, kind, payload, _ in client.messages]
+
+
+def test_drop_oldest_keeps_the_newest_messages():
+    messenger, client = make_messenger(max_queue=2, drop_policy='drop_oldest')
+    for payload in (b'1', b'2', b'3'):
+        messenger.send_image(payload)
+    assert [payload for _, _, payload in flush(messenger, client)] == [b'2', b'3']
+
+
+def test_drop_newest_keeps_the_oldest_messages():
+    messenger, client = make_messenger(max_queue=2, drop_policy='drop_newest')
+    for payload in (b'1', b'2', b'3'):
+        messenger.send_image(payload)
+    assert [payload for _, _, payload in flush(messenger, client)] == [b'1', b'2']
+
+
+def test_queued_text_is_coalesced_up_to_the_message_length():
+    messenger, client = make_messenger()
+    for message in ('x' * 1500, 'y' * 400, 'z' * 200):
+        messenger.send(message)
+    sent = [payload for _, _, payload in flush(messenger, client)]
+    assert sent == ['x' * 1500 + '\n' + 'y' * 400, 'z' * 200]
+    assert all(len(payload) <= MAX_MESSAGE_LENGTH for payload in sent)
+
+
+def test_identical_messages_are_skipped_within_the_dedup_window():
+    messenger, client = make_messenger(dedup_window=60.0)
+    for payload in (b'sold', b'sold', b'bought'):
+        messenger.send_image(payload)
+    assert [payload for _, _, payload in flush(messenger, client)] == [b'sold', b'bought']
+
+
+def test_identical_messages_are_sent_by_default():
+    messenger, client = make_messenger()
+    for payload in (b'sold', b'sold'):
+        messenger.send_image(payload)
+    assert [payload for _, _, payload in flush(messenger, client)] == [b'sold', b'sold']
+
+
+def test_sends_are_paced_by_the_token_bucket():
+    messenger, client = make_messenger(rate=5.0, burst=2)
+    for payload in (b'1', b'2', b'3', b'4'):
+        messenger.send_image(payload)
+    times = [sent for sent, _, _ in flush(messenger, client)]
+    assert len(times) == 4
+    # The burst goes out at once, then one message every 1 / rate seconds
+    assert times[1] - times[0] < 0.1
+    assert times[2] - times[0] > 0.15
+    assert times[3] - times[2] > 0.15
+
+
+def test_screencap_is_encoded_in_bgr_order():
+    messenger, client = make_messenger(image_format='png')
+    screencap = np.zeros((40, 40, 3), np.uint8)
+    screencap[..., 2] = 255  # Red in BGR order
+    messenger.send_screencap(screencap, (10, 10), (30, 30))
+    [(_, kind, payload)] = flush(messenger, client)
+    image = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+    assert kind == 'image'
+    assert image.shape == (20, 20, 3)
+    assert (image == (0, 0, 255)).all()
+
+
+def test_empty_screencap_crops_are_rejected():
+    messenger, _ = make_messenger()
+    with pytest.raises(ValueError):
+        messenger.send_screencap(np.zeros((40, 40, 3), np.uint8), (10, 10), (10, 30))
+
+
+def test_a_message_that_fails_does_not_stop_later_sends():
+    messenger, client = make_messenger()
+    messenger.send('before')
+    messenger._enqueue(('screencap', 1, np.zeros((0, 20, 3), np.uint8), 'empty.jpg'))  # Cannot be encoded
+    messenger.send_image(b'after')
+    sent = [payload for _, _, payload in flush(messenger, client)]
+    assert sent == ['before', b'after']
+    assert messenger._results['failed'].value == 1
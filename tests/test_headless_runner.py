@@ -0,0 +1,110 @@
+import json
+import signal
+import socket
+import threading
+import time
+import numpy as np
+import pytest
+from bot import Bot
+from headless_runner import HeadlessRunner
+from screencapture_base import ScreenCaptureBase
+
+
+class StubCapture(ScreenCaptureBase):
+    """
+    Capture backend whose frames are published by hand, running until `stopped` is set.
+    """
+
+    stopped = False
+
+    def publish(self, count):
+        for _ in range(count):
+            self.publish_screenshot(np.zeros((20, 20, 3), np.uint8), time.perf_counter())
+
+
+@pytest.fixture
+def runner():
+    """
+    Helper fixture creating a runner on a stub capture, restoring the signal handlers it installs.
+    """
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    bot = Bot()
+    bot.frames = []
+    bot.update_frame = bot.frames.append
+    yield HeadlessRunner(StubCapture(), bot)
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def test_status_reports_the_latest_frame(runner):
+    status = json.loads(runner.handle_command('status'))
+    assert status['frame_seq'] is None and status['state'] == 'INITIALIZING'
+    assert runner.handle_command('jump').startswith('error')
+
+    runner.screencap.publish(3)
+    runner.screencap.stopped = True
+    runner.run()  # Returns once the capture stopped and no frame is left
+    status = json.loads(runner.handle_command('status'))
+    assert status['frame_seq'] == 3
+    assert status['frame_timestamp'] == runner.screencap.frame.timestamp
+    assert [frame.seq for frame in runner.bot.frames] == [3]
+
+
+def test_run_ends_when_the_capture_stops(runner):
+    def replay():
+        for _ in range(3):
+            runner.screencap.publish(1)
+            time.sleep(0.05)
+        runner.screencap.stopped = True
+
+    thread = threading.Thread(target=replay)
+    thread.start()
+    runner.run()
+    thread.join()
+    assert [frame.seq for frame in runner.bot.frames] == [1, 2, 3]
+    assert not runner.stopped.is_set()
+
+
+def test_stop_command_ends_the_run(runner):
+    answers = []
+    timer = threading.Timer(0.05, lambda: answers.append(runner.handle_command('stop')))
+    timer.start()
+    started = time.perf_counter()
+    runner.run()  # The capture never stops
+    timer.join()
+    assert answers == ['ok']
+    assert runner.stopped.is_set()
+    assert time.perf_counter() - started < 2.0
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not supported')
+def test_control_socket_answers_one_line_per_command(runner, tmp_path):
+    runner.control = str(tmp_path / 'control.sock')
+    runner.screencap.publish(1)
+    answers = []
+
+    def control():
+        started = time.perf_counter()
+        for _ in range(100):
+            try:
+                connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                connection.connect(runner.control)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                connection.close()
+                time.sleep(0.01)
+        while runner.frame is None and time.perf_counter() - started < 1.0:
+            time.sleep(0.01)  # Until the run handed the frame to the bot
+        with connection, connection.makefile('rwb') as stream:
+            for command in (b'status\n', b'stop\n'):
+                stream.write(command)
+                stream.flush()
+                answers.append(stream.readline().decode().strip())
+
+    thread = threading.Thread(target=control)
+    thread.start()
+    runner.run()
+    thread.join()
+    assert json.loads(answers[0])['frame_seq'] == 1
+    assert answers[1] == 'ok'
+    assert not (tmp_path / 'control.sock').exists()
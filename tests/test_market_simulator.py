@@ -0,0 +1,45 @@
+import pytest
+import bot as bot_module
+import pww_bot_book
+from clock import SimulatedClock, get_clock, set_clock
+from digit_recognizer import DigitRecognizer
+from input_backend import ActionQueue, RecordingInputBackend
+from market_simulator import MarketSimulator, run_simulation
+
+
+@pytest.fixture
+def simulation(monkeypatch):
+    """
+    Helper fixture creating a simulator and an action queue on a simulated clock, with OCR stubbed out.
+    """
+    previous_clock = get_clock()
+    set_clock(SimulatedClock())
+    monkeypatch.setattr(bot_module, 'extract_text_from_image', lambda image, top_left, bottom_right: '')
+    simulator = MarketSimulator('pww_bot_book', hit_rate=0.5, seed=1)
+    action_queue = ActionQueue(RecordingInputBackend())
+    yield simulator, action_queue
+    action_queue.stop()
+    set_clock(previous_clock)
+
+
+def test_simulated_session_buys_the_matching_listings(simulation):
+    simulator, action_queue = simulation
+    digit_recognizer = DigitRecognizer.calibrate(simulator.calibration_samples())
+    report = run_simulation(pww_bot_book.Bot, simulator, 30, action_queue, digit_recognizer, timeout=30)
+    assert 'error' not in report
+    assert report['listings'] > 5
+    # A listing shown just before the end of the session may not be bought yet
+    assert report['matches'] - 1 <= report['buys'] <= report['matches']
+    assert report['buys'] > 0
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_session_ends_when_the_bot_thread_dies(simulation):
+    simulator, action_queue = simulation
+
+    class FailingBot(pww_bot_book.Bot):
+        def run(self):
+            raise RuntimeError('tesseract is not installed')
+
+    report = run_simulation(FailingBot, simulator, 30, action_queue, timeout=30)
+    assert report['error'].startswith('The bot thread stopped')
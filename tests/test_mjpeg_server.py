@@ -0,0 +1,68 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from bot import Bot
+from mjpeg_server import MJPEGServer
+from screencapture_base import ScreenCaptureBase
+
+
+@pytest.fixture
+def server():
+    """
+    Helper fixture running a server on a free port, with a thread publishing frames on a capture backend.
+    """
+    source = ScreenCaptureBase()
+    selected = []
+    server = MJPEGServer(source, Bot(), port=0, fps=50, on_select=lambda start, end: selected.append((start, end)))
+    server.selected = selected
+    stop = threading.Event()
+
+    def publish():
+        while not stop.is_set():
+            source.publish_screenshot(np.zeros((60, 80, 3), np.uint8), time.perf_counter())
+            time.sleep(0.010)
+
+    publisher = threading.Thread(target=publish, daemon=True)
+    publisher.start()
+    server.start()
+    yield server
+    stop.set()
+    server.stop()
+    publisher.join(1.0)
+
+
+def get(server, path):
+    """
+    Helper function to send a GET request to the server and return its response.
+    """
+    return urllib.request.urlopen(f'http://127.0.0.1:{server._server.server_address[1]}{path}', timeout=2.0)
+
+
+@pytest.mark.parametrize('path', ['/stream?fps=fast', '/stream?fps=nan', '/click?x=1', '/move?x=1&y=up'])
+def test_invalid_queries_are_rejected(server, path):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        get(server, path)
+    assert error.value.code == 400
+
+
+def test_frames_are_only_encoded_while_a_client_is_connected(server):
+    time.sleep(0.1)
+    assert server.jpeg_seq == 0
+    with get(server, '/stream?fps=20') as response:
+        assert response.headers['Content-Type'].startswith('multipart/x-mixed-replace')
+        assert response.readline() == b'--frame\r\n'
+        assert response.readline() == b'Content-Type: image/jpeg\r\n'
+        length = int(response.readline().split(b':')[1])
+        response.readline()
+        assert response.read(length)[:2] == b'\xff\xd8'  # JPEG start of image
+    assert server.jpeg_seq > 0
+
+
+def test_clicks_in_the_page_select_an_area(server):
+    for path in ('/click?x=10&y=20', '/move?x=30&y=35', '/click?x=40&y=50'):
+        assert get(server, path).status == 204
+    assert server.mouse_pos == (40, 50)
+    assert server.selected == [((10, 20), (40, 50))]
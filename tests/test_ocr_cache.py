@@ -0,0 +1,73 @@
+import numpy as np
+import ocr_cache
+import utils
+from ocr_cache import OCRCache, configure_ocr_cache, get_ocr_cache
+
+
+def crop(value, shape=(20, 40, 3)):
+    """
+    Helper function to create a uniform crop.
+    """
+    return np.full(shape, value, np.uint8)
+
+
+def test_least_recently_used_results_are_evicted():
+    cache = OCRCache(max_size=2)
+    cache.put('a', '1')
+    cache.put('b', '2')
+    assert cache.get('a') == '1'  # 'b' is now the least recently used
+    cache.put('c', '3')
+    assert cache.get('b') is None
+    assert cache.get('a') == '1' and cache.get('c') == '3'
+
+
+def test_hits_and_misses_are_counted():
+    cache = OCRCache()
+    reads = []
+    for value in (10, 10, 20, 10):
+        cache.image_to_string(crop(value), lambda image: reads.append(image) or 'text')
+    assert len(reads) == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert cache.hit_rate == 0.5
+    cache.clear()
+    assert (cache.hits, cache.misses, cache.hit_rate) == (0, 0, 0.0)
+
+
+def test_quantized_keys_ignore_capture_noise():
+    noisy = crop(100).copy()
+    noisy[::2, ::3] += 3
+    exact, quantized = OCRCache(mode='exact'), OCRCache(mode='quantized')
+    assert exact.key(noisy) != exact.key(crop(100))
+    assert quantized.key(noisy) == quantized.key(crop(100))
+    assert quantized.key(crop(100)) != quantized.key(crop(200))
+    assert quantized.key(crop(100)) != quantized.key(crop(100, (40, 40, 3)))
+
+
+def test_results_are_persisted_in_lru_order(tmp_path):
+    path = str(tmp_path / 'ocr_cache.json')
+    cache = OCRCache(max_size=3, path=path)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    cache.get('a')
+    cache.save()
+
+    loaded = OCRCache(max_size=2, path=path)
+    assert list(loaded._entries) == ['c', 'a']
+    assert loaded.get('a') == 'A'
+    assert OCRCache(mode='quantized', path=path).get('a') is None  # Keys of another mode do not match
+
+
+def test_ocr_is_not_cached_until_configured(monkeypatch):
+    monkeypatch.setattr(ocr_cache, '_default_cache', None)
+    reads = []
+    monkeypatch.setattr(utils, 'image_to_string', lambda image: reads.append(image) or 'text')
+    for _ in range(2):
+        utils.extract_text_from_image(crop(10), (0, 0), (20, 10))
+    assert len(reads) == 2
+
+    cache = configure_ocr_cache(max_size=8)
+    assert get_ocr_cache() is cache
+    for _ in range(2):
+        utils.extract_text_from_image(crop(10), (0, 0), (20, 10))
+    assert len(reads) == 3
+    assert configure_ocr_cache(max_size=0) is None
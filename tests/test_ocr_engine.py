@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+from ocr_engine import OCREnginePool
+
+
+class FakeEngine:
+    """
+    Helper class standing in for an OCR engine, recording whether it was closed.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.closed = False
+
+    def image_to_string(self, image):
+        return self.text
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_waits_for_reads_and_later_reads_use_the_subprocess():
+    engine = FakeEngine('warm')
+    pool = OCREnginePool(engines=[engine], fallback=FakeEngine('subprocess'))
+    reading, release = threading.Event(), threading.Event()
+
+    def slow_read(image):
+        reading.set()
+        release.wait(1.0)
+        return 'warm'
+
+    engine.image_to_string = slow_read
+    reader = threading.Thread(target=pool.image_to_string, args=(np.zeros((4, 4), np.uint8),))
+    reader.start()
+    reading.wait(1.0)  # A read in progress
+    closer = threading.Thread(target=pool.close)
+    closer.start()
+    closer.join(0.05)
+    assert closer.is_alive() and not engine.closed
+    release.set()
+    closer.join(1.0)
+    reader.join(1.0)
+
+    assert engine.closed
+    assert pool.image_to_string(np.zeros((4, 4), np.uint8)) == 'subprocess'
+
+
+def test_failing_engines_fall_back_to_the_subprocess():
+    engine = FakeEngine('warm')
+    engine.image_to_string = lambda image: 1 / 0
+    pool = OCREnginePool(engines=[engine], fallback=FakeEngine('subprocess'))
+    assert pool.engine == 'custom' and pool.size == 1
+    assert pool.image_to_string(np.zeros((4, 4), np.uint8)) == 'subprocess'
@@ -0,0 +1,20 @@
+import sys
+from profiling import ThreadProfiler
+
+
+def test_cprofile_falls_back_to_sampling_from_python_3_12(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'version_info', (3, 12, 0))
+    profiler = ThreadProfiler(mode='both', directory=str(tmp_path))
+    profiler.wrap(lambda: None, 'Bot')()
+    profiler.stop()
+    assert profiler.mode == 'sampling'
+    assert profiler.profiles == {}
+
+
+def test_each_thread_gets_its_own_cprofile_before_python_3_12(monkeypatch, tmp_path):
+    monkeypatch.setattr(sys, 'version_info', (3, 11, 0))
+    profiler = ThreadProfiler(mode='cprofile', directory=str(tmp_path))
+    profiler.wrap(lambda: None, 'Bot')()
+    profiler.wrap(lambda: None, 'Bot')()
+    profiler.stop()
+    assert sorted(profiler.profiles) == ['Bot', 'Bot-2']
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+from screencapture_replay import ScreenCapture
+
+
+def write_stack(tmp_path, count=3):
+    """
+    Helper function to save a `.npy` stack of grayscale frames, each filled with its index.
+    """
+    path = str(tmp_path / 'frames.npy')
+    np.save(path, np.stack([np.full((8, 12), i, np.uint8) for i in range(count)]))
+    return path
+
+
+def replay_all(capture):
+    """
+    Helper function to read frames until the replay is exhausted and return the value of each frame.
+    """
+    values = []
+    for _ in range(10):
+        image = capture.get_screenshot()
+        if image is None:
+            return values
+        assert image.shape == (8, 12, 3) and image.flags['C_CONTIGUOUS']
+        values.append(int(image[0, 0, 0]))
+    return values
+
+
+def test_stack_frames_are_replayed_in_order_until_the_end(tmp_path):
+    capture = ScreenCapture(write_stack(tmp_path), loop=False)
+    assert (capture.frame_count, capture.w, capture.h) == (3, 12, 8)
+    assert replay_all(capture) == [0, 1, 2]
+    assert capture.get_screenshot() is None
+
+
+def test_looping_replays_restart_from_the_first_frame(tmp_path):
+    capture = ScreenCapture(write_stack(tmp_path), loop=True)
+    assert [int(capture.get_screenshot()[0, 0, 0]) for _ in range(5)] == [0, 1, 2, 0, 1]
+
+
+def test_png_frames_are_replayed_in_name_order(tmp_path):
+    for i in (2, 0, 1):
+        cv2.imwrite(str(tmp_path / f'frame_{i:03d}.png'), np.full((8, 12, 3), i * 10, np.uint8))
+    (tmp_path / 'notes.txt').write_text('not a frame')
+    capture = ScreenCapture(str(tmp_path), loop=False)
+    assert replay_all(capture) == [0, 10, 20]
+
+
+def test_unlimited_rate_publishes_every_frame_without_waiting(tmp_path, monkeypatch):
+    capture = ScreenCapture(write_stack(tmp_path), fps=0, loop=False)
+    assert capture.capture_interval == 0
+    monkeypatch.setattr(capture.clock, 'sleep', lambda *args, **kwargs: pytest.fail('The replay waited'))
+    published = []
+    publish = capture.publish_screenshot
+
+    def record(image, timestamp):
+        published.append(int(image[0, 0, 0]))
+        return publish(image, timestamp)
+
+    monkeypatch.setattr(capture, 'publish_screenshot', record)
+
+    capture.stopped = False
+    capture.run()  # Returns once the source is exhausted
+    assert capture.stopped
+    assert published == [0, 1, 2]
+    assert capture.frame.seq == 3
+
+
+def test_missing_or_empty_sources_are_rejected(tmp_path):
+    with pytest.raises(Exception, match='not found'):
+        ScreenCapture(str(tmp_path / 'missing'))
+    with pytest.raises(Exception, match='no frames'):
+        ScreenCapture(str(tmp_path))
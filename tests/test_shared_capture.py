@@ -0,0 +1,172 @@
+import threading
+import time
+import uuid
+import numpy as np
+import pytest
+from multiprocessing import resource_tracker
+from clock import SimulatedClock, get_clock, set_clock
+from frame import Frame
+from frame_ring_buffer import SharedFrameRingBuffer
+from screencapture_base import ScreenCaptureBase
+from screencapture_shared import ScreenCapture, share_capture
+
+SHAPE = (24, 32, 3)
+
+
+class ScriptedCapture(ScreenCaptureBase):
+    """
+    Capture backend returning a fixed list of screenshots, then None.
+    """
+
+    capture_interval = 0
+
+    def __init__(self, screenshots):
+        super().__init__()
+        self.screenshots = list(screenshots)
+
+    def get_screenshot(self):
+        return self.screenshots.pop(0) if self.screenshots else None
+
+
+@pytest.fixture
+def name():
+    return f'test_{uuid.uuid4().hex[:12]}'
+
+
+def attach(writer, **kwargs):
+    """
+    Helper function to attach a reader in the writer process, keeping the segment registered for unlink().
+    """
+    reader = ScreenCapture(writer.name, **kwargs)
+    # Attaching in the writer process unregistered the segment, register it again
+    resource_tracker.register(writer._shm._name, 'shared_memory')
+    return reader
+
+
+def test_readers_get_copies_by_default(name):
+    writer = SharedFrameRingBuffer.create(name, SHAPE, slots=4)
+    try:
+        writer.write(np.full(SHAPE, 7, np.uint8), time.perf_counter())
+        reader = attach(writer)
+        screenshot = reader.get_screenshot()
+        writer.write(np.full(SHAPE, 8, np.uint8), time.perf_counter())
+        assert screenshot.flags.owndata
+        assert screenshot[0, 0, 0] == 7
+        reader.ring_buffer.close()
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_readers_can_get_read_only_views(name):
+    writer = SharedFrameRingBuffer.create(name, SHAPE, slots=4)
+    try:
+        writer.write(np.full(SHAPE, 7, np.uint8), time.perf_counter())
+        reader = attach(writer, copy=False)
+        screenshot = reader.get_screenshot()
+        assert not screenshot.flags.writeable
+        assert not screenshot.flags.owndata  # A view of the shared memory, not a copy
+        assert screenshot[0, 0, 0] == 7
+        reader.ring_buffer.close()
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_views_are_not_current_once_the_ring_is_lapped(name):
+    writer = SharedFrameRingBuffer.create(name, SHAPE, slots=2)
+    try:
+        reader = attach(writer, copy=False)
+        reader.stopped = False
+        thread = threading.Thread(target=reader.run)
+        thread.start()
+        frames = []
+        for value in (1, 2, 3):
+            writer.write(np.full(SHAPE, value, np.uint8), time.perf_counter())
+            frames.append(reader.wait_for_frame(frames[-1].seq if frames else 0, timeout=1.0))
+        reader.stop()
+        thread.join()
+        assert [reader.is_frame_current(frame) for frame in frames] == [False, True, True]
+        reader.ring_buffer.close()
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_aborted_write_is_not_published(name):
+    writer = SharedFrameRingBuffer.create(name, SHAPE, slots=2)
+    try:
+        writer.write(np.zeros(SHAPE, np.uint8), 1.0)
+        writer.write(np.zeros(SHAPE, np.uint8), 2.0)
+        frame = writer.read_latest(copy=False)
+        writer.begin_write()[:] = 255  # Overwrites the slot of frame 1
+        writer.abort_write()
+        assert writer.latest_seq == 2
+        assert writer.is_current(frame)
+        assert not writer.is_current(Frame(1, 1.0, np.zeros(SHAPE, np.uint8)))
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_next_frame_time(name):
+    writer = SharedFrameRingBuffer.create(name, SHAPE, slots=4)
+    try:
+        assert writer.get_next_frame_time() == 0
+        writer.write(np.zeros(SHAPE, np.uint8), 10.0)
+        writer.write(np.zeros(SHAPE, np.uint8), 10.05)
+        assert writer.get_next_frame_time() == pytest.approx(10.10)
+    finally:
+        writer.close()
+        writer.unlink()
+
+
+def test_share_capture_drops_frames_of_another_size(name, monkeypatch):
+    screenshots = [np.full(SHAPE, 1, np.uint8), np.full(SHAPE, 2, np.uint8),
+                   np.zeros((48, 64, 3), np.uint8), np.full(SHAPE, 3, np.uint8)]
+    frames = []
+    capture = ScriptedCapture(screenshots)
+    original_commit = SharedFrameRingBuffer.commit_write
+
+    def commit_write(ring_buffer, timestamp):
+        seq = original_commit(ring_buffer, timestamp)
+        frames.append(int(ring_buffer.read_latest().image[0, 0, 0]))
+        return seq
+
+    monkeypatch.setattr(SharedFrameRingBuffer, 'commit_write', commit_write)
+    share_capture(capture, name, slots=2)
+    assert frames == [1, 2, 3]
+
+
+def test_share_capture_waits_for_the_first_screenshot(name, monkeypatch):
+    frames = []
+    capture = ScriptedCapture([None, np.full(SHAPE, 1, np.uint8), np.full(SHAPE, 2, np.uint8)])
+    original_commit = SharedFrameRingBuffer.commit_write
+
+    def commit_write(ring_buffer, timestamp):
+        seq = original_commit(ring_buffer, timestamp)
+        frames.append(int(ring_buffer.read_latest().image[0, 0, 0]))
+        return seq
+
+    monkeypatch.setattr(SharedFrameRingBuffer, 'commit_write', commit_write)
+    share_capture(capture, name, slots=2)
+    assert frames == [1, 2]
+
+
+def test_share_capture_fails_clearly_without_a_screenshot(name):
+    with pytest.raises(Exception, match='No screenshot captured'):
+        share_capture(ScriptedCapture([]), name, first_frame_timeout=0)
+
+
+def test_share_capture_waits_on_the_capture_clock(name):
+    previous_clock = get_clock()
+    clock = set_clock(SimulatedClock(start=100.0))
+    try:
+        capture = ScriptedCapture([])
+    finally:
+        set_clock(previous_clock)
+    started = time.perf_counter()
+    with pytest.raises(Exception, match='No screenshot captured'):
+        share_capture(capture, name, first_frame_timeout=30)
+    assert clock.time() >= 130.0
+    assert time.perf_counter() - started < 5.0
@@ -0,0 +1,68 @@
+import os
+import cv2
+import numpy as np
+import pytest
+from template_library import Template, TemplateLibrary
+
+
+def write_template(directory, name, value, size=16):
+    """
+    Helper function to write a uniform BGR template image and return its path.
+    """
+    path = os.path.join(directory, f'{name}.png')
+    cv2.imwrite(path, np.full((size, size, 3), value, np.uint8))
+    return path
+
+
+def test_fresh_cache_is_used(tmp_path, monkeypatch):
+    write_template(tmp_path, 'button', 50)
+    cache_path = str(tmp_path / 'templates.npz')
+    TemplateLibrary(str(tmp_path), cache_path=cache_path)
+
+    monkeypatch.setattr(Template, 'from_file', lambda path, pyramid_levels=0: pytest.fail('Image decoded again'))
+    library = TemplateLibrary(str(tmp_path), cache_path=cache_path)
+    assert library['button'].image[0, 0, 0] == 50
+
+
+def test_cache_is_rebuilt_when_an_image_is_newer(tmp_path):
+    path = write_template(tmp_path, 'button', 50)
+    cache_path = str(tmp_path / 'templates.npz')
+    TemplateLibrary(str(tmp_path), cache_path=cache_path)
+
+    write_template(tmp_path, 'button', 200)
+    cache_time = os.path.getmtime(cache_path)
+    os.utime(path, (cache_time + 10, cache_time + 10))
+    library = TemplateLibrary(str(tmp_path), cache_path=cache_path)
+    assert library['button'].image[0, 0, 0] == 200
+    assert TemplateLibrary(str(tmp_path), cache_path=cache_path)['button'].image[0, 0, 0] == 200
+
+
+def test_cache_is_rebuilt_when_an_older_image_replaces_one(tmp_path):
+    path = write_template(tmp_path, 'button', 50)
+    cache_path = str(tmp_path / 'templates.npz')
+    TemplateLibrary(str(tmp_path), cache_path=cache_path)
+
+    # A copy keeping its original modification time, e.g. `cp -p`
+    write_template(tmp_path, 'button', 200, size=24)
+    cache_time = os.path.getmtime(cache_path)
+    os.utime(path, (cache_time - 10, cache_time - 10))
+    library = TemplateLibrary(str(tmp_path), cache_path=cache_path)
+    assert library['button'].width == 24
+
+
+def test_alpha_becomes_the_mask_and_survives_the_cache(tmp_path):
+    image = np.full((16, 16, 4), 120, np.uint8)
+    image[:, :8, 3] = 0
+    image[:, 8:, 3] = 255
+    cv2.imwrite(str(tmp_path / 'icon.png'), image)
+    cache_path = str(tmp_path / 'templates.npz')
+
+    for _ in range(2):  # Built from the image, then loaded from the cache
+        template = TemplateLibrary(str(tmp_path), cache_path=cache_path)['icon']
+        assert template.image.shape == (16, 16, 3)
+        np.testing.assert_array_equal(template.mask, image[..., 3])
+
+
+def test_opaque_images_have_no_mask():
+    image = np.full((16, 16, 4), 255, np.uint8)
+    assert Template.from_image('opaque', image).mask is None
@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+from benchmark import load_fixtures
+from template_library import Template
+from utils import detect_template_in_image, detect_templates_in_image, match_template, match_template_pyramid
+
+FRAMES, TEMPLATES, _ = load_fixtures()
+
+
+@pytest.mark.parametrize('size', sorted(TEMPLATES))
+@pytest.mark.parametrize('name', sorted(FRAMES))
+def test_pyramid_matching_finds_the_full_resolution_rectangles(name, size):
+    image, template = FRAMES[name], TEMPLATES[size]
+    full = detect_template_in_image(image, template=template)
+    pyramid = detect_template_in_image(image, template=template, pyramid_levels=2)
+    assert len(pyramid) == len(full)
+    for rectangle in full:
+        assert np.abs(pyramid - rectangle).max(axis=1).min() <= 1
+
+
+@pytest.mark.parametrize('method', [cv2.TM_SQDIFF, cv2.TM_CCORR, cv2.TM_CCOEFF])
+def test_unnormalized_methods_are_matched_at_full_resolution(method):
+    image, template = FRAMES['frame_pww_bot_multi_books'], TEMPLATES[32]
+    result = match_template_pyramid(image, template, method=method, levels=2)
+    np.testing.assert_array_equal(result, match_template(image, template, method))
+
+
+def batch_templates():
+    """
+    Helper function to name the fixture templates, both as Template objects and as plain arrays.
+    """
+    templates = {f'button_{size}': Template.from_image(f'button_{size}', TEMPLATES[size]) for size in sorted(TEMPLATES)}
+    templates.update({f'raw_button_{size}': TEMPLATES[size] for size in sorted(TEMPLATES)})
+    return templates
+
+
+@pytest.mark.parametrize('grayscale', [False, True])
+@pytest.mark.parametrize('max_workers', [None, 1, 2])
+def test_batch_detection_matches_serial_detection(grayscale, max_workers):
+    image = FRAMES['frame_pww_bot_multi_books']
+    templates = batch_templates()
+    options = {'grayscale': grayscale, 'pyramid_levels': 2, 'return_scores': True}
+    results = detect_templates_in_image(image, templates, max_workers=max_workers, **options)
+    assert list(results) == list(templates)
+    for name, template in templates.items():
+        rectangles, scores = detect_template_in_image(image, template=template, **options)
+        np.testing.assert_array_equal(results[name][0], rectangles)
+        np.testing.assert_array_equal(results[name][1], scores)
+
+
+def test_batch_detection_needs_names():
+    with pytest.raises(TypeError):
+        detect_templates_in_image(FRAMES['frame_pww_bot_book'], list(TEMPLATES.values()))
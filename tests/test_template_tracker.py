@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+from template_tracker import TemplateTracker
+
+TEMPLATE = np.zeros((30, 30, 3), np.uint8)
+cv2.circle(TEMPLATE, (15, 15), 10, (0, 200, 255), -1)
+cv2.rectangle(TEMPLATE, (2, 2), (27, 27), (255, 255, 255), 2)
+
+
+def make_frame(positions, seed=0):
+    """
+    Helper function to draw the template at the given (x, y) positions on a noisy background.
+    """
+    image = np.random.default_rng(seed).integers(0, 40, (300, 400, 3), dtype=np.uint8)
+    for x, y in positions:
+        image[y:y + 30, x:x + 30] = TEMPLATE
+    return image
+
+
+def test_moving_template_is_tracked_inside_the_search_windows():
+    tracker = TemplateTracker(TEMPLATE, search_margin=16, full_scan_interval=100)
+    path = [(50 + 5 * i, 60 + 3 * i) for i in range(10)]
+    for i, position in enumerate(path):
+        rectangles = tracker.detect(make_frame([position], seed=i))
+        assert rectangles.tolist() == [[*position, 30, 30]]
+    assert tracker.full_scans == 1
+    assert tracker.tracked_hits == 9
+    assert tracker.hit_rate == 0.9
+
+
+def test_a_tracked_miss_scans_the_full_frame():
+    tracker = TemplateTracker(TEMPLATE, search_margin=16)
+    tracker.detect(make_frame([(50, 60)]))
+    rectangles = tracker.detect(make_frame([(300, 200)], seed=1))  # Jumped outside the search window
+    assert rectangles.tolist() == [[300, 200, 30, 30]]
+    assert tracker.full_scans == 2 and tracker.tracked_hits == 0
+
+
+def test_full_scans_pick_up_new_instances_every_interval():
+    tracker = TemplateTracker(TEMPLATE, search_margin=16, full_scan_interval=3)
+    tracker.detect(make_frame([(50, 60)]))
+    for i in range(3):
+        assert len(tracker.detect(make_frame([(50, 60), (300, 200)], seed=i))) == 1  # Only the tracked one
+    rectangles = tracker.detect(make_frame([(50, 60), (300, 200)], seed=3))
+    assert sorted(rectangles.tolist()) == [[50, 60, 30, 30], [300, 200, 30, 30]]
+    assert tracker.full_scans == 2 and tracker.tracked_hits == 3
+
+    tracker.reset()
+    assert tracker.frames == tracker.full_scans == 0 and len(tracker.rectangles) == 0
@@ -0,0 +1,67 @@
+import time
+import numpy as np
+import pytest
+from bot import Bot
+from input_backend import ActionQueue, RecordingInputBackend
+from screencapture_base import ScreenCaptureBase
+from tracing import Tracer
+
+
+def make_bot():
+    """
+    Helper function to create a running bot tracing its spans, reading frames published by hand and clicking on a recording backend.
+    """
+    source = ScreenCaptureBase()
+    bot = Bot()
+    bot.set_frame_source(source)
+    bot.stopped = False
+    bot.frame_timeout = 0.05
+    bot.tracer = Tracer()
+    bot.action_queue = ActionQueue(RecordingInputBackend())
+    return bot, source
+
+
+def wait_for_events(tracer, category, count, timeout=1.0):
+    """
+    Helper function to wait until the tracer recorded `count` events of a category, the decision
+    is recorded by the action thread once the clicks landed.
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        events = [event for event in tracer.get_trace()['traceEvents'] if event.get('cat') == category]
+        if len(events) >= count:
+            return events
+        time.sleep(0.005)
+    return events
+
+
+def test_a_read_and_its_click_are_traced_as_one_decision():
+    bot, source = make_bot()
+    bot._read_integer = lambda screenshot, points, crop: 42
+    try:
+        source.publish_screenshot(np.zeros((40, 40, 3), np.uint8), time.perf_counter())
+        frame = source.frame
+        assert bot.extract_integer_from_area([(0, 0), (20, 20)]) == 42
+        bot.click((5, 5), delay=0)
+        events = wait_for_events(bot.tracer, 'decision', 6)
+    finally:
+        bot.action_queue.stop()
+
+    # One async tree keyed by the frame: the decision around its read and its click sequence
+    assert [(event['name'], event['ph']) for event in events] == [
+        ('decision', 'b'), ('extract_integer', 'b'), ('extract_integer', 'e'),
+        ('click_sequence', 'b'), ('click_sequence', 'e'), ('decision', 'e')]
+    assert {event['id'] for event in events} == {f'frame-{frame.seq}'}
+    times = {(event['name'], event['ph']): event['ts'] for event in events}
+    assert times['decision', 'b'] <= times['extract_integer', 'b'] <= times['extract_integer', 'e']
+    assert times['extract_integer', 'e'] <= times['click_sequence', 'b'] <= times['click_sequence', 'e'] <= times['decision', 'e']
+
+    root = events[0]['args']
+    assert root['frame_seq'] == frame.seq
+    assert root['capture_timestamp'] == frame.timestamp
+    assert root['latency_ms'] == pytest.approx((events[-1]['ts'] / 1e6 - frame.timestamp) * 1e3)
+    assert root['latency_ms'] > 0
+
+    # The read and the click are also recorded on the track of the bot thread
+    spans = [event['name'] for event in bot.tracer.get_trace()['traceEvents'] if event['ph'] == 'X']
+    assert spans == ['extract_integer', 'click_sequence']
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+from collections import deque
+
+
+class Tracer:
+    """
+    Records spans in the Chrome trace-event format, to be opened in chrome://tracing or
+    https://ui.perfetto.dev.
+
+    Spans of a thread (states, reads, click sequences, captures) are recorded as complete
+    events on the track of that thread. Each decision of a bot, from the capture of the
+    frame it read to the landing of the click it triggered, is recorded as a tree of
+    async events keyed by the sequence number of the frame, so the whole capture-to-action
+    latency and its parts show up on their own track.
+
+    Times are clock times in seconds, converted to the microseconds of the format.
+
+    Attributes:
+        events (deque): Recorded trace events, the oldest are dropped first.
+    """
+
+    def __init__(self, max_events=100000):
+        """
+        Initialize the tracer.
+
+        Args:
+            max_events (int, optional): Maximum number of kept events (default 100000).
+        """
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self._thread_names = {}  # Thread id -> name, written as metadata events on save
+
+    def _tid(self):
+        """
+        Helper function to get the id of the calling thread and remember its name.
+        """
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def complete(self, name, start, end, category='bot', args=None):
+        """
+        Record a span of the calling thread.
+
+        Args:
+            name (str): Name of the span.
+            start (float): Clock time when the span started.
+            end (float): Clock time when the span ended.
+            category (str, optional): Category of the span (default 'bot').
+            args (dict, optional): Values shown with the span, e.g. the frame sequence number.
+        """
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': start * 1e6, 'dur': max(end - start, 0) * 1e6,
+                 'pid': self.pid, 'tid': self._tid()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def decision(self, frame, end, children, args=None):
+        """
+        Record the span tree of a decision: from the capture of a frame until the action it triggered.
+
+        Args:
+            frame (Frame): The frame the decision was based on.
+            end (float): Clock time when the action completed.
+            children (list): The (name, start, end, args) spans of the decision, in order.
+            args (dict, optional): Values shown with the decision span.
+        """
+        tid = self._tid()
+        span_id = f'frame-{frame.seq}'
+        common = {'cat': 'decision', 'id': span_id, 'pid': self.pid, 'tid': tid}
+        root_args = {'frame_seq': frame.seq, 'capture_timestamp': frame.timestamp, 'latency_ms': (end - frame.timestamp) * 1e3}
+        root_args.update(args or {})
+
+        # Reads of older frames may belong to the decision too, the tree starts with the earliest span
+        start = min([frame.timestamp] + [child[1] for child in children])
+        events = [dict(common, name='decision', ph='b', ts=start * 1e6, args=root_args)]
+        for name, child_start, child_end, child_args in children:
+            events.append(dict(common, name=name, ph='b', ts=child_start * 1e6, args=child_args or {}))
+            events.append(dict(common, name=name, ph='e', ts=child_end * 1e6))
+        events.append(dict(common, name='decision', ph='e', ts=end * 1e6))
+        self.events.extend(events)
+
+    def get_trace(self):
+        """
+        Get the recorded events as a trace.
+
+        Returns:
+            dict: The trace in the Chrome trace-event JSON object format.
+        """
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in list(self._thread_names.items())]
+        return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        """
+        Write the trace to a JSON file.
+
+        Args:
+            path (str): Path of the trace file.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_trace(), f)
+
+
+# **************************************************
+# * Default Tracer
+# **************************************************
+
+_default_tracer = None  # Tracer picked up by the bots, capture backends and action queues when created, None disables tracing
+
+
+def configure_tracing(max_events=100000):
+    """
+    Enable tracing. Objects created afterwards record their spans in the new tracer.
+
+    Args:
+        max_events (int, optional): Maximum number of kept events (default 100000).
+
+    Returns:
+        Tracer: The new default tracer.
+    """
+    global _default_tracer
+    _default_tracer = Tracer(max_events=max_events)
+    return _default_tracer
+
+
+def get_tracer():
+    """
+    Get the default tracer.
+
+    Returns:
+        Tracer: The default tracer, or None when tracing is disabled.
+    """
+    return _default_tracer
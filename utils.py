@@ -1,6 +1,29 @@
-import pytesseract
+import os
 import cv2 
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from ocr_engine import image_to_string
+from ocr_cache import get_ocr_cache
+from template_library import Template, load_template
+
+def crop_image(image, top_left, bottom_right):
+    """
+    Crop a region of an image given two opposite corners.
+
+    Args:
+        image (ndarray): The input image.
+        top_left (tuple): Coordinates of the top-left corner (x, y) of the region.
+        bottom_right (tuple): Coordinates of the bottom-right corner (x, y) of the region.
+
+    Returns:
+        ndarray: A view of the specified region.
+    """
+    # Ensure coordinates are in correct order (top-left, bottom-right)
+    x1, y1 = min(top_left[0], bottom_right[0]), min(top_left[1], bottom_right[1])
+    x2, y2 = max(top_left[0], bottom_right[0]), max(top_left[1], bottom_right[1])
+
+    return image[y1:y2, x1:x2]
 
 def extract_text_from_image(image, top_left, bottom_right):
     """
@@ -14,15 +37,15 @@ def extract_text_from_image(image, top_left, bottom_right):
     Returns:
         str: The extracted text from the specified region.
     """
-    # Ensure coordinates are in correct order (top-left, bottom-right)
-    x1, y1 = min(top_left[0], bottom_right[0]), min(top_left[1], bottom_right[1])
-    x2, y2 = max(top_left[0], bottom_right[0]), max(top_left[1], bottom_right[1])
-    
     # Crop the image to the region
-    cropped_image = image[y1:y2, x1:x2]
+    cropped_image = crop_image(image, top_left, bottom_right)
     
-    # Use OCR to extract text
-    extracted_text = pytesseract.image_to_string(cropped_image)
+    # Use OCR to extract text with a warm engine of the shared pool, unless the same crop was read before
+    cache = get_ocr_cache()
+    if cache is not None:
+        extracted_text = cache.image_to_string(cropped_image, image_to_string)
+    else:
+        extracted_text = image_to_string(cropped_image)
     
     return extracted_text
 
@@ -49,37 +72,367 @@ def get_rectangle_from_points(top_left, bottom_right):
     # Return the rectangle as (x, y, width, height)
     return (x1, y1, width, height)
 
-def detect_template_in_image(image, template=None, template_path=None, threshold=0.75, method=cv2.TM_CCOEFF_NORMED):
+def detect_template_in_image(image, template=None, template_path=None, threshold=0.75, method=cv2.TM_CCOEFF_NORMED, grayscale=False,
+                             grouping='groupRectangles', iou_threshold=0.3, top_k=None, return_scores=False,
+                             pyramid_levels=0, refine_radius=2, coarse_margin=0.2, image_pyramid=None):
     """
     Detect the presence of a template image within a larger image using template matching.
 
     Args:
         image (ndarray): The larger image to search within.
-        template (ndarray, optional): The template image to search for.
+        template (ndarray or Template, optional): The template image to search for. A prepared `Template`
+                                                  is matched with its alpha mask and matching channels.
         template_path (str, optional): Path to the template image file if template is not provided.
+                                       The file is loaded and prepared only once.
         threshold (float, optional): The matching threshold (default 0.75).
         method (int, optional): OpenCV matching method (default cv2.TM_CCOEFF_NORMED).
+        grayscale (bool, optional): Match in grayscale, which is about three times faster (default False).
+                                    A prepared `Template` uses its grayscale version, a BGR ndarray
+                                    template is converted.
+        grouping (str, optional): 'groupRectangles' for the OpenCV grouping, which averages overlapping
+                                  matches, or 'nms' for vectorized peak extraction and non-maximum
+                                  suppression, which keeps the best match of each group and is faster
+                                  when many locations pass the threshold (default 'groupRectangles').
+        iou_threshold (float, optional): Overlap above which weaker detections are suppressed (default 0.3), 'nms' only.
+        top_k (int, optional): Maximum number of detections to return, strongest first.
+        return_scores (bool, optional): Also return the match score of each detection (default False).
+        pyramid_levels (int, optional): Number of times the image is halved for a coarse match before
+                                        refining the candidates at full resolution, 0 matches the whole
+                                        image at full resolution (default 0).
+        refine_radius (int, optional): Extra search radius in full resolution pixels around each
+                                       coarse candidate (default 2).
+        coarse_margin (float, optional): How much lower than `threshold` a coarse score may be to still
+                                         be refined (default 0.2).
+        image_pyramid (list, optional): Precomputed pyramid of `image`, shared by several templates.
 
     Returns:
-        list: A list of detected rectangles [(x, y, w, h)] for the template.
+        list: A list of detected rectangles [(x, y, w, h)] for the template, and the list of
+              their scores if `return_scores` is True.
     """
     if template is None:
-        template = cv2.imread(template_path, cv2.IMREAD_UNCHANGED)
+        template = load_template(template_path)
+
+    mask = None
+    template_pyramid = None
+    if isinstance(template, Template):
+        mask = template.mask
+        if grayscale:
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            template_pyramid = template.gray_pyramid
+        else:
+            template_pyramid = template.pyramid
+        template = template_pyramid[0]
+    elif grayscale:
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if template.ndim == 3:
+            template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
 
     # Run the template matching algorithm
-    match_result = cv2.matchTemplate(image, template, method)
+    if pyramid_levels > 0:
+        match_result = match_template_pyramid(image, template, method, mask=mask, levels=pyramid_levels,
+                                              threshold=threshold, refine_radius=refine_radius,
+                                              coarse_margin=coarse_margin, template_pyramid=template_pyramid,
+                                              image_pyramid=image_pyramid)
+    else:
+        match_result = match_template(image, template, method, mask=mask)
+
+    rectangles, scores = get_matches_from_result(match_result, template.shape[1], template.shape[0], threshold, method,
+                                                 grouping=grouping, iou_threshold=iou_threshold, top_k=top_k)
+    if return_scores:
+        return rectangles, scores
+    return rectangles
+
+def detect_templates_in_image(image, templates, threshold=0.75, method=cv2.TM_CCOEFF_NORMED, grayscale=False,
+                              pyramid_levels=0, max_workers=None, **kwargs):
+    """
+    Detect several templates within one image, sharing the image preprocessing and running
+    the matches in parallel (OpenCV releases the GIL while matching).
+
+    Args:
+        image (ndarray): The larger image to search within.
+        templates (dict or iterable): Templates (ndarray or `Template`) by name, or an iterable of
+                                      prepared `Template` objects such as a `TemplateLibrary`.
+        threshold (float, optional): The matching threshold (default 0.75).
+        method (int, optional): OpenCV matching method (default cv2.TM_CCOEFF_NORMED).
+        grayscale (bool, optional): Convert the image to grayscale once and match in grayscale (default False).
+        pyramid_levels (int, optional): Pyramid levels of the coarse-to-fine match, the image
+                                        pyramid is built once for all templates (default 0).
+        max_workers (int, optional): Number of threads matching the templates (default: number of CPUs).
+                                     Use 1 to match serially on the calling thread.
+        **kwargs: Other options of `detect_template_in_image` (grouping, iou_threshold, top_k, return_scores...).
+
+    Returns:
+        dict: The result of `detect_template_in_image` for each template name.
+
+    Raises:
+        TypeError: If `templates` is an iterable of anything else than `Template` objects, which have no name.
+    """
+    if not isinstance(templates, dict):
+        templates = list(templates)
+        if not all(isinstance(template, Template) for template in templates):
+            raise TypeError('Pass unnamed templates as a dict of templates by name, only Template objects have a name')
+        templates = {template.name: template for template in templates}
+
+    if grayscale and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    image_pyramid = build_pyramid(image, pyramid_levels) if pyramid_levels > 0 else None
+
+    def detect(template):
+        return detect_template_in_image(image, template=template, threshold=threshold, method=method,
+                                        grayscale=grayscale, pyramid_levels=pyramid_levels,
+                                        image_pyramid=image_pyramid, **kwargs)
+
+    if len(templates) <= 1 or max_workers == 1:
+        return {name: detect(template) for name, template in templates.items()}
+
+    # The calling thread matches too, the pool only needs the other threads
+    executor = _get_detection_executor(max_workers - 1 if max_workers else None)
+    futures = {name: executor.submit(detect, template) for name, template in list(templates.items())[1:]}
+    # Match the first template on the calling thread instead of leaving it idle
+    first_name, first_template = next(iter(templates.items()))
+    results = {first_name: detect(first_template)}
+    for name, future in futures.items():
+        results[name] = future.result()
+    return {name: results[name] for name in templates}
+
+_detection_executors = {}  # Thread pools shared by the batch detections by number of threads, created on first use
+_detection_executor_lock = Lock()
+
+def _get_detection_executor(max_workers=None):
+    """
+    Helper function to get the thread pool used by `detect_templates_in_image`.
+
+    Args:
+        max_workers (int, optional): Number of threads of the pool (default: number of CPUs).
+
+    Returns:
+        ThreadPoolExecutor: The shared thread pool with this number of threads.
+    """
+    max_workers = max_workers or os.cpu_count() or 4
+    with _detection_executor_lock:
+        executor = _detection_executors.get(max_workers)
+        if executor is None:
+            executor = _detection_executors[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='template-match')
+        return executor
+
+def match_template(image, template, method=cv2.TM_CCOEFF_NORMED, mask=None):
+    """
+    Run `cv2.matchTemplate`, with an optional mask.
+
+    Args:
+        image (ndarray): The image to search within.
+        template (ndarray): The template to search for.
+        method (int, optional): OpenCV matching method (default cv2.TM_CCOEFF_NORMED).
+        mask (ndarray, optional): Template mask, None to match all template pixels.
+
+    Returns:
+        ndarray: The match result.
+    """
+    if mask is None:
+        return cv2.matchTemplate(image, template, method)
+
+    match_result = cv2.matchTemplate(image, template, method, mask=mask)
+    # Masked matching yields NaN or infinity where the masked area has no variance
+    np.nan_to_num(match_result, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return match_result
+
+def build_pyramid(image, levels):
+    """
+    Build an image pyramid by repeatedly halving the image with `cv2.pyrDown`.
+
+    Args:
+        image (ndarray): The full resolution image.
+        levels (int): Number of downscaled levels.
+
+    Returns:
+        list: The pyramid images, `pyramid[0]` is the full resolution image.
+    """
+    pyramid = [image]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+# Matching methods whose scores are normalized, so that a threshold holds at every pyramid level
+NORMED_METHODS = (cv2.TM_SQDIFF_NORMED, cv2.TM_CCORR_NORMED, cv2.TM_CCOEFF_NORMED)
+
+def match_template_pyramid(image, template, method=cv2.TM_CCOEFF_NORMED, mask=None, levels=2, threshold=0.75,
+                           refine_radius=2, coarse_margin=0.2, template_pyramid=None, image_pyramid=None):
+    """
+    Coarse-to-fine template matching: match the downscaled template over the downscaled image,
+    then run the full resolution match only around the regions of coarse candidates.
+
+    The result has the same shape as a full resolution `cv2.matchTemplate` result. Inside the refined
+    windows it holds the exact full resolution scores, everywhere else the worst possible score,
+    so the detections are the same as a full resolution match as long as every true match
+    survives the coarse stage.
+
+    The coarse stage compares the scores with `threshold - coarse_margin`, which only makes sense
+    for normalized scores, so the unnormalized methods (TM_SQDIFF, TM_CCORR, TM_CCOEFF) are matched
+    at full resolution.
 
-    # Get all the match positions exceeding the threshold
-    locations = np.where(match_result >= threshold)
-    locations = list(zip(*locations[::-1]))
+    Args:
+        image (ndarray): The image to search within.
+        template (ndarray): The template to search for.
+        method (int, optional): OpenCV matching method (default cv2.TM_CCOEFF_NORMED).
+        mask (ndarray, optional): Template mask, None to match all template pixels.
+        levels (int, optional): Number of times the image is halved for the coarse match (default 2).
+        threshold (float, optional): The matching threshold (default 0.75).
+        refine_radius (int, optional): Extra search radius in full resolution pixels around each candidate (default 2).
+        coarse_margin (float, optional): How much lower than `threshold` a coarse score may be (default 0.2).
+        template_pyramid (list, optional): Precomputed template pyramid, e.g. from a `Template`.
+        image_pyramid (list, optional): Precomputed image pyramid shared by several templates.
+
+    Returns:
+        ndarray: The match result at full resolution.
+    """
+    template_h, template_w = template.shape[:2]
+    lower_is_better = method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+
+    # Do not shrink the template below a few pixels, the coarse match would become meaningless
+    while levels > 0 and min(template_h, template_w) >> levels < 4:
+        levels -= 1
+
+    if levels == 0 or method not in NORMED_METHODS:
+        return match_template(image, template, method, mask=mask)
+
+    if image_pyramid is None or len(image_pyramid) <= levels:
+        image_pyramid = build_pyramid(image, levels)
+    if template_pyramid is None or len(template_pyramid) <= levels:
+        template_pyramid = build_pyramid(template, levels)
+    coarse_mask = mask
+    for _ in range(levels if mask is not None else 0):
+        coarse_mask = cv2.pyrDown(coarse_mask)
+
+    coarse_result = match_template(image_pyramid[levels], template_pyramid[levels], method, mask=coarse_mask)
+
+    # Group the coarse candidates into regions: on flat areas such as buttons the best full resolution
+    # match can lie a few coarse pixels away from the coarse peak, so whole regions are refined
+    if lower_is_better:
+        candidates = coarse_result <= threshold + coarse_margin
+    else:
+        candidates = coarse_result >= threshold - coarse_margin
+    _, _, regions, _ = cv2.connectedComponentsWithStats(candidates.astype(np.uint8), connectivity=8)
+
+    result_h = image.shape[0] - template_h + 1
+    result_w = image.shape[1] - template_w + 1
+    worst = np.finfo(np.float32).max if lower_is_better else np.finfo(np.float32).min
+    match_result = np.full((result_h, result_w), worst, dtype=np.float32)
+
+    scale = 1 << levels
+    radius = scale + refine_radius
+    for x, y, w, h, _ in regions[1:] * scale:
+        x1, y1 = max(x - radius, 0), max(y - radius, 0)
+        x2, y2 = min(x + w - scale + radius, result_w - 1), min(y + h - scale + radius, result_h - 1)
+        window = image[y1:y2 + template_h, x1:x2 + template_w]
+        match_result[y1:y2 + 1, x1:x2 + 1] = match_template(window, template, method, mask=mask)
+
+    return match_result
+
+def get_matches_from_result(match_result, width, height, threshold=0.75, method=cv2.TM_CCOEFF_NORMED,
+                            grouping='groupRectangles', iou_threshold=0.3, top_k=None):
+    """
+    Turn a `cv2.matchTemplate` result into detected rectangles.
+
+    Args:
+        match_result (ndarray): The match result of `cv2.matchTemplate`.
+        width (int): Width of the template.
+        height (int): Height of the template.
+        threshold (float, optional): The matching threshold (default 0.75).
+        method (int, optional): OpenCV matching method used to compute the result (default cv2.TM_CCOEFF_NORMED).
+        grouping (str, optional): 'groupRectangles' or 'nms' (default 'groupRectangles').
+        iou_threshold (float, optional): Overlap above which weaker detections are suppressed (default 0.3), 'nms' only.
+        top_k (int, optional): Maximum number of detections to return, strongest first.
+
+    Returns:
+        tuple: An array of rectangles (N, 4) as (x, y, w, h) and an array of their N scores.
+    """
+    if grouping == 'groupRectangles':
+        # Get all the match positions exceeding the threshold
+        locations = np.where(match_result >= threshold)
+        locations = list(zip(*locations[::-1]))
+
+        # Extract rectangles for detected matches
+        rectangles = _get_rectangles_from_locations(locations, width, height)
+
+        # Group overlapping rectangles
+        grouped_rectangles, _ = cv2.groupRectangles(rectangles, groupThreshold=1, eps=0.5)
+        grouped_rectangles = np.asarray(grouped_rectangles, dtype=np.int32).reshape(-1, 4)
+        scores = match_result[grouped_rectangles[:, 1], grouped_rectangles[:, 0]]
+        if top_k is not None:
+            order = np.argsort(-scores, kind='stable')[:top_k]
+            grouped_rectangles, scores = grouped_rectangles[order], scores[order]
+        return grouped_rectangles, scores
+
+    if grouping != 'nms':
+        raise ValueError(f'Unknown grouping: {grouping}')
+
+    # Square difference methods are better when lower, flip them so higher is always better
+    lower_is_better = method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+    score_map = -match_result if lower_is_better else match_result
+    score_threshold = -threshold if lower_is_better else threshold
+
+    xs, ys, scores = _extract_peaks(score_map, score_threshold)
+    rectangles = np.column_stack((xs, ys, np.full_like(xs, width), np.full_like(xs, height))).astype(np.int32)
+    keep = non_max_suppression(rectangles, scores, iou_threshold, top_k)
+
+    scores = scores[keep]
+    return rectangles[keep], -scores if lower_is_better else scores
+
+def _extract_peaks(score_map, threshold):
+    """
+    Helper function to find the local maxima of a match result above a threshold.
 
-    # Extract rectangles for detected matches
-    rectangles = _get_rectangles_from_locations(locations, template.shape[1], template.shape[0])
+    Args:
+        score_map (ndarray): Match result where higher is better.
+        threshold (float): Minimum score of a peak.
 
-    # Group overlapping rectangles
-    grouped_rectangles, _ = cv2.groupRectangles(rectangles, groupThreshold=1, eps=0.5)
+    Returns:
+        tuple: Arrays of the x and y coordinates of the peaks and their scores.
+    """
+    # A pixel is a peak if no pixel of its 3x3 neighbourhood is higher
+    dilated = cv2.dilate(score_map, np.ones((3, 3), np.uint8))
+    ys, xs = np.nonzero((score_map >= threshold) & (score_map >= dilated))
+    return xs.astype(np.int32), ys.astype(np.int32), score_map[ys, xs]
+
+def non_max_suppression(rectangles, scores, iou_threshold=0.3, top_k=None):
+    """
+    Greedy non-maximum suppression on arrays of rectangles.
 
-    return grouped_rectangles
+    Args:
+        rectangles (ndarray): Rectangles (N, 4) as (x, y, w, h).
+        scores (ndarray): Score of each rectangle, higher is better.
+        iou_threshold (float, optional): Intersection over union above which the weaker rectangle is dropped (default 0.3).
+        top_k (int, optional): Maximum number of rectangles to keep.
+
+    Returns:
+        ndarray: Indices of the kept rectangles, strongest first.
+    """
+    if len(rectangles) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    x1 = rectangles[:, 0].astype(np.float32)
+    y1 = rectangles[:, 1].astype(np.float32)
+    x2 = x1 + rectangles[:, 2]
+    y2 = y1 + rectangles[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size > 0 and (top_k is None or len(keep) < top_k):
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        # Overlap of the best rectangle with all remaining ones at once
+        inter_w = np.maximum(0, np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]))
+        inter_h = np.maximum(0, np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]))
+        intersection = inter_w * inter_h
+        iou = intersection / (areas[best] + areas[rest] - intersection)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.intp)
 
 def _get_rectangles_from_locations(locations, width, height):
     """
@@ -100,6 +453,68 @@ def _get_rectangles_from_locations(locations, width, height):
         rectangles.append(rect)  # Adding twice for groupRectangles
     return rectangles
 
+def draw_detected_rectangles(image, rectangles):
+    """
+    Draw rectangles on the image based on the detected regions.
+
+    Args:
+        image (numpy.ndarray): The image where the rectangles will be drawn.
+        rectangles (list): List of detected rectangles [(x, y, width, height)].
+    
+    Returns:
+        numpy.ndarray: The image with drawn rectangles.
+    """
+    line_color = (0, 255, 0)  # Green color for the rectangle (BGR format)
+    line_type = cv2.LINE_4
+
+    for (x, y, w, h) in rectangles:
+        top_left = (x, y)
+        bottom_right = (x + w, y + h)
+        cv2.rectangle(image, top_left, bottom_right, line_color, lineType=line_type)
+    
+    return image
+
+def draw_debug_overlay(image, fps, mouse_pos, get_screen_position, selection=None, rectangles=None, scale=1.0):
+    """
+    Draw the debug viewer overlay: FPS and mouse position, the area being selected and the detected rectangles.
+
+    Args:
+        image (numpy.ndarray): The image to draw on.
+        fps (float): Frames per second shown by the viewer.
+        mouse_pos (tuple): Mouse position (x, y) in the screenshot.
+        get_screen_position (callable): Function translating a screenshot position to the screen position.
+        selection (tuple, optional): Start and end points of the area being selected, None when not selecting.
+        rectangles (list, optional): Detected rectangles [(x, y, width, height)].
+        scale (float, optional): Size of the image relative to the screenshot, positions are given in the screenshot (default 1.0).
+
+    Returns:
+        numpy.ndarray: The image with the overlay.
+    """
+    def to_image(point):
+        return (int(point[0] * scale), int(point[1] * scale))
+
+    # Display mouse position and FPS on the image
+    global_x, global_y = get_screen_position(mouse_pos)
+    cv2.putText(image, f"FPS: {fps:.2f} x: {mouse_pos[0]}({global_x}) y: {mouse_pos[1]}({global_y})",
+                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (100, 100, 100), 2)
+
+    # Draw the rectangle if in drawing mode
+    if selection is not None:
+        start_point, end_point = selection
+        cv2.rectangle(image, to_image(start_point), to_image(end_point), (100, 100, 100), 1)
+        start_x, start_y = get_screen_position(start_point)
+        cv2.putText(image, f"{start_x}, {start_y}", to_image(start_point), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100, 100, 100), 2)
+        end_x, end_y = get_screen_position(end_point)
+        cv2.putText(image, f"{end_x}, {end_y}", to_image(end_point), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (100, 100, 100), 2)
+
+    # Draw detected rectangles if available
+    if rectangles is not None:
+        if scale != 1.0:
+            rectangles = [(int(x * scale), int(y * scale), int(w * scale), int(h * scale)) for (x, y, w, h) in rectangles]
+        draw_detected_rectangles(image, rectangles)
+
+    return image
+
 def parse_rectangle_string(rect_string, default=None):
     """
     Parse a string into a tuple representing the window rectangle.